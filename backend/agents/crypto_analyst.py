@@ -16,6 +16,7 @@ import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data_fetchers.okx_fetcher import OKXFetcher
+import indicators
 
 
 class CryptoAnalysisState(TypedDict):
@@ -101,21 +102,29 @@ class CryptoAnalystAgent:
         # 获取K线数据
         df = self.fetcher.get_candles(symbol, timeframe, limit=100)
 
-        # 计算技术指标
+        # 计算技术指标（只需要最新一根的值）
         if not df.empty:
-            df_with_indicators = self.fetcher.calculate_indicators(df)
-            latest = df_with_indicators.iloc[-1]
+            close = df['close'].to_numpy(dtype=float)
+            macd = indicators.macd(close, 12, 26, 9)
+            bands = indicators.bollinger_bands(close, 20, num_std=2)
+            latest = {
+                'rsi': indicators.rsi(close, 14)[-1],
+                'macd': macd['macd'][-1],
+                'macd_signal': macd['signal'][-1],
+                'bb_upper': bands['upper'][-1],
+                'bb_lower': bands['lower'][-1],
+            }
 
             market_data = {
                 "current_price": ticker.get('last', 0),
                 "high_24h": ticker.get('high_24h', 0),
                 "low_24h": ticker.get('low_24h', 0),
                 "volume_24h": ticker.get('vol_24h', 0),
-                "rsi": round(latest['rsi'], 2) if 'rsi' in latest else None,
-                "macd": round(latest['macd'], 2) if 'macd' in latest else None,
-                "macd_signal": round(latest['macd_signal'], 2) if 'macd_signal' in latest else None,
-                "bb_upper": round(latest['bb_upper'], 2) if 'bb_upper' in latest else None,
-                "bb_lower": round(latest['bb_lower'], 2) if 'bb_lower' in latest else None,
+                "rsi": round(float(latest['rsi']), 2),
+                "macd": round(float(latest['macd']), 2),
+                "macd_signal": round(float(latest['macd_signal']), 2),
+                "bb_upper": round(float(latest['bb_upper']), 2),
+                "bb_lower": round(float(latest['bb_lower']), 2),
                 "price_change_24h": ((ticker.get('last', 0) - ticker.get('low_24h', 0)) /
                                      ticker.get('low_24h', 1)) * 100 if ticker.get('low_24h', 0) > 0 else 0
             }
@@ -164,8 +164,13 @@ class StrategyAgent:
             strategy_class = RSIStrategy
         
         strategy = strategy_class(params=state['current_params'])
-        result = self.backtest_engine.run_backtest(strategy, df)
+        # 相同数据窗口、策略和参数的回测直接取缓存
+        result = self.data_manager.backtest_cache.run_backtest(
+            self.backtest_engine, strategy, df, state['symbol'], state['timeframe']
+        )
         metrics = result['metrics']
+        if result['cached']:
+            print("命中回测缓存")
         
         print(f"收益率: {metrics['total_return_pct']:.2f}%, 夏普: {metrics['sharpe_ratio']:.2f}, 回撤: {metrics['max_drawdown_pct']:.2f}%")
         
@@ -0,0 +1,285 @@
+"""
+回测结果缓存
+按（交易对, 周期, K线区间, 最后一根K线哈希, 策略类, 规范化参数）做内容寻址，
+持久化指标和压缩后的权益曲线，重复回测直接命中
+"""
+
+import hashlib
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Dict, Optional
+import pandas as pd
+import numpy as np
+
+
+def _json_default(value):
+    """把NumPy标量等转换为可JSON序列化的类型"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def canonical_params(params: dict) -> str:
+    """参数规范化：键排序、NumPy类型转为Python类型，保证等价参数得到同一字符串"""
+    return json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=_json_default)
+
+
+def last_bar_hash(df: pd.DataFrame) -> str:
+    """最后一根K线（时间和OHLCV）的哈希"""
+    last = df.iloc[-1]
+    payload = [pd.Timestamp(last['timestamp']).isoformat()]
+    payload += [repr(float(last[col])) for col in ['open', 'high', 'low', 'close', 'volume']]
+    return hashlib.sha256("|".join(payload).encode()).hexdigest()[:16]
+
+
+class BacktestCache:
+    """
+    持久化的回测结果缓存（SQLite）
+
+    - 缓存键包含K线区间和最后一根K线的哈希，新K线到来后窗口变化自然不再命中；
+      save_klines写入K线时另外调用invalidate清理区间与新K线重叠（内容已变）的条目，
+      追加在其后的K线不影响已有的历史窗口。
+    - 按最近访问时间做LRU淘汰，最多保留max_entries条。
+    """
+
+    def __init__(self, db_path: str = "data/historical_klines.db", max_entries: int = 500):
+        """
+        初始化回测缓存
+
+        Args:
+            db_path: 数据库路径（默认与历史K线同库）
+            max_entries: 最多缓存的回测结果数
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._init_database()
+
+    def _init_database(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS backtest_cache (
+                cache_key TEXT PRIMARY KEY,
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                strategy_class TEXT NOT NULL,
+                params TEXT NOT NULL,
+                start_time DATETIME NOT NULL,
+                end_time DATETIME NOT NULL,
+                data_points INTEGER NOT NULL,
+                metrics TEXT NOT NULL,
+                equity BLOB NOT NULL,
+                trades BLOB,
+                trades_dtype TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_accessed DATETIME DEFAULT CURRENT_TIMESTAMP,
+                hit_count INTEGER DEFAULT 0
+            )
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_backtest_cache_symbol
+            ON backtest_cache(symbol, timeframe, end_time)
+        """)
+
+        conn.commit()
+        conn.close()
+
+    def make_key(self, symbol: str, timeframe: str, df: pd.DataFrame, strategy,
+                 initial_capital: float, commission: float) -> str:
+        """
+        计算缓存键
+
+        Args:
+            symbol: 交易对
+            timeframe: K线周期
+            df: 回测使用的K线
+            strategy: 策略对象
+            initial_capital: 初始资金
+            commission: 手续费率
+
+        Returns:
+            SHA-256十六进制字符串
+        """
+        payload = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'start': pd.Timestamp(df['timestamp'].iloc[0]).isoformat(),
+            'end': pd.Timestamp(df['timestamp'].iloc[-1]).isoformat(),
+            'bars': len(df),
+            'last_bar': last_bar_hash(df),
+            'strategy': type(strategy).__name__,
+            'params': canonical_params(strategy.params),
+            'initial_capital': float(initial_capital),
+            'commission': float(commission),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """
+        读取缓存
+
+        Returns:
+            {'metrics', 'equity'(按时间索引的权益Series), 'trades'(成交明细结构化数组)}，未命中返回None
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT metrics, equity, trades, trades_dtype FROM backtest_cache WHERE cache_key = ?
+        """, (cache_key,))
+        row = cursor.fetchone()
+
+        if row is None:
+            conn.close()
+            self.misses += 1
+            return None
+
+        cursor.execute("""
+            UPDATE backtest_cache
+            SET last_accessed = ?, hit_count = hit_count + 1
+            WHERE cache_key = ?
+        """, (datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f'), cache_key))
+        conn.commit()
+        conn.close()
+        self.hits += 1
+
+        metrics_json, equity_blob, trades_blob, trades_dtype = row
+        equity = np.frombuffer(zlib.decompress(equity_blob), dtype=np.float64).reshape(2, -1)
+        trades = None
+        if trades_blob is not None:
+            dtype = np.dtype([tuple(field) for field in json.loads(trades_dtype)])
+            trades = np.frombuffer(zlib.decompress(trades_blob), dtype=dtype).copy()
+
+        return {
+            'metrics': json.loads(metrics_json),
+            'equity': pd.Series(equity[1], index=pd.to_datetime(equity[0].view(np.int64)), name='capital'),
+            'trades': trades,
+        }
+
+    def put(self, cache_key: str, symbol: str, timeframe: str, strategy, df: pd.DataFrame,
+            metrics: Dict, capital: np.ndarray, trades: Optional[np.ndarray] = None):
+        """
+        写入缓存（权益曲线与时间戳一起以zlib压缩保存）
+
+        Args:
+            cache_key: make_key计算的缓存键
+            symbol: 交易对
+            timeframe: K线周期
+            strategy: 策略对象
+            df: 回测使用的K线
+            metrics: 性能指标
+            capital: 权益序列
+            trades: 成交明细结构化数组
+        """
+        times = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        equity = np.vstack([times.view(np.float64), np.asarray(capital, dtype=np.float64)])
+        equity_blob = zlib.compress(equity.tobytes())
+
+        trades_blob, trades_dtype = None, None
+        if trades is not None:
+            trades_blob = zlib.compress(np.ascontiguousarray(trades).tobytes())
+            trades_dtype = json.dumps(trades.dtype.descr)
+
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO backtest_cache (
+                cache_key, symbol, timeframe, strategy_class, params,
+                start_time, end_time, data_points, metrics, equity, trades, trades_dtype,
+                created_at, last_accessed
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            cache_key, symbol, timeframe, type(strategy).__name__, canonical_params(strategy.params),
+            pd.Timestamp(df['timestamp'].iloc[0]).strftime('%Y-%m-%d %H:%M:%S'),
+            pd.Timestamp(df['timestamp'].iloc[-1]).strftime('%Y-%m-%d %H:%M:%S'),
+            len(df), json.dumps(metrics, ensure_ascii=False, default=_json_default),
+            equity_blob, trades_blob, trades_dtype, now, now,
+        ))
+
+        # LRU淘汰：只保留最近访问的max_entries条
+        cursor.execute("""
+            DELETE FROM backtest_cache WHERE cache_key NOT IN (
+                SELECT cache_key FROM backtest_cache ORDER BY last_accessed DESC LIMIT ?
+            )
+        """, (self.max_entries,))
+
+        conn.commit()
+        conn.close()
+
+    def invalidate(self, symbol: str, timeframe: str, start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> int:
+        """
+        清理缓存
+
+        只删除K线区间[start_time, end_time]与[start, end]重叠的条目：新写入的K线落在这些窗口内，
+        窗口内容已变；区间之外的历史窗口仍然有效，留给LRU淘汰
+
+        Args:
+            symbol: 交易对
+            timeframe: K线周期
+            start: 变化K线的最早时间（None表示不限）
+            end: 变化K线的最晚时间（None表示不限）
+
+        Returns:
+            删除的条目数
+        """
+        query = "DELETE FROM backtest_cache WHERE symbol = ? AND timeframe = ?"
+        params = [symbol, timeframe]
+        if start is not None:
+            query += " AND end_time >= ?"
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d %H:%M:%S'))
+        if end is not None:
+            query += " AND start_time <= ?"
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d %H:%M:%S'))
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        deleted = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return deleted
+
+    def run_backtest(self, engine, strategy, df: pd.DataFrame, symbol: str, timeframe: str) -> Dict:
+        """
+        带缓存的回测：命中时直接返回保存的指标和权益曲线，否则运行回测并写入缓存
+
+        Args:
+            engine: BacktestEngine
+            strategy: 策略对象
+            df: K线数据
+            symbol: 交易对
+            timeframe: K线周期
+
+        Returns:
+            回测结果字典（含metrics、equity、trades，cached标记是否命中；未命中时另含data）
+        """
+        cache_key = self.make_key(symbol, timeframe, df, strategy,
+                                  engine.initial_capital, engine.commission)
+        cached = self.get(cache_key)
+        if cached is not None:
+            return {
+                'strategy_name': strategy.name,
+                'params': strategy.params,
+                'metrics': cached['metrics'],
+                'equity': cached['equity'],
+                'trades': cached['trades'],
+                'timestamp': datetime.now().isoformat(),
+                'cached': True,
+            }
+
+        result = engine.run_backtest(strategy, df)
+        capital = result['data']['capital'].to_numpy(dtype=np.float64)
+        self.put(cache_key, symbol, timeframe, strategy, df, result['metrics'], capital, result['trades'])
+
+        result['equity'] = pd.Series(capital, index=pd.to_datetime(df['timestamp']).to_numpy(), name='capital')
+        result['cached'] = False
+        return result
@@ -8,8 +8,9 @@ import sqlite3
 from datetime import datetime, timedelta
 import time
 import os
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 from .okx_fetcher import OKXFetcher
+from .backtest_cache import BacktestCache
 
 
 class HistoricalDataManager:
@@ -21,6 +22,7 @@ class HistoricalDataManager:
         self.db_path = db_path
         self.okx_fetcher = OKXFetcher()
         self._init_database()
+        self.backtest_cache = BacktestCache(db_path)
     
     def _init_database(self):
         conn = sqlite3.connect(self.db_path)
@@ -124,6 +126,7 @@ class HistoricalDataManager:
         cursor = conn.cursor()
         
         inserted = 0
+        first_inserted, last_inserted = None, None
         for _, row in df.iterrows():
             try:
                 cursor.execute("""
@@ -142,6 +145,8 @@ class HistoricalDataManager:
                 ))
                 if cursor.rowcount > 0:
                     inserted += 1
+                    first_inserted = min(first_inserted or row['timestamp'], row['timestamp'])
+                    last_inserted = max(last_inserted or row['timestamp'], row['timestamp'])
             except Exception as e:
                 continue
         
@@ -154,6 +159,10 @@ class HistoricalDataManager:
         
         conn.commit()
         conn.close()
+
+        # 只有区间与新写入K线重叠的回测缓存内容已变（如补齐缺口）；追加在后面的K线不影响历史窗口
+        if inserted > 0:
+            self.backtest_cache.invalidate(symbol, timeframe, start=first_inserted, end=last_inserted)
         
         return inserted
     
@@ -184,7 +193,55 @@ class HistoricalDataManager:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
         
         return df
-    
+
+    def iter_klines(self, symbol: str, timeframe: str, start_time: Optional[datetime] = None,
+                    end_time: Optional[datetime] = None, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        按固定大小分块读取K线（按时间戳翻页，每块单独查询），内存占用与区间长度无关
+
+        Args:
+            symbol: 交易对
+            timeframe: K线周期
+            start_time: 起始时间（含）
+            end_time: 结束时间（含）
+            chunk_size: 每块K线数
+
+        Yields:
+            按时间升序的K线DataFrame，列与load_klines相同
+        """
+        last_timestamp = start_time.strftime('%Y-%m-%d %H:%M:%S') if start_time else None
+        first_chunk = True
+
+        while True:
+            query = "SELECT timestamp, open, high, low, close, volume FROM klines WHERE symbol = ? AND timeframe = ?"
+            params = [symbol, timeframe]
+
+            if last_timestamp is not None:
+                # 第一块包含起始时间本身，之后从上一块最后一根K线之后继续
+                query += " AND timestamp >= ?" if first_chunk else " AND timestamp > ?"
+                params.append(last_timestamp)
+
+            if end_time:
+                query += " AND timestamp <= ?"
+                params.append(end_time.strftime('%Y-%m-%d %H:%M:%S'))
+
+            query += f" ORDER BY timestamp ASC LIMIT {int(chunk_size)}"
+
+            conn = sqlite3.connect(self.db_path)
+            df = pd.read_sql_query(query, conn, params=params)
+            conn.close()
+
+            if df.empty:
+                return
+
+            last_timestamp = df['timestamp'].iloc[-1]
+            first_chunk = False
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            yield df
+
+            if len(df) < chunk_size:
+                return
+
     def download_historical_data(self, symbol: str, timeframe: str, days: int = 90, force_refresh: bool = False) -> dict:
         print(f"\n下载历史数据: {symbol} {timeframe} ({days}天)")
 
@@ -13,13 +13,27 @@ from datetime import datetime
 from typing import Dict, List, Optional
 import time
 import pandas as pd
+import numpy as np
 import json
 import os
 from dotenv import load_dotenv
 
+try:
+    from .. import indicators  # 作为backend.data_fetchers导入
+except ImportError:  # 作为顶层包data_fetchers导入（backend目录在sys.path上）
+    import indicators
+
 # 加载环境变量
 load_dotenv()
 
+# 每个时间周期对应的小时数
+TIMEFRAME_HOURS = {
+    '1m': 1/60, '3m': 3/60, '5m': 5/60, '15m': 15/60, '30m': 30/60,
+    '1H': 1, '2H': 2, '4H': 4,
+    '1D': 24,
+    '1W': 168
+}
+
 
 class OKXFetcher:
     """
@@ -279,28 +293,26 @@ class OKXFetcher:
         if df.empty:
             return df
 
+        close = df['close'].to_numpy(dtype=np.float64)
+
         # RSI (14周期)
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
+        df['rsi'] = indicators.rsi(close, 14)
 
         # MACD (12, 26, 9)
-        exp1 = df['close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['close'].ewm(span=26, adjust=False).mean()
-        df['macd'] = exp1 - exp2
-        df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-        df['macd_hist'] = df['macd'] - df['macd_signal']
+        macd = indicators.macd(close, 12, 26, 9)
+        df['macd'] = macd['macd']
+        df['macd_signal'] = macd['signal']
+        df['macd_hist'] = macd['hist']
 
         # 布林带 (20, 2)
-        df['sma_20'] = df['close'].rolling(window=20).mean()
-        df['bb_std'] = df['close'].rolling(window=20).std()
-        df['bb_upper'] = df['sma_20'] + (df['bb_std'] * 2)
-        df['bb_lower'] = df['sma_20'] - (df['bb_std'] * 2)
+        bands = indicators.bollinger_bands(close, 20, num_std=2)
+        df['sma_20'] = bands['middle']
+        df['bb_std'] = bands['std']
+        df['bb_upper'] = bands['upper']
+        df['bb_lower'] = bands['lower']
 
         # 成交量均线
-        df['vol_ma_20'] = df['volume'].rolling(window=20).mean()
+        df['vol_ma_20'] = indicators.rolling_mean(df['volume'], 20)
 
         return df
 
@@ -625,15 +637,7 @@ class OKXFetcher:
             from datetime import datetime, timedelta
             import time
 
-            # 计算每个时间周期对应的小时数
-            timeframe_hours = {
-                '1m': 1/60, '3m': 3/60, '5m': 5/60, '15m': 15/60, '30m': 30/60,
-                '1H': 1, '2H': 2, '4H': 4,
-                '1D': 24,
-                '1W': 168
-            }
-
-            hours_per_bar = timeframe_hours.get(timeframe, 1)
+            hours_per_bar = TIMEFRAME_HOURS.get(timeframe, 1)
             total_bars_needed = int((days * 24) / hours_per_bar)
 
             print(f"\n📊 获取 {symbol} {timeframe} 的 {days} 天历史数据...")
@@ -816,15 +820,7 @@ if __name__ == "__main__":
             from datetime import datetime, timedelta
             import time
             
-            # 计算每个时间周期对应的小时数
-            timeframe_hours = {
-                '1m': 1/60, '3m': 3/60, '5m': 5/60, '15m': 15/60, '30m': 30/60,
-                '1H': 1, '2H': 2, '4H': 4,
-                '1D': 24,
-                '1W': 168
-            }
-            
-            hours_per_bar = timeframe_hours.get(timeframe, 1)
+            hours_per_bar = TIMEFRAME_HOURS.get(timeframe, 1)
             total_bars_needed = int((days * 24) / hours_per_bar)
             
             print(f"\n📊 获取 {symbol} {timeframe} 的 {days} 天历史数据...")
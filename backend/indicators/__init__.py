@@ -0,0 +1,24 @@
+"""
+指标库
+NumPy优先的向量化指标内核，输入原始数组、输出数组，策略、指标缓存和行情模块共用同一份实现；
+窗口/周期参数传序列时一次计算多个窗口（如RSI的7、14、21周期），返回 (窗口数, K线数) 的二维数组
+"""
+
+from .rolling import rolling_sum, rolling_mean, rolling_std, rolling_max, rolling_min, rolling_linreg
+from .technical import ema, wilder, true_range, atr, rsi, macd, bollinger_bands
+
+__all__ = [
+    "rolling_sum",
+    "rolling_mean",
+    "rolling_std",
+    "rolling_max",
+    "rolling_min",
+    "rolling_linreg",
+    "ema",
+    "wilder",
+    "true_range",
+    "atr",
+    "rsi",
+    "macd",
+    "bollinger_bands",
+]
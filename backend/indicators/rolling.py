@@ -0,0 +1,116 @@
+"""
+滚动窗口内核
+输入原始数组，输出NumPy数组；windows传整数时返回一维结果，传序列时返回 (窗口数, K线数) 的二维结果
+
+滚动和/均值/标准差由pandas编译好的窗口聚合完成（带补偿求和，长序列上也不损失精度），
+与原先在Series上调用rolling逐位一致；滚动极值用分块的前缀/后缀累积在NumPy中O(n)完成。
+"""
+
+from typing import Sequence, Tuple, Union
+import pandas as pd
+import numpy as np
+
+Windows = Union[int, Sequence[int]]
+
+
+def as_array(values) -> np.ndarray:
+    """把Series/列表/数组转换为float64一维数组"""
+    return np.asarray(values, dtype=np.float64).ravel()
+
+
+def as_windows(windows: Windows) -> Tuple[Tuple[int, ...], bool]:
+    """规范化窗口参数，返回 (窗口元组, 是否为单个窗口)"""
+    if np.ndim(windows) == 0:
+        return (int(windows),), True
+    windows = tuple(int(w) for w in windows)
+    if not windows:
+        raise ValueError("windows不能为空")
+    return windows, False
+
+
+def finish(rows, single: bool) -> np.ndarray:
+    """单个窗口返回一维数组，否则堆叠为二维数组"""
+    return rows[0] if single else np.vstack(rows)
+
+
+def rolling_sum(values, windows: Windows) -> np.ndarray:
+    """滚动求和（同 Series.rolling(window).sum()）"""
+    series = pd.Series(as_array(values), copy=False)
+    windows, single = as_windows(windows)
+    return finish([series.rolling(w).sum().to_numpy() for w in windows], single)
+
+
+def rolling_mean(values, windows: Windows) -> np.ndarray:
+    """滚动均值（同 Series.rolling(window).mean()）"""
+    series = pd.Series(as_array(values), copy=False)
+    windows, single = as_windows(windows)
+    return finish([series.rolling(w).mean().to_numpy() for w in windows], single)
+
+
+def rolling_std(values, windows: Windows, ddof: int = 1) -> np.ndarray:
+    """滚动标准差（同 Series.rolling(window).std(ddof)）"""
+    series = pd.Series(as_array(values), copy=False)
+    windows, single = as_windows(windows)
+    return finish([series.rolling(w).std(ddof=ddof).to_numpy() for w in windows], single)
+
+
+def _rolling_extreme(x: np.ndarray, window: int, ufunc, fill: float) -> np.ndarray:
+    """
+    van Herk/Gil-Werman算法：按窗口长度分块，块内前缀极值与后缀极值各一次累积，
+    任一窗口 = 起点所在块的后缀极值 与 终点所在块的前缀极值 的较大/较小者，O(n)且结果精确。
+    NaN沿累积方向传播，窗口内含NaN时结果为NaN（同pandas rolling的默认min_periods）。
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if window > n or window < 1:
+        return out
+    n_blocks = -(-n // window)
+    padded = np.full(n_blocks * window, fill)
+    padded[:n] = x
+    blocks = padded.reshape(n_blocks, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    out[window - 1:] = ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+
+def rolling_max(values, windows: Windows) -> np.ndarray:
+    """滚动最大值（同 Series.rolling(window).max()，结果精确）"""
+    x = as_array(values)
+    windows, single = as_windows(windows)
+    return finish([_rolling_extreme(x, w, np.maximum, -np.inf) for w in windows], single)
+
+
+def rolling_min(values, windows: Windows) -> np.ndarray:
+    """滚动最小值（同 Series.rolling(window).min()，结果精确）"""
+    x = as_array(values)
+    windows, single = as_windows(windows)
+    return finish([_rolling_extreme(x, w, np.minimum, np.inf) for w in windows], single)
+
+
+def rolling_linreg(values, windows: Windows) -> np.ndarray:
+    """
+    滚动线性回归在窗口最后一根上的值（窗口内横坐标取0..window-1，最小二乘）
+
+    窗口内 sum_x、sum_x2 为常数，只需滚动维护 sum_y 和 sum_xy：
+    以全局位置j为横坐标时 sum(j*y) 可滚动求和，再平移到窗口起点
+    sum_xy = sum(j*y) - (t - window + 1) * sum_y，整体O(n)；多个窗口共用 y 与 j*y。
+    """
+    y = pd.Series(as_array(values), copy=False)
+    windows, single = as_windows(windows)
+    position = np.arange(len(y), dtype=np.float64)
+    weighted = y * position
+
+    rows = []
+    for n in windows:
+        sum_y = y.rolling(n).sum().to_numpy()
+        sum_jy = weighted.rolling(n).sum().to_numpy()
+        sum_xy = sum_jy - (position - (n - 1)) * sum_y
+
+        # 中心化横坐标：x_mean = (n-1)/2，sum((x - x_mean)^2) = n(n^2-1)/12
+        x_mean = (n - 1) / 2
+        sxx = n * (n * n - 1) / 12
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (sum_xy - x_mean * sum_y) / sxx
+        rows.append(sum_y / n + slope * (n - 1 - x_mean))
+    return finish(rows, single)
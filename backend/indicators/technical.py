@@ -0,0 +1,116 @@
+"""
+技术指标内核
+EMA、真实波幅/ATR、RSI、MACD、布林带，输入原始数组，多周期参数一次调用返回二维结果
+"""
+
+from typing import Dict
+import pandas as pd
+import numpy as np
+
+from .rolling import Windows, as_array, as_windows, finish
+
+
+def ema(values, spans: Windows) -> np.ndarray:
+    """
+    指数移动平均（同 Series.ewm(span=span, adjust=False).mean()，逐位一致）
+
+    递推无法向量化，由pandas编译好的ewm循环完成，输入输出仍为数组。
+    """
+    x = as_array(values)
+    spans, single = as_windows(spans)
+    series = pd.Series(x, copy=False)
+    return finish([series.ewm(span=span, adjust=False).mean().to_numpy() for span in spans], single)
+
+
+def wilder(values, periods: Windows) -> np.ndarray:
+    """Wilder平滑（alpha = 1/period 的指数移动平均，adjust=False）"""
+    x = as_array(values)
+    periods, single = as_windows(periods)
+    series = pd.Series(x, copy=False)
+    return finish([series.ewm(alpha=1.0 / p, adjust=False).mean().to_numpy() for p in periods], single)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """
+    真实波幅
+
+    True Range = max(High - Low, abs(High - Close_prev), abs(Low - Close_prev))，首根为 High - Low
+    """
+    high, low, close = as_array(high), as_array(low), as_array(close)
+    prev_close = np.empty_like(close)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+    # fmax忽略NaN，与pandas按行取max(skipna)一致
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, periods: Windows, smoothing: str = 'ema') -> np.ndarray:
+    """
+    ATR
+
+    Args:
+        high, low, close: 价格数组
+        periods: 周期（整数或序列）
+        smoothing: 'ema'为真实波幅的EMA（span=period，策略使用的口径），'wilder'为Wilder平滑
+    """
+    tr = true_range(high, low, close)
+    if smoothing == 'wilder':
+        return wilder(tr, periods)
+    if smoothing != 'ema':
+        raise ValueError(f"未知的平滑方式: {smoothing}")
+    return ema(tr, periods)
+
+
+def rsi(close, periods: Windows) -> np.ndarray:
+    """
+    RSI（涨跌幅的简单移动平均口径，与原策略/行情模块一致）
+
+    首根的涨跌幅计为0；窗口内没有下跌时为100，既无涨也无跌时为NaN。
+    多个周期共用同一份涨跌幅序列。
+    """
+    x = as_array(close)
+    periods, single = as_windows(periods)
+    delta = np.zeros_like(x)
+    delta[1:] = np.diff(x)
+    gain = pd.Series(np.where(delta > 0, delta, 0.0), copy=False)
+    loss = pd.Series(np.where(delta < 0, -delta, 0.0), copy=False)
+
+    rows = []
+    for p in periods:
+        avg_gain = gain.rolling(p).mean().to_numpy()
+        avg_loss = loss.rolling(p).mean().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rows.append(100 - 100 / (1 + avg_gain / avg_loss))
+    return finish(rows, single)
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    """
+    MACD
+
+    Returns:
+        {'macd': 快慢EMA之差, 'signal': MACD的EMA, 'hist': 两者之差}
+    """
+    fast_ema, slow_ema = ema(close, [fast, slow])
+    line = fast_ema - slow_ema
+    signal_line = ema(line, signal)
+    return {'macd': line, 'signal': signal_line, 'hist': line - signal_line}
+
+
+def bollinger_bands(close, windows: Windows, num_std: float = 2.0) -> Dict[str, np.ndarray]:
+    """
+    布林带
+
+    Returns:
+        {'middle', 'std', 'upper', 'lower'}，windows为序列时各为 (窗口数, K线数) 的二维数组
+    """
+    series = pd.Series(as_array(close), copy=False)
+    windows, single = as_windows(windows)
+    middle = finish([series.rolling(w).mean().to_numpy() for w in windows], single)
+    std = finish([series.rolling(w).std().to_numpy() for w in windows], single)
+    return {
+        'middle': middle,
+        'std': std,
+        'upper': middle + std * num_std,
+        'lower': middle - std * num_std,
+    }
@@ -5,23 +5,43 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+import itertools
+from typing import Dict, Iterable, List, Tuple, Union
 from datetime import datetime
 
+from .position_simulator import simulate_positions, simulate_signal_matrix
+from .incremental_backtest import IncrementalBacktest
+from .metrics import compute_metrics
+from .strategy_base import BaseStrategy
+
+# run_grid输出的指标列（与_calculate_grid_metrics的键相同）
+GRID_METRICS = [
+    'initial_capital', 'final_capital', 'total_return', 'total_return_pct',
+    'sharpe_ratio', 'max_drawdown', 'max_drawdown_pct',
+    'total_trades', 'winning_trades', 'losing_trades', 'win_rate',
+    'avg_trade_profit', 'avg_trade_profit_pct', 'trading_days', 'avg_daily_return',
+]
+
 
 class BacktestEngine:
     """回测引擎"""
     
-    def __init__(self, initial_capital: float = 10000, commission: float = 0.001):
+    def __init__(self, initial_capital: float = 10000, commission: float = 0.001,
+                 lean: bool = False, keep_diagnostics: bool = False):
         """
         初始化回测引擎
         
         Args:
             initial_capital: 初始资金
             commission: 手续费率（默认0.1%）
+            lean: 精简模式（参数扫描用）：回测结果表只保留时间、信号(int8)和权益，
+                run_grid逐组合撮合，不生成（K线数 × 参数组数）的中间矩阵
+            keep_diagnostics: 精简模式下是否以float32保留策略的诊断列
         """
         self.initial_capital = initial_capital
         self.commission = commission
+        self.lean = lean
+        self.keep_diagnostics = keep_diagnostics
         self.results = {}
     
     def run_backtest(self, strategy, df: pd.DataFrame) -> Dict:
@@ -35,20 +55,21 @@ class BacktestEngine:
         Returns:
             回测结果字典
         """
-        # 生成信号
-        df_signals = strategy.generate_signals(df.copy())
+        # 生成信号（策略只读K线，返回新增列）
+        signals = strategy.compute_signals(df)
         
         # 计算持仓和收益
-        df_result = self._simulate_trading(df_signals)
+        df_result, trades = self._simulate_trading(df, signals)
         
         # 计算性能指标
-        metrics = self._calculate_metrics(df_result)
+        metrics = self._calculate_metrics(df_result, trades)
         
         # 保存结果
         result = {
             'strategy_name': strategy.name,
             'params': strategy.params,
             'data': df_result,
+            'trades': trades,  # 成交明细（TRADE_LEDGER_DTYPE结构化数组）
             'metrics': metrics,
             'timestamp': datetime.now().isoformat()
         }
@@ -56,150 +77,252 @@ class BacktestEngine:
         self.results[strategy.name] = result
         return result
     
-    def _simulate_trading(self, df: pd.DataFrame) -> pd.DataFrame:
+    def run_backtest_chunked(self, strategy, chunks: Iterable[pd.DataFrame],
+                             warmup: int = 1000, keep_equity: bool = True) -> Dict:
+        """
+        分块回测（用于无法一次载入内存的长区间，如多年的1分钟K线）
+
+        逐块推进增量回测器：支持step()的策略逐根推进，指标和状态机的流式状态、持仓状态
+        和指标累加器跨块延续，结果与一次性回测完全一致，常驻内存只有当前块和成交明细。
+        不支持step()的策略每块计算信号时带上前一块末尾warmup根K线作为指标预热，
+        warmup不小于指标窗口时滚动窗口类指标一致，EMA类指标和带状态的信号状态机只能近似。
+
+        Args:
+            strategy: 策略对象
+            chunks: 按时间升序的K线块（如HistoricalDataManager.iter_klines）
+            warmup: 跨块保留的预热K线数（仅用于不支持step()的策略）
+            keep_equity: 是否保留完整权益曲线（每根K线8字节）
+
+        Returns:
+            回测结果字典（metrics、trades，keep_equity时含equity；不含逐K线的data）
+        """
+        backtest = IncrementalBacktest(strategy, initial_capital=self.initial_capital,
+                                       commission=self.commission, lookback=warmup)
+        equity_values, equity_times = [], []
+        for chunk in chunks:
+            result = backtest.append(chunk)
+            if keep_equity and not result.empty:
+                equity_values.append(result['capital'].to_numpy(dtype=np.float64))
+                equity_times.append(result['timestamp'].to_numpy(dtype='datetime64[ns]'))
+
+        if backtest.bar_count == 0:
+            raise ValueError("分块回测没有读到任何K线")
+
+        result = {
+            'strategy_name': strategy.name,
+            'params': strategy.params,
+            'trades': backtest.trades,
+            'metrics': backtest.metrics,
+            'data_points': backtest.bar_count,
+            'timestamp': datetime.now().isoformat()
+        }
+        if keep_equity:
+            result['equity'] = pd.Series(np.concatenate(equity_values),
+                                         index=pd.DatetimeIndex(np.concatenate(equity_times)),
+                                         name='capital')
+
+        self.results[strategy.name] = result
+        return result
+
+    def _simulate_trading(self, df: pd.DataFrame,
+                          signals: pd.DataFrame = None) -> Tuple[pd.DataFrame, np.ndarray]:
         """
         模拟交易过程
-        
+
+        撮合由共享的持仓模拟器在NumPy数组上完成。结果表依次包含K线的全部列、
+        信号列和持仓/权益列，各列直接引用已有数组构建，不复制K线数据。
+
         Args:
-            df: 包含信号的DataFrame
-            
+            df: K线数据（只读）；未提供signals时需包含signal列
+            signals: 策略compute_signals返回的新增列
+
         Returns:
-            包含持仓和权益的DataFrame
-        """
-        df = df.copy()
-        df['position'] = 0.0  # 当前持仓（币的数量）
-        df['cash'] = self.initial_capital  # 现金
-        df['holdings'] = 0.0  # 持仓市值
-        df['capital'] = self.initial_capital  # 总权益
-        df['trade'] = 0  # 交易标记（1=买入，-1=卖出）
-        
-        position = 0.0
-        cash = self.initial_capital
-        trades = []  # 交易记录
+            (包含信号、持仓和权益的DataFrame, 成交明细结构化数组)
+            精简模式下结果表只有timestamp、signal、（可选的float32诊断列）和capital
+        """
+        if signals is None:
+            signals = df[['signal']]
+        close = df['close'].to_numpy(dtype=np.float64)
+        sim = simulate_positions(
+            signals['signal'].to_numpy(),
+            close,
+            commission=self.commission,
+            initial_capital=self.initial_capital,
+            start=1,
+        )
+
+        if self.lean:
+            columns = {'timestamp': df['timestamp'].to_numpy()}
+            lean = BaseStrategy.lean_signals(signals, self.keep_diagnostics)
+            columns.update({col: lean[col].to_numpy() for col in lean.columns})
+            columns['capital'] = sim.capital
+            result = pd.DataFrame(columns, index=df.index, copy=False)
+            return result, sim.ledger(df['timestamp'])
+
+        columns = {col: df[col].to_numpy() for col in df.columns}
+        columns.update({col: signals[col].to_numpy() for col in signals.columns})
+        columns.update({
+            'position': sim.position,  # 当前持仓（币的数量）
+            'cash': sim.cash,  # 现金
+            'holdings': sim.holdings,  # 持仓市值
+            'capital': sim.capital,  # 总权益
+            'trade': sim.trade,  # 交易标记（1=买入，-1=卖出）
+        })
+        result = pd.DataFrame(columns, index=df.index, copy=False)
+        return result, sim.ledger(df['timestamp'])
+
+    def _calculate_metrics(self, df: pd.DataFrame, trades: np.ndarray) -> Dict:
+        """
+        计算性能指标（单遍扫描权益数组，不修改结果表）
         
-        for i in range(1, len(df)):
-            signal = df.iloc[i]['signal']
-            price = df.iloc[i]['close']
-            timestamp = df.iloc[i]['timestamp']
-            
-            # 买入信号且无持仓
-            if signal == 1 and position == 0:
-                # 扣除手续费后买入
-                position = cash / price * (1 - self.commission)
-                cash = 0
-                df.iloc[i, df.columns.get_loc('trade')] = 1
-                
-                trades.append({
-                    'timestamp': timestamp,
-                    'type': 'BUY',
-                    'price': price,
-                    'amount': position,
-                    'value': position * price
-                })
-                
-            # 卖出信号且有持仓
-            elif signal == -1 and position > 0:
-                # 扣除手续费后卖出
-                cash = position * price * (1 - self.commission)
-                
-                # 计算这笔交易的盈亏
-                buy_trade = trades[-1] if trades else None
-                if buy_trade:
-                    profit = cash - buy_trade['value']
-                    profit_pct = (profit / buy_trade['value']) * 100
-                else:
-                    profit = 0
-                    profit_pct = 0
-                
-                trades.append({
-                    'timestamp': timestamp,
-                    'type': 'SELL',
-                    'price': price,
-                    'amount': position,
-                    'value': cash,
-                    'profit': profit,
-                    'profit_pct': profit_pct
-                })
-                
-                position = 0
-                df.iloc[i, df.columns.get_loc('trade')] = -1
+        Args:
+            df: 回测结果DataFrame（需包含timestamp和capital列）
+            trades: 成交明细结构化数组
             
-            # 更新当前状态
-            df.iloc[i, df.columns.get_loc('position')] = position
-            df.iloc[i, df.columns.get_loc('cash')] = cash
-            df.iloc[i, df.columns.get_loc('holdings')] = position * price
-            df.iloc[i, df.columns.get_loc('capital')] = cash + position * price
-        
-        df['trades_history'] = [trades] * len(df)  # 保存交易历史
-        return df
+        Returns:
+            性能指标字典（见metrics.compute_metrics）
+        """
+        return compute_metrics(
+            df['capital'].to_numpy(dtype=np.float64),
+            self.initial_capital,
+            timestamps=df['timestamp'],
+            trades=trades,
+        )
     
-    def _calculate_metrics(self, df: pd.DataFrame) -> Dict:
+    def run_grid(self, strategy_cls, df: pd.DataFrame, param_grid: Union[Dict, List[Dict]],
+                 batch_size: int = 256) -> pd.DataFrame:
         """
-        计算性能指标
-        
+        批量回测一个参数网格
+
+        每组参数生成一列信号，组成（K线数 × 参数组数）的信号矩阵，
+        再按批次向量化地同时模拟所有列，避免逐组合逐K线循环。
+
         Args:
-            df: 回测结果DataFrame
-            
+            strategy_cls: 策略类（如RSIStrategy），以 strategy_cls(params=...) 实例化
+            df: K线数据
+            param_grid: 参数网格，如 {'rsi_period': [7, 14, 21], 'oversold_threshold': [25, 30]}，
+                也可以直接传入参数字典列表
+            batch_size: 每批同时模拟的参数组数（控制内存占用）
+
         Returns:
-            性能指标字典
+            每个参数组合一行的指标DataFrame（参数列 + 指标列）
         """
-        # 基本统计
-        final_capital = df.iloc[-1]['capital']
+        if isinstance(param_grid, dict):
+            keys = list(param_grid.keys())
+            combos = [dict(zip(keys, combo)) for combo in itertools.product(*param_grid.values())]
+        else:
+            combos = list(param_grid)
+        if self.lean:
+            return self._run_grid_lean(strategy_cls, df, combos)
+        prices = df['close'].to_numpy(dtype=np.float64)
+
+        rows = []
+        for batch_start in range(0, len(combos), batch_size):
+            batch = combos[batch_start:batch_start + batch_size]
+
+            # 信号矩阵：每列对应一组参数
+            signal_matrix = np.empty((len(df), len(batch)), dtype=np.int8)
+            for j, params in enumerate(batch):
+                strategy = strategy_cls(params=params)
+                signal_matrix[:, j] = strategy.compute_signals(df)['signal'].to_numpy()
+
+            sim = simulate_signal_matrix(
+                signal_matrix, prices,
+                commission=self.commission,
+                initial_capital=self.initial_capital,
+                start=1,
+            )
+            metrics = self._calculate_grid_metrics(sim, df)
+
+            for j, params in enumerate(batch):
+                row = dict(params)
+                row.update({name: values[j] for name, values in metrics.items()})
+                rows.append(row)
+
+        return pd.DataFrame(rows)
+
+    def _run_grid_lean(self, strategy_cls, df: pd.DataFrame, combos: List[Dict]) -> pd.DataFrame:
+        """
+        精简模式的网格回测：逐组合撮合并单遍计算指标
+
+        事件驱动撮合和指标计算的耗时都与K线数线性相关，与矩阵模拟相近，
+        但常驻内存只有当前组合的几条K线长度数组，不随批大小增长。
+        指标列与矩阵模拟相同。
+        """
+        prices = df['close'].to_numpy(dtype=np.float64)
+        timestamps = df['timestamp']
+        rows = []
+        for params in combos:
+            signal = strategy_cls(params=params).compute_signals(df)['signal'].to_numpy()
+            sim = simulate_positions(signal, prices, commission=self.commission,
+                                     initial_capital=self.initial_capital, start=1)
+            metrics = compute_metrics(sim.capital, self.initial_capital,
+                                      timestamps=timestamps, trades=sim.ledger())
+            row = dict(params)
+            row.update({name: metrics[name] for name in GRID_METRICS})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def _calculate_grid_metrics(self, sim, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        按列向量化计算信号矩阵模拟结果的性能指标（口径与_calculate_metrics一致）
+
+        Args:
+            sim: simulate_signal_matrix 的结果
+            df: K线数据（用于计算交易天数）
+
+        Returns:
+            {指标名: 每列指标值数组}
+        """
+        capital = sim.capital
+        n_bars, n_cols = capital.shape
+
+        final_capital = capital[-1]
         total_return = (final_capital - self.initial_capital) / self.initial_capital
-        total_return_pct = total_return * 100
-        
-        # 收益率序列
-        df['returns'] = df['capital'].pct_change().fillna(0)
-        
+
+        # 收益率序列（首行为0，与pct_change().fillna(0)一致）
+        returns = np.zeros_like(capital)
+        returns[1:] = capital[1:] / capital[:-1] - 1
+
         # 夏普比率（假设加密货币365天交易）
-        if len(df['returns']) > 1 and df['returns'].std() > 0:
-            sharpe_ratio = (df['returns'].mean() / df['returns'].std()) * np.sqrt(365)
+        if n_bars > 1:
+            std = returns.std(axis=0, ddof=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sharpe_ratio = np.where(std > 0, returns.mean(axis=0) / std * np.sqrt(365), 0.0)
         else:
-            sharpe_ratio = 0
-        
+            sharpe_ratio = np.zeros(n_cols)
+
         # 最大回撤
-        cumulative_returns = (1 + df['returns']).cumprod()
-        running_max = cumulative_returns.expanding().max()
-        drawdown = (cumulative_returns - running_max) / running_max
-        max_drawdown = drawdown.min()
-        max_drawdown_pct = max_drawdown * 100
-        
-        # 交易统计
-        trades = df[df['trade'] != 0]
-        total_trades = len(trades[trades['trade'] == 1])  # 买入次数
-        
-        # 胜率（从交易历史中计算）
-        winning_trades = 0
-        losing_trades = 0
-        if len(df['trades_history'].iloc[-1]) > 0:
-            sell_trades = [t for t in df['trades_history'].iloc[-1] if t['type'] == 'SELL']
-            winning_trades = len([t for t in sell_trades if t.get('profit', 0) > 0])
-            losing_trades = len([t for t in sell_trades if t.get('profit', 0) <= 0])
-            win_rate = (winning_trades / len(sell_trades) * 100) if sell_trades else 0
-        else:
-            win_rate = 0
+        cumulative_returns = np.cumprod(1 + returns, axis=0)
+        running_max = np.maximum.accumulate(cumulative_returns, axis=0)
+        max_drawdown = ((cumulative_returns - running_max) / running_max).min(axis=0)
+
+        sell_count = sim.win_count + sim.loss_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = np.where(sell_count > 0, sim.win_count / sell_count * 100, 0.0)
+            avg_trade_profit = np.where(sell_count > 0, sim.profit_sum / sell_count, 0.0)
+            avg_trade_profit_pct = np.where(sell_count > 0, sim.profit_pct_sum / sell_count, 0.0)
 
-        # 计算交易天数
         trading_days = (df['timestamp'].iloc[-1] - df['timestamp'].iloc[0]).days
 
-        metrics = {
-            'initial_capital': self.initial_capital,
+        return {
+            'initial_capital': np.full(n_cols, self.initial_capital),
             'final_capital': final_capital,
             'total_return': total_return,
-            'total_return_pct': total_return_pct,
+            'total_return_pct': total_return * 100,
             'sharpe_ratio': sharpe_ratio,
             'max_drawdown': max_drawdown,
-            'max_drawdown_pct': max_drawdown_pct,
-            'total_trades': total_trades,
-            'winning_trades': winning_trades,
-            'losing_trades': losing_trades,
+            'max_drawdown_pct': max_drawdown * 100,
+            'total_trades': sim.buy_count,
+            'winning_trades': sim.win_count,
+            'losing_trades': sim.loss_count,
             'win_rate': win_rate,
-            'trading_days': trading_days,
-            'avg_daily_return': total_return / trading_days if trading_days > 0 else 0
+            'avg_trade_profit': avg_trade_profit,
+            'avg_trade_profit_pct': avg_trade_profit_pct,
+            'trading_days': np.full(n_cols, trading_days),
+            'avg_daily_return': total_return / trading_days if trading_days > 0 else np.zeros(n_cols),
         }
-        
-        return metrics
-    
+
     def compare_strategies(self, results: List[Dict]) -> pd.DataFrame:
         """
         比较多个策略的表现
@@ -4,7 +4,9 @@
 """
 
 import pandas as pd
-from .strategy_base import BaseStrategy
+from .strategy_base import BaseStrategy, Feature
+from .indicator_cache import get_indicator_cache
+from .streaming import RollingMean, RollingStd
 
 
 class BollingerBandsStrategy(BaseStrategy):
@@ -24,41 +26,69 @@ class BollingerBandsStrategy(BaseStrategy):
         
         super().__init__(name="布林带策略", params=default_params)
     
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         生成布林带交易信号
         
         Args:
-            df: K线数据
+            df: K线数据（只读）
             
         Returns:
-            添加了signal列的DataFrame
+            新增列DataFrame（bb_middle, bb_std, bb_upper, bb_lower, bb_position, signal）
         """
-        df = df.copy()
+        signals = pd.DataFrame(index=df.index)
+        close = df['close']
         
         # 计算布林带
         period = self.params['bb_period']
         std_multiplier = self.params['bb_std']
         
-        df['bb_middle'] = df['close'].rolling(window=period).mean()
-        df['bb_std'] = df['close'].rolling(window=period).std()
-        df['bb_upper'] = df['bb_middle'] + (df['bb_std'] * std_multiplier)
-        df['bb_lower'] = df['bb_middle'] - (df['bb_std'] * std_multiplier)
+        # 均值和标准差只与周期有关，不同倍数的参数组合共用缓存
+        cache = get_indicator_cache()
+        close_fp = cache.fingerprint(close)
+        signals['bb_middle'] = cache.rolling_mean(close, period, fingerprint=close_fp)
+        signals['bb_std'] = cache.rolling_std(close, period, fingerprint=close_fp)
+        signals['bb_upper'] = signals['bb_middle'] + (signals['bb_std'] * std_multiplier)
+        signals['bb_lower'] = signals['bb_middle'] - (signals['bb_std'] * std_multiplier)
         
         # 计算价格相对布林带的位置
-        df['bb_position'] = (df['close'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
+        signals['bb_position'] = (close - signals['bb_lower']) / (signals['bb_upper'] - signals['bb_lower'])
         
         # 生成信号
-        df['signal'] = 0
+        signals['signal'] = 0
         
         # 触及下轨买入（超卖）
-        df.loc[df['close'] <= df['bb_lower'], 'signal'] = 1
+        signals.loc[close <= signals['bb_lower'], 'signal'] = 1
         
         # 触及上轨卖出（超买）
-        df.loc[df['close'] >= df['bb_upper'], 'signal'] = -1
+        signals.loc[close >= signals['bb_upper'], 'signal'] = -1
         
-        return df
+        return signals
     
+    def required_lookback(self) -> int:
+        return self.params['bb_period'] - 1
+
+    def required_features(self) -> list:
+        period = self.params['bb_period']
+        return [Feature('rolling_mean', period), Feature('rolling_std', period)]
+
+    def _init_stream(self) -> dict:
+        period = self.params['bb_period']
+        return {'middle': RollingMean(period), 'std': RollingStd(period)}
+
+    def _step(self, stream: dict, bar) -> int:
+        """逐K线更新布林带，判断是否触及上下轨"""
+        close = float(bar['close'])
+        middle = stream['middle'].update(close)
+        width = stream['std'].update(close) * self.params['bb_std']
+
+        signal = 0
+        if close <= middle - width:
+            signal = 1
+        if close >= middle + width:
+            signal = -1
+        return signal
+
     def get_strategy_description(self) -> str:
         return f"""
 ## 布林带均值回归策略
@@ -0,0 +1,150 @@
+"""
+特征图
+同一轮计算中多个策略（及其不同参数的变体）在同一段K线上声明所需特征，
+按（特征, 输入列, 窗口）去重后每个只计算一次：同一特征的多个窗口合并为一次多窗口内核调用，
+依赖（如ATR依赖真实波幅）只计算一次，结果写入指标缓存，
+各策略compute_signals时按相同的键直接命中
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+import pandas as pd
+import numpy as np
+
+from .indicator_cache import IndicatorCache, get_indicator_cache, indicators
+
+HLC = ('high', 'low', 'close')
+
+
+@dataclass(frozen=True)
+class Feature:
+    """
+    策略依赖的特征
+
+    Args:
+        indicator: 指标名（与指标缓存的键相同）
+        window: 窗口参数（无窗口的特征为None）
+        inputs: 输入列，指纹按这些列计算
+    """
+    indicator: str
+    window: Hashable = None
+    inputs: Tuple[str, ...] = ('close',)
+
+
+# 指标名 -> 多窗口计算函数 (graph, 输入列数组, 窗口元组) -> (窗口数, K线数)
+_KERNELS: Dict[str, Callable] = {
+    'rolling_mean': lambda graph, x, windows: indicators.rolling_mean(x[0], windows),
+    'rolling_std': lambda graph, x, windows: indicators.rolling_std(x[0], windows),
+    'rolling_max': lambda graph, x, windows: indicators.rolling_max(x[0], windows),
+    'rolling_min': lambda graph, x, windows: indicators.rolling_min(x[0], windows),
+    'ewm_mean': lambda graph, x, windows: indicators.ema(x[0], windows),
+    'rsi': lambda graph, x, windows: indicators.rsi(x[0], windows),
+    'linreg': lambda graph, x, windows: indicators.rolling_linreg(x[0], windows),
+    'true_range': lambda graph, x, windows: indicators.true_range(*x)[np.newaxis],
+    'atr': lambda graph, x, windows: indicators.ema(graph.value(Feature('true_range', None, HLC)), windows),
+    'biggest_range': lambda graph, x, windows: indicators.rolling_max(x[0] - x[1], windows),
+}
+
+
+class FeatureGraph:
+    """
+    一段K线上的特征图
+
+    用法：
+        graph = FeatureGraph(df)
+        graph.add_strategies(strategies)
+        graph.evaluate()
+        signals = [s.compute_signals(df) for s in strategies]  # 指标取自缓存
+    """
+
+    def __init__(self, df: pd.DataFrame, cache: Optional[IndicatorCache] = None):
+        """
+        Args:
+            df: K线数据（只读，各策略须在同一个df上计算信号）
+            cache: 指标缓存（默认全局缓存；策略从全局缓存读取特征）
+        """
+        self.df = df
+        self.cache = cache or get_indicator_cache()
+        self._fingerprints: Dict[Tuple[str, ...], str] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._pending: Dict[Feature, None] = {}
+        self.requested = 0  # 声明的特征总数（含重复）
+        self.computed = 0  # 实际计算的（特征, 窗口）数
+
+    def add(self, features: Iterable[Feature]) -> "FeatureGraph":
+        """声明特征（重复的只保留一个）"""
+        for feature in features:
+            if feature.indicator not in _KERNELS:
+                raise ValueError(f"未知的特征: {feature.indicator}")
+            self.requested += 1
+            self._pending[feature] = None
+        return self
+
+    def add_strategies(self, strategies: Iterable) -> "FeatureGraph":
+        """声明各策略required_features()中的特征"""
+        for strategy in strategies:
+            self.add(strategy.required_features())
+        return self
+
+    def evaluate(self) -> "FeatureGraph":
+        """计算已声明的特征，同一（指标, 输入列）的窗口合并为一次调用，已在缓存中的跳过"""
+        groups: Dict[Tuple[str, Tuple[str, ...]], List[Hashable]] = defaultdict(list)
+        for feature in self._pending:
+            groups[(feature.indicator, feature.inputs)].append(feature.window)
+        self._pending = {}
+        for (indicator, inputs), windows in groups.items():
+            self._values(indicator, inputs, windows)
+        return self
+
+    def value(self, feature: Feature) -> np.ndarray:
+        """读取单个特征（未计算时立即计算）"""
+        return self._values(feature.indicator, feature.inputs, [feature.window])[0]
+
+    def fingerprint(self, inputs: Sequence[str]) -> str:
+        """输入列的数据指纹（每组输入列只计算一次）"""
+        inputs = tuple(inputs)
+        if inputs not in self._fingerprints:
+            self._fingerprints[inputs] = self.cache.fingerprint(*(self.df[c] for c in inputs))
+        return self._fingerprints[inputs]
+
+    def _column(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            self._arrays[name] = self.df[name].to_numpy(dtype=np.float64)
+        return self._arrays[name]
+
+    def _values(self, indicator: str, inputs: Tuple[str, ...], windows: Sequence[Hashable]) -> Tuple[np.ndarray, ...]:
+        kernel = _KERNELS[indicator]
+
+        def compute(missing: Tuple) -> np.ndarray:
+            self.computed += len(missing)
+            return kernel(self, [self._column(c) for c in inputs], missing)
+
+        return self.cache.get_many(self.fingerprint(inputs), indicator, windows, compute)
+
+
+def shared_latest_signals(strategies: Sequence, df: pd.DataFrame, bars: int = 1) -> List[pd.Series]:
+    """
+    多个策略计算最后bars根K线的信号，共用一张特征图
+
+    按所有策略中最长的tail_lookback()截取一段尾部（有策略返回None时为完整K线），
+    在这一段上建一张特征图，各策略都在同一段上compute_signals（指纹相同，公共特征只计算一次），
+    再各取最后bars根。尾部不短于每个策略自己所需的长度，窗口特征预热后结果与各自调用latest_signals相同。
+
+    Args:
+        strategies: 策略对象列表
+        df: K线数据（只读，按时间升序）
+        bars: 需要信号的末尾K线数
+
+    Returns:
+        与strategies一一对应的signal序列（索引与df相同）
+    """
+    lookbacks = [strategy.tail_lookback() for strategy in strategies]
+    if any(lookback is None for lookback in lookbacks):
+        tail = df
+    else:
+        tail = df.iloc[max(len(df) - max(lookbacks, default=0) - bars, 0):]
+
+    FeatureGraph(tail).add_strategies(strategies).evaluate()
+    first = max(len(tail) - bars, 0)
+    return [strategy.compute_signals(tail)['signal'].iloc[first:] for strategy in strategies]
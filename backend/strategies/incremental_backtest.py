@@ -0,0 +1,304 @@
+"""
+增量回测
+持有策略的近期K线窗口、持仓状态和指标累加器，新K线到来时只处理新增部分，
+适合竞技场循环、Agent迭代等需要持续跟进行情的长期运行进程
+"""
+
+import math
+from typing import Dict, Optional
+import pandas as pd
+import numpy as np
+
+from .position_simulator import simulate_positions, PositionState, TRADE_LEDGER_DTYPE
+from .metrics import trade_statistics
+
+
+class IncrementalBacktest:
+    """
+    增量回测器
+
+    - 信号：策略支持step()时（默认）逐根调用step()，指标和状态机以流式状态延续，
+      不保留K线窗口，每根K线O(1)，信号与全量回测一致。
+      不支持step()的策略退回窗口模式：每次用「最近lookback根历史K线 + 新K线」调用compute_signals，
+      只取新K线部分，单次更新的计算量为O(lookback + 新K线数)。lookback需覆盖策略的指标窗口；
+      EMA类指标和带状态的信号状态机依赖更早的历史，窗口模式下只能近似全量回测。
+    - 撮合：沿用共享持仓模拟器，从上一次的持仓状态继续（与全量回测口径一致，首根K线不交易）。
+    - 指标：收益率均值/方差、累计净值峰值、最大回撤、交易统计均以累加器维护，O(新K线数)更新。
+    """
+
+    def __init__(self, strategy, initial_capital: float = 10000, commission: float = 0.001,
+                 lookback: int = 1000, streaming: Optional[bool] = None):
+        """
+        初始化增量回测器
+
+        Args:
+            strategy: 策略对象
+            initial_capital: 初始资金
+            commission: 手续费率
+            lookback: 窗口模式下计算新信号时保留的历史K线数（streaming时不使用）
+            streaming: 是否用策略的step()逐根生成信号（None表示策略支持step()时使用）
+        """
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.lookback = lookback
+        self.streaming = strategy.supports_step() if streaming is None else streaming
+        if self.streaming:
+            strategy.reset_stream()
+
+        self.buffer = pd.DataFrame()  # 最近lookback根K线
+        self.state = PositionState(cash=initial_capital)
+        self.trades = np.zeros(0, dtype=TRADE_LEDGER_DTYPE)  # 成交明细（index为全局K线序号）
+
+        # 指标累加器
+        self.bar_count = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.last_capital = float(initial_capital)
+        self.last_signal = 0
+        self._return_mean = 0.0
+        self._return_m2 = 0.0  # Welford算法的平方和
+        self._cumulative = 1.0
+        self._cumulative_max = 1.0
+        self._max_drawdown = 0.0
+        self._underwater = 0  # 当前连续水下K线数
+        self._longest_underwater = 0
+        self._longest_underwater_days = 0
+        self._peak_timestamp = None  # 最近一根不在水下的K线时间
+
+    def append(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        追加新K线并更新信号、持仓和指标
+
+        时间戳不晚于已处理K线的行会被忽略（行情源重复推送时可直接传入）。
+
+        Args:
+            bars: 新K线（需包含timestamp和OHLCV列）
+
+        Returns:
+            新增K线的结果（signal/position/cash/holdings/capital/trade列）
+        """
+        if self.last_timestamp is not None:
+            bars = bars[bars['timestamp'] > self.last_timestamp]
+        if bars.empty:
+            return pd.DataFrame()
+        bars = bars.reset_index(drop=True)
+        n_new = len(bars)
+
+        if self.streaming:
+            signals = np.array([self.strategy.step(bar) for bar in bars.to_dict('records')],
+                               dtype=np.int64)
+        else:
+            # 在近期窗口上生成信号，只取新K线部分
+            window = pd.concat([self.buffer, bars], ignore_index=True) if not self.buffer.empty else bars
+            signals = self.strategy.compute_signals(window)['signal'].to_numpy()[-n_new:]
+            self.buffer = window.iloc[-self.lookback:].reset_index(drop=True)
+
+        prices = bars['close'].to_numpy(dtype=np.float64)
+        sim = simulate_positions(
+            signals, prices,
+            commission=self.commission,
+            initial_state=self.state,
+            start=1 if self.bar_count == 0 else 0,
+        )
+
+        timestamps = bars['timestamp']
+        ledger = sim.ledger(timestamps)
+        ledger['index'] += self.bar_count
+        self.trades = np.concatenate([self.trades, ledger])
+
+        self._update_metrics(sim.capital, timestamps.to_numpy(dtype='datetime64[ns]'))
+
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamps.iloc[0]
+        self.last_timestamp = timestamps.iloc[-1]
+        self.state = sim.final_state
+        self.last_signal = int(signals[-1])
+
+        result = bars.copy()
+        result['signal'] = signals
+        result['position'] = sim.position
+        result['cash'] = sim.cash
+        result['holdings'] = sim.holdings
+        result['capital'] = sim.capital
+        result['trade'] = sim.trade
+        return result
+
+    def _update_metrics(self, capital: np.ndarray, times: np.ndarray):
+        """累加新K线的收益率和回撤（口径与BacktestEngine._calculate_metrics一致）"""
+        previous = np.empty_like(capital)
+        previous[0] = self.last_capital
+        previous[1:] = capital[:-1]
+        returns = capital / previous - 1
+        if self.bar_count == 0:
+            returns[0] = 0.0  # 与pct_change().fillna(0)一致
+
+        # 均值/方差按批合并（Chan等的并行Welford公式）
+        n_a, n_b = self.bar_count, len(returns)
+        n = n_a + n_b
+        batch_mean = returns.mean()
+        batch_m2 = float(((returns - batch_mean) ** 2).sum())
+        delta = batch_mean - self._return_mean
+        self._return_mean += delta * n_b / n
+        self._return_m2 += batch_m2 + delta * delta * n_a * n_b / n
+        self.bar_count = n
+
+        cumulative = self._cumulative * np.cumprod(1 + returns)
+        running_max = np.maximum(np.maximum.accumulate(cumulative), self._cumulative_max)
+        drawdown = (cumulative - running_max) / running_max
+        self._cumulative = float(cumulative[-1])
+        self._cumulative_max = float(running_max[-1])
+        self._max_drawdown = min(self._max_drawdown, float(drawdown.min()))
+
+        # 水下区间长度（承接上一批末尾的连续水下K线数）
+        underwater = cumulative < running_max
+        positions = np.arange(n_b)
+        last_reset = np.maximum.accumulate(np.where(underwater, -1 - self._underwater, positions))
+        run_length = np.where(underwater, positions - last_reset, 0)
+        longest = int(np.argmax(run_length))
+        if run_length[longest] > self._longest_underwater:
+            self._longest_underwater = int(run_length[longest])
+            peak = longest - run_length[longest]
+            if peak >= 0:
+                peak_time = times[peak]
+            else:
+                # 水下区间承接上一批；旧快照可能没有peak_timestamp，退回到第一根K线的时间
+                last_peak = self._peak_timestamp if self._peak_timestamp is not None else self.first_timestamp
+                peak_time = pd.Timestamp(last_peak).to_datetime64()
+            self._longest_underwater_days = int((times[longest] - peak_time) // np.timedelta64(1, 'D'))
+        self._underwater = int(run_length[-1])
+        if not underwater.all():
+            self._peak_timestamp = pd.Timestamp(times[np.flatnonzero(~underwater)[-1]])
+
+        self.last_capital = float(capital[-1])
+
+    @property
+    def metrics(self) -> Dict:
+        """当前性能指标（键与BacktestEngine._calculate_metrics相同）"""
+        final_capital = self.last_capital
+        total_return = (final_capital - self.initial_capital) / self.initial_capital
+
+        sharpe_ratio = 0
+        if self.bar_count > 1:
+            std = math.sqrt(self._return_m2 / (self.bar_count - 1))
+            if std > 0:
+                sharpe_ratio = (self._return_mean / std) * np.sqrt(365)
+
+        trading_days = 0
+        if self.first_timestamp is not None:
+            trading_days = (self.last_timestamp - self.first_timestamp).days
+
+        return {
+            'initial_capital': self.initial_capital,
+            'final_capital': final_capital,
+            'total_return': total_return,
+            'total_return_pct': total_return * 100,
+            'sharpe_ratio': sharpe_ratio,
+            'max_drawdown': self._max_drawdown,
+            'max_drawdown_pct': self._max_drawdown * 100,
+            'max_drawdown_duration': self._longest_underwater,
+            'max_drawdown_duration_days': self._longest_underwater_days,
+            **trade_statistics(self.trades, self.bar_count),
+            'trading_days': trading_days,
+            'avg_daily_return': total_return / trading_days if trading_days > 0 else 0
+        }
+
+    def snapshot(self) -> Dict:
+        """
+        导出当前状态
+
+        Returns:
+            可JSON序列化的状态字典（时间戳为ISO字符串）
+        """
+        buffer = self.buffer.copy()
+        if 'timestamp' in buffer.columns:
+            buffer['timestamp'] = buffer['timestamp'].map(lambda ts: pd.Timestamp(ts).isoformat())
+
+        return {
+            'strategy_name': self.strategy.name,
+            'params': dict(self.strategy.params),
+            'initial_capital': self.initial_capital,
+            'commission': self.commission,
+            'lookback': self.lookback,
+            'streaming': self.streaming,
+            'stream': self.strategy.stream_snapshot() if self.streaming else None,
+            'buffer': buffer.to_dict('list'),
+            'state': {
+                'cash': self.state.cash,
+                'position': self.state.position,
+                'entry_price': self.state.entry_price,
+            },
+            'trades': {
+                name: (np.datetime_as_string(self.trades[name]).tolist() if name == 'timestamp'
+                       else self.trades[name].tolist())
+                for name in TRADE_LEDGER_DTYPE.names
+            },
+            'bar_count': self.bar_count,
+            'first_timestamp': _to_iso(self.first_timestamp),
+            'last_timestamp': _to_iso(self.last_timestamp),
+            'last_capital': self.last_capital,
+            'last_signal': self.last_signal,
+            'return_mean': self._return_mean,
+            'return_m2': self._return_m2,
+            'cumulative': self._cumulative,
+            'cumulative_max': self._cumulative_max,
+            'max_drawdown': self._max_drawdown,
+            'underwater': self._underwater,
+            'longest_underwater': self._longest_underwater,
+            'longest_underwater_days': self._longest_underwater_days,
+            'peak_timestamp': _to_iso(self._peak_timestamp),
+        }
+
+    @classmethod
+    def restore(cls, strategy, snapshot: Dict) -> "IncrementalBacktest":
+        """
+        从snapshot()导出的状态恢复
+
+        Args:
+            strategy: 策略对象（参数应与快照一致）
+            snapshot: 状态字典
+
+        Returns:
+            IncrementalBacktest
+        """
+        backtest = cls(strategy,
+                       initial_capital=snapshot['initial_capital'],
+                       commission=snapshot['commission'],
+                       lookback=snapshot['lookback'],
+                       streaming=snapshot.get('streaming', False))
+        if backtest.streaming:
+            strategy.restore_stream(snapshot['stream'])
+
+        buffer = pd.DataFrame(snapshot['buffer'])
+        if 'timestamp' in buffer.columns:
+            buffer['timestamp'] = pd.to_datetime(buffer['timestamp'])
+        backtest.buffer = buffer
+
+        backtest.state = PositionState(**snapshot['state'])
+        trades = snapshot['trades']
+        backtest.trades = np.zeros(len(trades['index']), dtype=TRADE_LEDGER_DTYPE)
+        for name in TRADE_LEDGER_DTYPE.names:
+            backtest.trades[name] = trades[name]
+        backtest.bar_count = snapshot['bar_count']
+        backtest.first_timestamp = _from_iso(snapshot['first_timestamp'])
+        backtest.last_timestamp = _from_iso(snapshot['last_timestamp'])
+        backtest.last_capital = snapshot['last_capital']
+        backtest.last_signal = snapshot['last_signal']
+        backtest._return_mean = snapshot['return_mean']
+        backtest._return_m2 = snapshot['return_m2']
+        backtest._cumulative = snapshot['cumulative']
+        backtest._cumulative_max = snapshot['cumulative_max']
+        backtest._max_drawdown = snapshot['max_drawdown']
+        backtest._underwater = snapshot.get('underwater', 0)
+        backtest._longest_underwater = snapshot.get('longest_underwater', 0)
+        backtest._longest_underwater_days = snapshot.get('longest_underwater_days', 0)
+        backtest._peak_timestamp = _from_iso(snapshot.get('peak_timestamp'))
+        return backtest
+
+
+def _to_iso(ts) -> Optional[str]:
+    return pd.Timestamp(ts).isoformat() if ts is not None else None
+
+
+def _from_iso(value: Optional[str]):
+    return pd.Timestamp(value) if value is not None else None
@@ -0,0 +1,225 @@
+"""
+指标缓存
+参数扫描时多个参数组合共用相同窗口的滚动均值、标准差、EWM、真实波幅等中间序列，
+按（数据指纹, 指标名, 窗口）缓存计算结果，LRU淘汰并限制总内存
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Sequence, Tuple
+import pandas as pd
+import numpy as np
+
+try:
+    import xxhash
+except ImportError:  # 可选依赖，缺失时退回hashlib
+    xxhash = None
+
+try:
+    from .. import indicators  # 作为backend.strategies导入
+except ImportError:  # 作为顶层包strategies导入（backend目录在sys.path上）
+    import indicators
+
+
+class IndicatorCache:
+    """
+    指标序列的LRU缓存
+
+    缓存值为只读的NumPy数组，返回时按调用方的索引包装成Series，
+    因此不同DataFrame（只要数值相同）可以共用同一份结果。
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, max_entries: Optional[int] = None):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存数组总字节数上限
+            max_entries: 缓存条目数上限（None表示只受内存限制）
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(*series) -> str:
+        """
+        计算一组序列的数据指纹（基于数值内容，与索引无关）
+
+        Args:
+            series: 一个或多个Series/数组
+
+        Returns:
+            十六进制指纹字符串
+        """
+        hasher = xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+        for s in series:
+            values = np.ascontiguousarray(s.to_numpy() if isinstance(s, pd.Series) else s)
+            hasher.update(f"{values.dtype.str}{values.shape}".encode())
+            hasher.update(values.view(np.uint8).ravel() if values.dtype != object else values.tobytes())
+        return hasher.hexdigest()
+
+    def get(self, fingerprint: str, indicator: str, window: Hashable,
+            compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        读取缓存，未命中时调用compute计算并写入
+
+        Args:
+            fingerprint: 数据指纹
+            indicator: 指标名
+            window: 窗口参数（可以是元组）
+            compute: 计算函数，返回数组或Series
+
+        Returns:
+            只读数组
+        """
+        key = (fingerprint, indicator, window)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        return self._store(key, compute())
+
+    def get_many(self, fingerprint: str, indicator: str, windows: Sequence[Hashable],
+                 compute: Callable[[Tuple], np.ndarray]) -> Tuple[np.ndarray, ...]:
+        """
+        一次读取多个窗口，未命中的窗口合并为一次compute调用
+
+        Args:
+            fingerprint: 数据指纹
+            indicator: 指标名
+            windows: 窗口参数序列
+            compute: 计算函数，传入未命中的窗口元组，返回 (窗口数, K线数) 的数组
+
+        Returns:
+            与windows一一对应的只读数组
+        """
+        found = {}
+        with self._lock:
+            for w in dict.fromkeys(windows):
+                key = (fingerprint, indicator, w)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found[w] = self._entries[key]
+            missing = tuple(w for w in dict.fromkeys(windows) if w not in found)
+            self.misses += len(missing)
+
+        if missing:
+            rows = np.asarray(compute(missing)).reshape(len(missing), -1)
+            for w, row in zip(missing, rows):
+                found[w] = self._store((fingerprint, indicator, w), row)
+        return tuple(found[w] for w in windows)
+
+    def _store(self, key: Tuple, values) -> np.ndarray:
+        """写入只读副本（并发计算同一键时保留先写入的结果）"""
+        if isinstance(values, pd.Series):
+            values = values.to_numpy()
+        values = np.array(values, copy=True)
+        values.flags.writeable = False
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = values
+                self._nbytes += values.nbytes
+                self._evict()
+            return self._entries.get(key, values)
+
+    def _evict(self):
+        """按LRU顺序淘汰，直到满足内存和条目数限制"""
+        while self._entries and (
+            self._nbytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            _, values = self._entries.popitem(last=False)
+            self._nbytes -= values.nbytes
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        """当前缓存占用字节数"""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # 常用指标
+    # ------------------------------------------------------------------
+
+    def rolling_mean(self, series: pd.Series, window: int, fingerprint: str = None) -> pd.Series:
+        """滚动均值"""
+        fp = fingerprint or self.fingerprint(series)
+        values = self.get(fp, 'rolling_mean', window, lambda: indicators.rolling_mean(series, window))
+        return pd.Series(values, index=series.index)
+
+    def rolling_std(self, series: pd.Series, window: int, fingerprint: str = None) -> pd.Series:
+        """滚动标准差"""
+        fp = fingerprint or self.fingerprint(series)
+        values = self.get(fp, 'rolling_std', window, lambda: indicators.rolling_std(series, window))
+        return pd.Series(values, index=series.index)
+
+    def rolling_max(self, series: pd.Series, window: int, fingerprint: str = None) -> pd.Series:
+        """滚动最大值"""
+        fp = fingerprint or self.fingerprint(series)
+        values = self.get(fp, 'rolling_max', window, lambda: indicators.rolling_max(series, window))
+        return pd.Series(values, index=series.index)
+
+    def rolling_min(self, series: pd.Series, window: int, fingerprint: str = None) -> pd.Series:
+        """滚动最小值"""
+        fp = fingerprint or self.fingerprint(series)
+        values = self.get(fp, 'rolling_min', window, lambda: indicators.rolling_min(series, window))
+        return pd.Series(values, index=series.index)
+
+    def ewm_mean(self, series: pd.Series, span: int, fingerprint: str = None) -> pd.Series:
+        """指数移动平均（adjust=False）"""
+        fp = fingerprint or self.fingerprint(series)
+        values = self.get(fp, 'ewm_mean', span, lambda: indicators.ema(series, span))
+        return pd.Series(values, index=series.index)
+
+    def true_range(self, df: pd.DataFrame, fingerprint: str = None) -> pd.Series:
+        """
+        真实波幅
+
+        True Range = max(High - Low, abs(High - Close_prev), abs(Low - Close_prev))
+        """
+        high, low, close = df['high'], df['low'], df['close']
+        fp = fingerprint or self.fingerprint(high, low, close)
+        values = self.get(fp, 'true_range', None, lambda: indicators.true_range(high, low, close))
+        return pd.Series(values, index=df.index)
+
+    def atr(self, df: pd.DataFrame, period: int, fingerprint: str = None) -> pd.Series:
+        """ATR（真实波幅的EMA，adjust=False）"""
+        fp = fingerprint or self.fingerprint(df['high'], df['low'], df['close'])
+        values = self.get(
+            fp, 'atr', period,
+            lambda: indicators.ema(self.true_range(df, fingerprint=fp), period)
+        )
+        return pd.Series(values, index=df.index)
+
+
+# 全局指标缓存实例
+_cache_instance: Optional[IndicatorCache] = None
+
+
+def get_indicator_cache() -> IndicatorCache:
+    """获取全局指标缓存实例"""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = IndicatorCache()
+    return _cache_instance
@@ -4,7 +4,9 @@ MACD（移动平均收敛散度）策略
 """
 
 import pandas as pd
-from .strategy_base import BaseStrategy
+from .strategy_base import BaseStrategy, Feature, ema_settle_bars
+from .indicator_cache import get_indicator_cache, indicators
+from .streaming import EWM
 
 
 class MACDStrategy(BaseStrategy):
@@ -25,43 +27,79 @@ class MACDStrategy(BaseStrategy):
         
         super().__init__(name="MACD策略", params=default_params)
     
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         生成MACD交易信号
         
         Args:
-            df: K线数据
+            df: K线数据（只读）
             
         Returns:
-            添加了signal列的DataFrame
+            新增列DataFrame（macd, macd_signal, macd_hist, signal）
         """
-        df = df.copy()
+        signals = pd.DataFrame(index=df.index)
         
         # 计算MACD
         fast = self.params['fast_period']
         slow = self.params['slow_period']
         signal_period = self.params['signal_period']
         
-        exp1 = df['close'].ewm(span=fast, adjust=False).mean()
-        exp2 = df['close'].ewm(span=slow, adjust=False).mean()
+        cache = get_indicator_cache()
+        close_fp = cache.fingerprint(df['close'])
+        exp1 = cache.ewm_mean(df['close'], fast, fingerprint=close_fp)
+        exp2 = cache.ewm_mean(df['close'], slow, fingerprint=close_fp)
         
-        df['macd'] = exp1 - exp2
-        df['macd_signal'] = df['macd'].ewm(span=signal_period, adjust=False).mean()
-        df['macd_hist'] = df['macd'] - df['macd_signal']
+        signals['macd'] = exp1 - exp2
+        signals['macd_signal'] = indicators.ema(signals['macd'], signal_period)
+        signals['macd_hist'] = signals['macd'] - signals['macd_signal']
         
         # 生成信号：金叉买入，死叉卖出
-        df['signal'] = 0
+        signals['signal'] = 0
+        macd, macd_signal = signals['macd'], signals['macd_signal']
         
         # MACD上穿信号线（金叉）
-        df.loc[(df['macd'] > df['macd_signal']) & 
-               (df['macd'].shift(1) <= df['macd_signal'].shift(1)), 'signal'] = 1
+        signals.loc[(macd > macd_signal) & 
+                    (macd.shift(1) <= macd_signal.shift(1)), 'signal'] = 1
         
         # MACD下穿信号线（死叉）
-        df.loc[(df['macd'] < df['macd_signal']) & 
-               (df['macd'].shift(1) >= df['macd_signal'].shift(1)), 'signal'] = -1
+        signals.loc[(macd < macd_signal) & 
+                    (macd.shift(1) >= macd_signal.shift(1)), 'signal'] = -1
         
-        return df
+        return signals
     
+    def required_lookback(self) -> int:
+        """快慢线收敛后信号线再收敛，金叉/死叉还需要前一根"""
+        p = self.params
+        return ema_settle_bars(max(p['fast_period'], p['slow_period'])) + ema_settle_bars(p['signal_period']) + 1
+
+    def required_features(self) -> list:
+        """快慢线（信号线由MACD线计算，不是K线上的特征）"""
+        return [Feature('ewm_mean', self.params['fast_period']), Feature('ewm_mean', self.params['slow_period'])]
+
+    def _init_stream(self) -> dict:
+        return {
+            'fast': EWM(span=self.params['fast_period']),
+            'slow': EWM(span=self.params['slow_period']),
+            'signal': EWM(span=self.params['signal_period']),
+            'prev_macd': float('nan'),
+            'prev_signal': float('nan'),
+        }
+
+    def _step(self, stream: dict, bar) -> int:
+        """逐K线更新MACD和信号线，判断金叉/死叉"""
+        close = float(bar['close'])
+        macd = stream['fast'].update(close) - stream['slow'].update(close)
+        macd_signal = stream['signal'].update(macd)
+        prev_macd, prev_signal = stream['prev_macd'], stream['prev_signal']
+        stream['prev_macd'], stream['prev_signal'] = macd, macd_signal
+
+        signal = 0
+        if macd > macd_signal and prev_macd <= prev_signal:
+            signal = 1
+        if macd < macd_signal and prev_macd >= prev_signal:
+            signal = -1
+        return signal
+
     def get_strategy_description(self) -> str:
         return f"""
 ## MACD金叉死叉策略
@@ -0,0 +1,282 @@
+"""
+绩效指标
+在权益数组和成交明细上单遍计算收益率、夏普比率、最大回撤及回撤持续期、持仓占比和逐笔交易统计，
+并提供滚动夏普 / 滚动回撤供图表使用
+"""
+
+from typing import Dict, Optional
+import pandas as pd
+import numpy as np
+
+from .numba_support import jit, kernel_input, NUMBA_AVAILABLE
+
+
+@jit
+def _equity_kernel(capital):
+    """
+    单遍扫描权益序列
+
+    Returns:
+        (收益率均值, 收益率离差平方和, 最大回撤, 最长水下K线数, 最长水下区间的结束位置)
+    """
+    n = len(capital)
+    mean = 0.0
+    m2 = 0.0
+    peak = capital[0]
+    max_drawdown = 0.0
+    underwater = 0
+    longest = 0
+    longest_end = 0
+
+    for i in range(n):
+        c = capital[i]
+        r = c / capital[i - 1] - 1.0 if i > 0 else 0.0  # 首根为0，与pct_change().fillna(0)一致
+
+        # Welford算法累加均值和方差
+        delta = r - mean
+        mean += delta / (i + 1)
+        m2 += delta * (r - mean)
+
+        if c > peak:
+            peak = c
+        drawdown = (c - peak) / peak
+        if drawdown < max_drawdown:
+            max_drawdown = drawdown
+
+        if c < peak:
+            underwater += 1
+            if underwater > longest:
+                longest = underwater
+                longest_end = i
+        else:
+            underwater = 0
+
+    return mean, m2, max_drawdown, longest, longest_end
+
+
+@jit
+def _trade_kernel(index, side, profit, profit_pct, n_bars):
+    """
+    单遍扫描成交明细
+
+    Returns:
+        (买入次数, 盈利卖出次数, 亏损卖出次数, 盈亏合计, 盈亏百分比合计,
+         盈利合计, 亏损合计, 最长连续亏损笔数, 持仓K线数)
+    """
+    buys = 0
+    wins = 0
+    losses = 0
+    profit_sum = 0.0
+    profit_pct_sum = 0.0
+    gross_profit = 0.0
+    gross_loss = 0.0
+    streak = 0
+    max_streak = 0
+    held = 0
+    open_index = -1
+
+    for k in range(len(side)):
+        if side[k] == 1:
+            buys += 1
+            open_index = index[k]
+        else:
+            p = profit[k]
+            profit_sum += p
+            profit_pct_sum += profit_pct[k]
+            if p > 0:
+                wins += 1
+                gross_profit += p
+                streak = 0
+            else:
+                losses += 1
+                gross_loss -= p
+                streak += 1
+                if streak > max_streak:
+                    max_streak = streak
+            if open_index >= 0:
+                held += index[k] - open_index  # 买入K线起持仓，卖出K线已平仓
+                open_index = -1
+
+    if open_index >= 0:
+        held += n_bars - open_index
+
+    return buys, wins, losses, profit_sum, profit_pct_sum, gross_profit, gross_loss, max_streak, held
+
+
+def _equity_stats(capital: np.ndarray):
+    """权益统计（与_equity_kernel结果相同；未安装numba时用NumPy向量化计算）"""
+    if NUMBA_AVAILABLE:
+        return _equity_kernel(capital)
+
+    n = len(capital)
+    returns = np.zeros(n)
+    returns[1:] = capital[1:] / capital[:-1] - 1
+    mean = returns.mean()
+    m2 = float(((returns - mean) ** 2).sum())
+
+    running_max = np.maximum.accumulate(capital)
+    max_drawdown = min(float(((capital - running_max) / running_max).min()), 0.0)
+
+    # 水下区间：连续的 权益 < 历史峰值 的K线
+    underwater = capital < running_max
+    longest, longest_end = 0, 0
+    if underwater.any():
+        run_id = np.cumsum(~underwater)[underwater]
+        lengths = np.bincount(run_id)
+        best = int(np.argmax(lengths))
+        longest = int(lengths[best])
+        longest_end = int(np.flatnonzero(underwater)[run_id == best][-1])
+
+    return mean, m2, max_drawdown, longest, longest_end
+
+
+def compute_metrics(capital: np.ndarray, initial_capital: float, timestamps=None,
+                    trades: Optional[np.ndarray] = None) -> Dict:
+    """
+    计算绩效指标（不修改输入）
+
+    Args:
+        capital: 逐K线权益数组
+        initial_capital: 初始资金
+        timestamps: 与权益对应的时间（用于交易天数和回撤持续天数，可选）
+        trades: 成交明细（TRADE_LEDGER_DTYPE结构化数组，可选）
+
+    Returns:
+        BacktestEngine._calculate_metrics的全部指标，另含：
+        max_drawdown_duration（最长水下K线数）、max_drawdown_duration_days、
+        exposure_pct（持仓K线占比）、profit_factor（盈利合计/亏损合计）、max_consecutive_losses
+    """
+    capital = np.ascontiguousarray(capital, dtype=np.float64)
+    n_bars = len(capital)
+
+    mean, m2, max_drawdown, longest, longest_end = _equity_stats(capital)
+
+    final_capital = float(capital[-1])
+    total_return = (final_capital - initial_capital) / initial_capital
+
+    # 夏普比率（假设加密货币365天交易）
+    std = np.sqrt(m2 / (n_bars - 1)) if n_bars > 1 else 0.0
+    sharpe_ratio = (mean / std) * np.sqrt(365) if std > 0 else 0
+
+    trading_days = 0
+    drawdown_days = 0
+    if timestamps is not None:
+        times = pd.DatetimeIndex(pd.to_datetime(np.asarray(timestamps)))
+        trading_days = (times[-1] - times[0]).days
+        if longest:
+            drawdown_days = (times[longest_end] - times[longest_end - longest]).days
+
+    return {
+        'initial_capital': initial_capital,
+        'final_capital': final_capital,
+        'total_return': total_return,
+        'total_return_pct': total_return * 100,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+        'max_drawdown_pct': max_drawdown * 100,
+        'max_drawdown_duration': int(longest),
+        'max_drawdown_duration_days': drawdown_days,
+        **trade_statistics(trades, n_bars),
+        'trading_days': trading_days,
+        'avg_daily_return': total_return / trading_days if trading_days > 0 else 0
+    }
+
+
+def trade_statistics(trades: Optional[np.ndarray], n_bars: int) -> Dict:
+    """
+    逐笔交易统计（单遍扫描成交明细）
+
+    Args:
+        trades: 成交明细（TRADE_LEDGER_DTYPE结构化数组，None表示无成交）
+        n_bars: K线总数（用于持仓占比）
+
+    Returns:
+        exposure_pct、买入次数、盈利/亏损卖出次数、胜率(%)、平均每笔盈亏及百分比、
+        profit_factor（盈利合计/亏损合计）、max_consecutive_losses
+    """
+    if trades is None:
+        trades = np.zeros(0, dtype=[('index', np.int64), ('side', np.int8),
+                                    ('profit', np.float64), ('profit_pct', np.float64)])
+    (buys, wins, losses, profit_sum, profit_pct_sum,
+     gross_profit, gross_loss, max_streak, held) = _trade_kernel(
+        kernel_input(trades['index']), kernel_input(trades['side']),
+        kernel_input(trades['profit']), kernel_input(trades['profit_pct']), n_bars
+    )
+    closed = wins + losses
+
+    if gross_loss > 0:
+        profit_factor = gross_profit / gross_loss
+    else:
+        profit_factor = np.inf if gross_profit > 0 else 0
+
+    return {
+        'exposure_pct': held / n_bars * 100 if n_bars else 0,
+        'total_trades': int(buys),
+        'winning_trades': int(wins),
+        'losing_trades': int(losses),
+        'win_rate': (wins / closed * 100) if closed else 0,
+        'avg_trade_profit': profit_sum / closed if closed else 0,
+        'avg_trade_profit_pct': profit_pct_sum / closed if closed else 0,
+        'profit_factor': profit_factor,
+        'max_consecutive_losses': int(max_streak),
+    }
+
+
+def rolling_metrics(capital: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    """
+    滚动指标（O(n)，支持多列权益同时计算）
+
+    Args:
+        capital: 权益数组（K线数，或 K线数 × 列数）
+        window: 滚动窗口K线数
+
+    Returns:
+        {
+            'rolling_sharpe': 最近window根K线收益率的年化夏普（前window-1根为NaN）,
+            'rolling_return': 最近window根K线的累计收益率（前window根为NaN）,
+            'drawdown': 相对最近window根K线内最高权益的回撤（≤0）,
+        }
+        各数组形状与capital相同
+    """
+    capital = np.asarray(capital, dtype=np.float64)
+    squeeze = capital.ndim == 1
+    if squeeze:
+        capital = capital[:, None]
+    n_bars = capital.shape[0]
+
+    returns = np.zeros_like(capital)
+    returns[1:] = capital[1:] / capital[:-1] - 1
+
+    # 先减去整体均值再做前缀和，减小方差公式的抵消误差
+    centered = returns - returns.mean(axis=0)
+    zero = np.zeros((1, capital.shape[1]))
+    s1 = np.concatenate([zero, np.cumsum(centered, axis=0)])
+    s2 = np.concatenate([zero, np.cumsum(centered ** 2, axis=0)])
+    moving = np.concatenate([zero, np.cumsum(returns != 0, axis=0)])
+
+    rolling_sharpe = np.full_like(capital, np.nan)
+    rolling_return = np.full_like(capital, np.nan)
+    if window >= 2 and n_bars >= window:
+        w1 = s1[window:] - s1[:-window]
+        w2 = s2[window:] - s2[:-window]
+        var = np.maximum((w2 - w1 ** 2 / window) / (window - 1), 0)
+        std = np.sqrt(var)
+        mean = w1 / window + returns.mean(axis=0)
+        # 窗口内收益率全为0（一直空仓）时方差只剩舍入误差，夏普按0处理
+        flat = (moving[window:] - moving[:-window]) == 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rolling_sharpe[window - 1:] = np.where(flat | (std == 0), 0.0, mean / std * np.sqrt(365))
+    if n_bars > window:
+        rolling_return[window:] = capital[window:] / capital[:-window] - 1
+
+    peak = pd.DataFrame(capital).rolling(window, min_periods=1).max().to_numpy()
+    drawdown = capital / peak - 1
+
+    result = {
+        'rolling_sharpe': rolling_sharpe,
+        'rolling_return': rolling_return,
+        'drawdown': drawdown,
+    }
+    if squeeze:
+        result = {name: values[:, 0] for name, values in result.items()}
+    return result
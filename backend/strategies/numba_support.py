@@ -0,0 +1,37 @@
+"""
+可选的numba编译支持
+安装了numba时用njit编译逐K线状态机，否则原样以纯Python运行
+"""
+
+from typing import Sequence
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # 可选依赖
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+
+def jit(func):
+    """
+    编译装饰器
+
+    有numba时等价于 numba.njit(cache=True)（不启用fastmath，保证浮点结果与Python逐位一致）；
+    没有时直接返回原函数。
+    """
+    if NUMBA_AVAILABLE:
+        return numba.njit(cache=True)(func)
+    return func
+
+
+def kernel_input(values: np.ndarray) -> Sequence:
+    """
+    把数组转换为状态机的输入
+
+    编译模式下直接传数组；纯Python模式下转为列表，逐元素读取比访问NumPy数组快得多。
+    """
+    if NUMBA_AVAILABLE:
+        return np.ascontiguousarray(values)
+    return values.tolist()
@@ -0,0 +1,277 @@
+"""
+并行参数优化器
+把参数组合分块分发到多进程，K线数据通过共享内存只发布一次
+"""
+
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple, Union
+import pandas as pd
+import numpy as np
+
+from .backtest_engine import BacktestEngine
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class SharedOHLCV:
+    """
+    共享内存中的K线数据
+
+    布局：一块共享内存依次存放 timestamp(int64纳秒) 和 open/high/low/close/volume(float64)，
+    子进程只需知道名称和K线数即可零拷贝地重建DataFrame。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, n_bars: int, owner: bool):
+        self.shm = shm
+        self.n_bars = n_bars
+        self.owner = owner
+
+    @classmethod
+    def publish(cls, df: pd.DataFrame) -> "SharedOHLCV":
+        """把DataFrame写入新的共享内存块"""
+        n_bars = len(df)
+        size = max(n_bars * 8 * (1 + len(OHLCV_COLUMNS)), 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shared = cls(shm, n_bars, owner=True)
+
+        timestamps, values = shared._views()
+        timestamps[:] = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        for i, col in enumerate(OHLCV_COLUMNS):
+            values[i] = df[col].to_numpy(dtype=np.float64)
+        return shared
+
+    @classmethod
+    def attach(cls, name: str, n_bars: int) -> "SharedOHLCV":
+        """在子进程中按名称挂载已发布的共享内存"""
+        # 进程池的子进程与发布方共用同一个resource_tracker，回收由发布方的unlink负责
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, n_bars, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _views(self) -> Tuple[np.ndarray, np.ndarray]:
+        timestamps = np.ndarray((self.n_bars,), dtype=np.int64, buffer=self.shm.buf)
+        values = np.ndarray((len(OHLCV_COLUMNS), self.n_bars), dtype=np.float64,
+                            buffer=self.shm.buf, offset=self.n_bars * 8)
+        return timestamps, values
+
+    def to_frame(self) -> pd.DataFrame:
+        """基于共享内存构建DataFrame（数值列不复制）"""
+        timestamps, values = self._views()
+        frame = pd.DataFrame(values.T, columns=OHLCV_COLUMNS, copy=False)
+        frame.insert(0, 'timestamp', timestamps.view('datetime64[ns]'))
+        return frame
+
+    def close(self):
+        """关闭共享内存（发布方同时释放）"""
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# 子进程中的共享数据（每个进程初始化一次）
+_worker_shared: Optional[SharedOHLCV] = None
+_worker_frame: Optional[pd.DataFrame] = None
+
+
+def _init_worker(shm_name: str, n_bars: int):
+    global _worker_shared, _worker_frame
+    _worker_shared = SharedOHLCV.attach(shm_name, n_bars)
+    _worker_frame = _worker_shared.to_frame()
+
+
+def _evaluate_chunk(strategy_cls, combos: List[Dict], initial_capital: float,
+                    commission: float, lean: bool = False) -> pd.DataFrame:
+    engine = BacktestEngine(initial_capital=initial_capital, commission=commission, lean=lean)
+    return engine.run_grid(strategy_cls, _worker_frame, combos)
+
+
+def _terminate(executor: ProcessPoolExecutor):
+    """结束进程池的全部子进程（运行中的任务无法cancel，只能结束其进程）"""
+    processes = list((executor._processes or {}).values())
+    for process in processes:
+        process.terminate()
+    executor.shutdown(wait=True, cancel_futures=True)
+    for process in processes:
+        process.join()
+
+
+def select_best(grid: pd.DataFrame, combos: List[Dict], metric: str) -> Tuple[Optional[Dict], float]:
+    """
+    从网格结果中选出指标最大的参数组合
+
+    全部任务失败时结果中没有指标列，此时返回 (None, -inf)，并把error列中的错误记入日志。
+
+    Args:
+        grid: run()或BacktestEngine.run_grid的结果（与combos顺序一致）
+        combos: 参数字典列表
+        metric: 优化目标（越大越好）
+
+    Returns:
+        (最佳参数字典, 最佳指标值)
+    """
+    if 'error' in grid:
+        failed = grid['error'].dropna()
+        if len(failed):
+            logger.warning("%d/%d 个参数组合回测失败: %s", len(failed), len(grid),
+                           "; ".join(failed.unique()))
+    if grid.empty or metric not in grid or grid[metric].isna().all():
+        return None, -np.inf
+
+    best = int(np.nanargmax(grid[metric].to_numpy(dtype=np.float64)))
+    return combos[best], float(grid[metric].iloc[best])
+
+
+class ParallelOptimizer:
+    """
+    多进程网格搜索
+
+    参数组合按chunk_size分块，每块在子进程中用BacktestEngine.run_grid批量回测。
+    同时在途的任务数不超过进程数，因此task_timeout约等于单个任务的实际运行时长上限；
+    超时的任务其参数组合的指标记为NaN，并在error列注明原因。任务超时后进程池整体结束并重建
+    （运行中的任务无法取消），同批被结束的其它任务重新提交。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 32,
+                 task_timeout: Optional[float] = None,
+                 initial_capital: float = 10000, commission: float = 0.001,
+                 lean: bool = False):
+        """
+        初始化并行优化器
+
+        Args:
+            max_workers: 进程数（默认CPU核数）
+            chunk_size: 每个任务包含的参数组合数
+            task_timeout: 单个任务的超时秒数（None表示不限）
+            initial_capital: 初始资金
+            commission: 手续费率
+            lean: 子进程使用精简模式的BacktestEngine（逐组合撮合，内存不随chunk_size增长）
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.task_timeout = task_timeout
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.lean = lean
+
+    def run(self, strategy_cls, df: pd.DataFrame, param_grid: Union[Dict, List[Dict]]) -> pd.DataFrame:
+        """
+        并行回测整个参数网格
+
+        Args:
+            strategy_cls: 策略类
+            df: K线数据
+            param_grid: 参数网格或参数字典列表
+
+        Returns:
+            与BacktestEngine.run_grid相同列的DataFrame（按参数组合原顺序），另含error列
+        """
+        if isinstance(param_grid, dict):
+            keys = list(param_grid.keys())
+            combos = [dict(zip(keys, combo)) for combo in itertools.product(*param_grid.values())]
+        else:
+            combos = list(param_grid)
+
+        chunks = [combos[i:i + self.chunk_size] for i in range(0, len(combos), self.chunk_size)]
+        results: Dict[int, pd.DataFrame] = {}
+        errors: Dict[int, str] = {}
+
+        shared = SharedOHLCV.publish(df)
+
+        def new_executor() -> ProcessPoolExecutor:
+            return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                       initargs=(shared.name, len(df)))
+
+        executor = new_executor()
+        try:
+            queue = deque(range(len(chunks)))
+            pending = {}  # future -> (chunk序号, 提交时间)
+
+            while queue or pending:
+                # 保持在途任务数不超过进程数，提交即开始运行
+                while queue and len(pending) < self.max_workers:
+                    chunk_idx = queue.popleft()
+                    future = executor.submit(_evaluate_chunk, strategy_cls, chunks[chunk_idx],
+                                             self.initial_capital, self.commission, self.lean)
+                    pending[future] = (chunk_idx, time.monotonic())
+
+                timeout = None
+                if self.task_timeout is not None:
+                    oldest = min(submitted for _, submitted in pending.values())
+                    timeout = max(0.0, oldest + self.task_timeout - time.monotonic())
+
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    chunk_idx, _ = pending.pop(future)
+                    try:
+                        results[chunk_idx] = future.result()
+                    except Exception as e:
+                        errors[chunk_idx] = f"{type(e).__name__}: {e}"
+
+                if self.task_timeout is None:
+                    continue
+                now = time.monotonic()
+                expired = [future for future, (_, submitted) in pending.items()
+                           if now - submitted >= self.task_timeout]
+                if not expired:
+                    continue
+
+                # 超时任务仍占用子进程：结束整个进程池后重建，
+                # 同时被结束的未超时任务放回队首重新计时
+                for future in expired:
+                    chunk_idx, _ = pending.pop(future)
+                    errors[chunk_idx] = f"超时（>{self.task_timeout}s）"
+                queue.extendleft(sorted((chunk_idx for chunk_idx, _ in pending.values()), reverse=True))
+                pending = {}
+                _terminate(executor)
+                executor = new_executor()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            shared.close()
+
+        frames = []
+        for chunk_idx, chunk in enumerate(chunks):
+            if chunk_idx in results:
+                frame = results[chunk_idx].copy()
+                frame['error'] = None
+            else:
+                frame = pd.DataFrame(chunk)
+                frame['error'] = errors.get(chunk_idx)
+            frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def optimize(self, strategy_cls, df: pd.DataFrame, param_grid: Union[Dict, List[Dict]],
+                 metric: str = 'sharpe_ratio') -> Tuple[Optional[Dict], float]:
+        """
+        并行网格搜索最佳参数
+
+        Args:
+            strategy_cls: 策略类
+            df: K线数据
+            param_grid: 参数网格或参数字典列表
+            metric: 优化目标（BacktestEngine指标名，越大越好）
+
+        Returns:
+            (最佳参数字典, 最佳指标值)，全部组合失败时为 (None, -inf)
+        """
+        if isinstance(param_grid, dict):
+            keys = list(param_grid.keys())
+            combos = [dict(zip(keys, combo)) for combo in itertools.product(*param_grid.values())]
+        else:
+            combos = list(param_grid)
+
+        return select_best(self.run(strategy_cls, df, combos), combos, metric)
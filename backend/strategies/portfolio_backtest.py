@@ -0,0 +1,252 @@
+"""
+多交易对组合回测
+并发载入多个交易对的K线，按交易对并行回测各自的策略，
+再把各资金分仓（交易对 × 策略）的权益对齐到统一时间轴上合成组合权益
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import pandas as pd
+import numpy as np
+
+from .backtest_engine import BacktestEngine
+from .metrics import compute_metrics, trade_statistics
+
+
+def _run_symbol(strategies: List, df: pd.DataFrame, capitals: List[float],
+                commission: float) -> List[Dict]:
+    """在一个交易对的K线上依次回测该交易对的各策略（同一进程内共享指标缓存）"""
+    results = []
+    for strategy, capital in zip(strategies, capitals):
+        engine = BacktestEngine(initial_capital=capital, commission=commission)
+        results.append(engine.run_backtest(strategy, df))
+    return results
+
+
+class PortfolioBacktester:
+    """
+    组合回测器
+
+    - 分仓：每个（交易对, 策略）为一个资金分仓，按allocation分配初始资金：
+      None为全部资金在各分仓间平分；浮点数为每个分仓占总资金的比例（同竞技场的per_strategy_ratio），
+      剩余部分作为现金保留；字典为每个交易对占总资金的比例，在该交易对的策略间平分。
+    - 对齐：align='outer'时时间轴为各交易对K线时间的并集，各交易对在自己的K线上回测，
+      缺失的K线沿用上一根的权益，上市前为分仓的初始资金；
+      align='inner'时只保留所有交易对都有的K线时间后再回测。
+    - 再平衡：rebalance_every为K线数，每隔该数量的K线在收盘时按目标比例重新分配总权益，
+      持仓中的分仓调整部分按手续费率扣费；为空时各分仓独立运行（与竞技场相同）。
+    - 并行：K线用线程并发读取；各交易对的回测在进程池中并行，max_workers=1时在当前进程中计算。
+    """
+
+    def __init__(self, initial_capital: float = 10000, commission: float = 0.001,
+                 allocation: Union[None, float, Dict[str, float]] = None,
+                 align: str = 'outer', rebalance_every: Optional[int] = None,
+                 max_workers: Optional[int] = None):
+        """
+        初始化组合回测器
+
+        Args:
+            initial_capital: 组合初始资金
+            commission: 手续费率
+            allocation: 资金分配规则（见类说明）
+            align: 时间轴对齐方式 'outer' 或 'inner'
+            rebalance_every: 再平衡间隔K线数（为空时不再平衡）
+            max_workers: 并行数（默认CPU核数；1表示在当前进程中计算）
+        """
+        if align not in ('outer', 'inner'):
+            raise ValueError(f"未知的对齐方式: {align}")
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.allocation = allocation
+        self.align = align
+        self.rebalance_every = rebalance_every
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def load(self, data_manager, symbols: Sequence[str], timeframe: str,
+             start_time: Optional[datetime] = None,
+             end_time: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """
+        并发读取多个交易对的K线
+
+        Args:
+            data_manager: HistoricalDataManager实例
+            symbols: 交易对列表
+            timeframe: K线周期
+            start_time: 起始时间（含）
+            end_time: 结束时间（含）
+
+        Returns:
+            {交易对: K线DataFrame}
+        """
+        with ThreadPoolExecutor(max_workers=max(1, len(symbols))) as executor:
+            frames = executor.map(
+                lambda symbol: data_manager.load_klines(symbol, timeframe, start_time, end_time), symbols
+            )
+            return dict(zip(symbols, frames))
+
+    def run(self, strategies: Dict[str, Union[object, List]], data: Dict[str, pd.DataFrame]) -> Dict:
+        """
+        运行组合回测
+
+        Args:
+            strategies: {交易对: 策略对象或策略对象列表}
+            data: {交易对: K线DataFrame}（如load的返回值）
+
+        Returns:
+            {
+                'equity': 统一时间轴上的权益表（每个分仓一列，另含cash和total）,
+                'weights': 各分仓及现金的目标比例,
+                'sleeves': {分仓名: 该分仓的回测结果（与run_backtest相同）},
+                'metrics': 组合总权益的性能指标,
+            }
+        """
+        symbols = list(strategies)
+        missing = [symbol for symbol in symbols if symbol not in data or data[symbol].empty]
+        if missing:
+            raise ValueError(f"缺少K线数据: {missing}")
+
+        plan = {symbol: strategies[symbol] if isinstance(strategies[symbol], (list, tuple))
+                else [strategies[symbol]] for symbol in symbols}
+        weights = self._weights(plan)
+        frames = self._align({symbol: data[symbol] for symbol in symbols})
+
+        # 按交易对并行回测
+        jobs = [(plan[symbol], frames[symbol],
+                 [weights[self._sleeve_name(symbol, s)] * self.initial_capital for s in plan[symbol]],
+                 self.commission) for symbol in symbols]
+        if self.max_workers == 1 or len(jobs) == 1:
+            outputs = [_run_symbol(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+                outputs = list(executor.map(_run_symbol, *zip(*jobs)))
+
+        sleeves = {}
+        for symbol, results in zip(symbols, outputs):
+            for strategy, result in zip(plan[symbol], results):
+                sleeves[self._sleeve_name(symbol, strategy)] = result
+
+        index = pd.DatetimeIndex(sorted(set().union(*[frames[s]['timestamp'] for s in symbols])))
+        equity = self._combine(index, sleeves, weights)
+
+        metrics = compute_metrics(equity['total'].to_numpy(), self.initial_capital, timestamps=index)
+        # 成交统计按各分仓合并（持仓占比、连续亏损等依赖单一时间顺序的指标看各分仓自己的结果）
+        ledger = np.concatenate([result['trades'] for result in sleeves.values()])
+        stats = trade_statistics(ledger, len(index))
+        for key in ['exposure_pct', 'max_consecutive_losses']:
+            del stats[key], metrics[key]
+        metrics.update(stats)
+
+        return {
+            'equity': equity,
+            'weights': weights,
+            'sleeves': sleeves,
+            'metrics': metrics,
+        }
+
+    @staticmethod
+    def _sleeve_name(symbol: str, strategy) -> str:
+        return f"{symbol}/{strategy.name}"
+
+    def _weights(self, plan: Dict[str, List]) -> Dict[str, float]:
+        """各分仓的目标资金比例（剩余为现金）"""
+        n_sleeves = sum(len(items) for items in plan.values())
+        weights = {}
+        for symbol, items in plan.items():
+            for strategy in items:
+                if self.allocation is None:
+                    weight = 1.0 / n_sleeves
+                elif isinstance(self.allocation, dict):
+                    weight = self.allocation.get(symbol, 0.0) / len(items)
+                else:
+                    weight = float(self.allocation)
+                name = self._sleeve_name(symbol, strategy)
+                if name in weights:
+                    raise ValueError(f"分仓重名: {name}")
+                weights[name] = weight
+
+        total = sum(weights.values())
+        if total > 1 + 1e-9:
+            raise ValueError(f"分仓比例合计{total:.2f}超过100%")
+        weights['cash'] = max(1.0 - total, 0.0)
+        return weights
+
+    def _align(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """inner对齐时只保留所有交易对共有的K线时间"""
+        frames = {symbol: df.reset_index(drop=True) for symbol, df in frames.items()}
+        if self.align == 'outer':
+            return frames
+
+        common = None
+        for df in frames.values():
+            times = pd.DatetimeIndex(df['timestamp'])
+            common = times if common is None else common.intersection(times)
+        if common is None or len(common) < 2:
+            raise ValueError("各交易对共同的K线不足2根")
+        return {symbol: df[df['timestamp'].isin(common)].reset_index(drop=True)
+                for symbol, df in frames.items()}
+
+    def _combine(self, index: pd.DatetimeIndex, sleeves: Dict[str, Dict],
+                 weights: Dict[str, float]) -> pd.DataFrame:
+        """把各分仓权益对齐到统一时间轴并合成组合权益（含再平衡）"""
+        names = list(sleeves)
+        initial = np.array([weights[name] * self.initial_capital for name in names])
+        equity = np.empty((len(index), len(names)))
+        holding = np.zeros((len(index), len(names)), dtype=bool)
+
+        for j, name in enumerate(names):
+            data = sleeves[name]['data']
+            times = pd.DatetimeIndex(data['timestamp'])
+            capital = pd.Series(data['capital'].to_numpy(dtype=np.float64), index=times)
+            equity[:, j] = capital.reindex(index).ffill().fillna(initial[j]).to_numpy()
+            position = pd.Series(data['position'].to_numpy(dtype=np.float64), index=times)
+            holding[:, j] = position.reindex(index).ffill().fillna(0).to_numpy() > 0
+
+        cash = np.full(len(index), weights['cash'] * self.initial_capital)
+        if self.rebalance_every:
+            equity, cash = self._rebalance(equity, holding, cash[0], initial, weights, names)
+
+        table = pd.DataFrame(equity, index=index, columns=names)
+        table['cash'] = cash
+        table['total'] = equity.sum(axis=1) + cash
+        table.index.name = 'timestamp'
+        return table
+
+    def _rebalance(self, equity: np.ndarray, holding: np.ndarray, cash: float, initial: np.ndarray,
+                   weights: Dict[str, float], names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        按固定间隔再平衡
+
+        各分仓资金与其权益线性相关（全仓买入），资金缩放k倍后权益路径也缩放k倍，
+        因此用分仓自身的逐K线权益比值推进，再平衡时直接重设各分仓资金。
+        """
+        n_bars = len(equity)
+        target = np.array([weights[name] for name in names])
+        cash_weight = weights['cash']
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = np.ones_like(equity)
+            growth[1:] = np.where(equity[:-1] > 0, equity[1:] / equity[:-1], 1.0)
+
+        values = np.empty_like(equity)
+        cash_path = np.empty(n_bars)
+        base = initial.astype(np.float64)
+        values[0] = base
+        start = 0
+        for stop in list(range(self.rebalance_every, n_bars, self.rebalance_every)) + [n_bars]:
+            values[start + 1:stop] = base * np.cumprod(growth[start + 1:stop], axis=0)
+            cash_path[start:stop] = cash
+            if stop == n_bars:
+                break
+
+            # 在stop根K线收盘（计入其收益后）按目标比例重新分配，持仓分仓的调整量扣手续费
+            before = values[stop - 1] * growth[stop]
+            total = before.sum() + cash
+            fee = self.commission * np.abs(target * total - before)[holding[stop]].sum()
+            base = target * (total - fee)
+            cash = cash_weight * (total - fee)
+            values[stop] = base
+            start = stop
+
+        return values, cash_path
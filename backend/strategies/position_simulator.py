@@ -0,0 +1,332 @@
+"""
+持仓模拟器
+回测引擎、策略基类、竞技场离线同步和净值回放共用的只做多撮合核心
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+import pandas as pd
+import numpy as np
+
+
+@dataclass(frozen=True)
+class CommissionModel:
+    """
+    手续费模型
+
+    Args:
+        rate: 手续费率
+        deduct_before_fill: 买入时是否先从资金中扣除手续费再换算数量
+            False: 数量 = 资金 / 价格 * (1 - 费率)（回测引擎口径）
+            True: 数量 = 资金 * (1 - 费率) / 价格（竞技场口径）
+    """
+    rate: float = 0.001
+    deduct_before_fill: bool = False
+
+    def buy_amount(self, cash: float, price: float) -> float:
+        """用全部现金买入时得到的数量"""
+        if self.deduct_before_fill:
+            return (cash * (1 - self.rate)) / price
+        return cash / price * (1 - self.rate)
+
+    def sell_value(self, position: float, price: float) -> float:
+        """全部卖出后得到的现金"""
+        return position * price * (1 - self.rate)
+
+
+@dataclass
+class PositionState:
+    """撮合状态（可用于从已保存的状态继续模拟）"""
+    cash: float
+    position: float = 0.0
+    entry_price: float = 0.0
+
+
+# 成交明细的紧凑表示：每笔成交一行的结构化数组
+TRADE_LEDGER_DTYPE = np.dtype([
+    ('index', np.int64),  # 成交K线位置
+    ('timestamp', 'datetime64[ns]'),  # 成交时间（未知时为NaT）
+    ('side', np.int8),  # 1=买入，-1=卖出
+    ('price', np.float64),  # 成交价
+    ('amount', np.float64),  # 成交数量
+    ('value', np.float64),  # 成交金额（卖出为扣除手续费后的所得）
+    ('profit', np.float64),  # 卖出盈亏（买入为NaN）
+    ('profit_pct', np.float64),  # 卖出盈亏百分比（买入为NaN）
+])
+
+
+def build_trade_ledger(trades: List[Dict], timestamps=None) -> np.ndarray:
+    """
+    把成交明细列表转换为结构化数组
+
+    Args:
+        trades: simulate_positions返回的成交明细
+        timestamps: 与K线位置对应的时间序列（可选），用于填充成交时间
+
+    Returns:
+        TRADE_LEDGER_DTYPE结构化数组
+    """
+    ledger = np.zeros(len(trades), dtype=TRADE_LEDGER_DTYPE)
+    if not trades:
+        return ledger
+
+    ledger['index'] = [t['index'] for t in trades]
+    ledger['side'] = [1 if t['type'] == 'BUY' else -1 for t in trades]
+    ledger['price'] = [t['price'] for t in trades]
+    ledger['amount'] = [t['amount'] for t in trades]
+    ledger['value'] = [t['value'] for t in trades]
+    ledger['profit'] = [t.get('profit', np.nan) for t in trades]
+    ledger['profit_pct'] = [t.get('profit_pct', np.nan) for t in trades]
+
+    if timestamps is None:
+        ledger['timestamp'] = np.datetime64('NaT')
+    else:
+        times = np.asarray(pd.to_datetime(timestamps).to_numpy(dtype='datetime64[ns]'))
+        ledger['timestamp'] = times[ledger['index']]
+    return ledger
+
+
+def ledger_statistics(ledger: np.ndarray) -> Dict:
+    """
+    根据成交明细向量化计算交易统计
+
+    Args:
+        ledger: TRADE_LEDGER_DTYPE结构化数组
+
+    Returns:
+        买入次数、盈利/亏损卖出次数、胜率(%)、平均每笔盈亏及百分比、总盈亏
+    """
+    sells = ledger[ledger['side'] == -1]
+    profits = sells['profit']
+    winning_trades = int(np.count_nonzero(profits > 0))
+    closed = len(sells)
+
+    return {
+        'total_trades': int(np.count_nonzero(ledger['side'] == 1)),
+        'winning_trades': winning_trades,
+        'losing_trades': closed - winning_trades,
+        'win_rate': (winning_trades / closed * 100) if closed else 0,
+        'avg_trade_profit': float(profits.mean()) if closed else 0,
+        'avg_trade_profit_pct': float(sells['profit_pct'].mean()) if closed else 0,
+        'total_trade_profit': float(profits.sum()),
+    }
+
+
+@dataclass
+class SimulationResult:
+    """模拟结果"""
+    position: np.ndarray  # 每根K线收盘后的持仓数量
+    cash: np.ndarray  # 现金
+    holdings: np.ndarray  # 持仓市值
+    capital: np.ndarray  # 总权益
+    trade: np.ndarray  # 交易标记（1=买入，-1=卖出）
+    trades: List[Dict] = field(default_factory=list)  # 成交明细，index为成交K线位置
+    final_state: Optional[PositionState] = None
+
+    @property
+    def net_value(self) -> np.ndarray:
+        """净值：有持仓时为持仓市值，否则为现金"""
+        return np.where(self.position > 0, self.holdings, self.cash)
+
+    def ledger(self, timestamps=None) -> np.ndarray:
+        """成交明细的结构化数组（见build_trade_ledger）"""
+        return build_trade_ledger(self.trades, timestamps)
+
+
+def simulate_positions(signals: np.ndarray, prices: np.ndarray,
+                       commission: Union[CommissionModel, float] = 0.001,
+                       initial_state: Optional[PositionState] = None,
+                       initial_capital: float = 10000,
+                       start: int = 0) -> SimulationResult:
+    """
+    根据信号模拟只做多的全仓交易
+
+    规则：信号为1且空仓时用全部现金买入；信号为-1且有持仓时全部卖出。
+    只有信号为±1的K线可能改变状态，因此只在这些K线上逐个撮合，
+    其余K线的持仓和现金通过前向填充得到，结果与逐K线循环完全一致。
+
+    Args:
+        signals: 信号数组（1=买入，-1=卖出，0=持有）
+        prices: 成交价数组（通常为收盘价）
+        commission: 手续费模型或手续费率
+        initial_state: 起始状态，为空时以initial_capital空仓起步
+        initial_capital: 初始资金（仅在未提供initial_state时使用）
+        start: 从第几根K线开始允许交易
+
+    Returns:
+        SimulationResult
+    """
+    if not isinstance(commission, CommissionModel):
+        commission = CommissionModel(rate=commission)
+    if initial_state is None:
+        initial_state = PositionState(cash=initial_capital)
+
+    signals = np.asarray(signals)
+    prices = np.asarray(prices, dtype=np.float64)
+    n = len(prices)
+
+    event_idx = np.flatnonzero((signals == 1) | (signals == -1))
+    event_idx = event_idx[event_idx >= start]
+
+    cash = initial_state.cash
+    position = initial_state.position
+    entry_price = initial_state.entry_price
+
+    trades = []
+    change_index, state_position, state_cash = [], [], []
+
+    for i, signal, price in zip(event_idx.tolist(),
+                                signals[event_idx].tolist(),
+                                prices[event_idx].tolist()):
+        # 买入信号且无持仓
+        if signal == 1 and position == 0 and cash > 0:
+            position = commission.buy_amount(cash, price)
+            entry_price = price
+            cash = 0
+            trades.append({
+                'index': i,
+                'type': 'BUY',
+                'price': price,
+                'amount': position,
+                'value': position * price,
+            })
+
+        # 卖出信号且有持仓
+        elif signal == -1 and position > 0:
+            sell_value = commission.sell_value(position, price)
+            cost = position * entry_price
+            profit = sell_value - cost
+            profit_pct = (profit / cost) * 100 if cost else 0
+            trades.append({
+                'index': i,
+                'type': 'SELL',
+                'price': price,
+                'amount': position,
+                'value': sell_value,
+                'profit': profit,
+                'profit_pct': profit_pct,
+            })
+            cash = sell_value
+            position = 0
+            entry_price = 0
+
+        else:
+            continue
+
+        change_index.append(i)
+        state_position.append(position)
+        state_cash.append(cash)
+
+    # 每根K线所处的状态段（0=起始状态，k=第k笔成交之后）
+    segment = np.zeros(n, dtype=np.intp)
+    segment[change_index] = np.arange(1, len(change_index) + 1)
+    segment = np.maximum.accumulate(segment)
+
+    position_arr = np.array([initial_state.position] + state_position, dtype=np.float64)[segment]
+    cash_arr = np.array([initial_state.cash] + state_cash, dtype=np.float64)[segment]
+    holdings_arr = position_arr * prices
+    capital_arr = cash_arr + holdings_arr
+
+    trade_arr = np.zeros(n, dtype=np.int64)
+    trade_arr[change_index] = [1 if t['type'] == 'BUY' else -1 for t in trades]
+
+    return SimulationResult(
+        position=position_arr,
+        cash=cash_arr,
+        holdings=holdings_arr,
+        capital=capital_arr,
+        trade=trade_arr,
+        trades=trades,
+        final_state=PositionState(cash=cash, position=position, entry_price=entry_price),
+    )
+
+
+@dataclass
+class MatrixSimulationResult:
+    """多组信号同时模拟的结果（每列对应一组参数）"""
+    capital: np.ndarray  # 总权益矩阵（K线数 × 参数组数）
+    buy_count: np.ndarray  # 每列买入次数
+    win_count: np.ndarray  # 每列盈利卖出次数
+    loss_count: np.ndarray  # 每列亏损卖出次数
+    profit_sum: np.ndarray  # 每列卖出盈亏之和
+    profit_pct_sum: np.ndarray  # 每列卖出盈亏百分比之和
+
+
+def simulate_signal_matrix(signals: np.ndarray, prices: np.ndarray,
+                           commission: Union[CommissionModel, float] = 0.001,
+                           initial_capital: float = 10000,
+                           start: int = 0) -> MatrixSimulationResult:
+    """
+    以向量化方式同时模拟多列信号（空仓起步）
+
+    与simulate_positions规则相同：持仓状态等于最近一个非零信号是否为买入，
+    每笔卖出把资金乘以 卖出价/买入价 × 手续费因子，通过按列累乘得到资金曲线。
+    结果与逐列调用simulate_positions在浮点误差范围内一致。
+
+    Args:
+        signals: 信号矩阵（K线数 × 参数组数）
+        prices: 成交价数组（K线数）
+        commission: 手续费模型或手续费率
+        initial_capital: 初始资金
+        start: 从第几根K线开始允许交易
+
+    Returns:
+        MatrixSimulationResult
+    """
+    if not isinstance(commission, CommissionModel):
+        commission = CommissionModel(rate=commission)
+
+    signals = np.asarray(signals)
+    if signals.ndim == 1:
+        signals = signals[:, None]
+    prices = np.asarray(prices, dtype=np.float64)[:, None]
+    n = signals.shape[0]
+    rows = np.arange(n)[:, None]
+
+    # 最近一个非零信号的位置，决定当前是否持仓
+    is_event = (signals == 1) | (signals == -1)
+    is_event[:start] = False
+    last_event = np.where(is_event, rows, -1)
+    np.maximum.accumulate(last_event, axis=0, out=last_event)
+    has_event = last_event >= 0
+    last_signal = np.take_along_axis(signals, np.maximum(last_event, 0), axis=0)
+    is_long = has_event & (last_signal == 1)
+
+    was_long = np.zeros_like(is_long)
+    was_long[1:] = is_long[:-1]
+    buy = is_long & ~was_long
+    sell = ~is_long & was_long
+
+    # 当前（或刚平仓）这笔交易的买入价
+    entry_row = np.where(buy, rows, -1)
+    np.maximum.accumulate(entry_row, axis=0, out=entry_row)
+    entry_price = prices[np.maximum(entry_row, 0), 0]
+
+    # 单位资金一次完整买卖后的资金倍数
+    unit_amount = commission.buy_amount(1.0, entry_price)
+    round_trip = commission.sell_value(unit_amount, prices)
+    factor = np.where(sell, round_trip, 1.0)
+    cash = initial_capital * np.cumprod(factor, axis=0)
+
+    capital = np.where(is_long, commission.buy_amount(cash, entry_price) * prices, cash)
+
+    # 盈亏判断：卖出所得 > 买入市值
+    unit_cost = unit_amount * entry_price
+    won = sell & (round_trip > unit_cost)
+
+    # 每笔卖出的盈亏 = 卖出前现金 × (单位卖出所得 - 单位买入成本)
+    cash_before = np.empty_like(cash)
+    cash_before[0] = initial_capital
+    cash_before[1:] = cash[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit = np.where(sell, cash_before * (round_trip - unit_cost), 0.0)
+        profit_pct = np.where(sell, (round_trip / unit_cost - 1) * 100, 0.0)
+
+    return MatrixSimulationResult(
+        capital=capital,
+        buy_count=buy.sum(axis=0),
+        win_count=won.sum(axis=0),
+        loss_count=(sell & ~won).sum(axis=0),
+        profit_sum=profit.sum(axis=0),
+        profit_pct_sum=profit_pct.sum(axis=0),
+    )
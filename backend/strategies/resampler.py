@@ -0,0 +1,216 @@
+"""
+多周期重采样
+从任意基础周期的K线构建日线、周线等高周期OHLCV，并对齐回基础K线：
+高周期K线在其最后一根基础K线收盘时才可见（无未来函数）。
+批量结果按数据指纹存入指标缓存；实盘逐根推进时由HTFBars增量维护，与批量结果一致。
+
+高周期按固定时长划分（分钟到周），周线从周一0点起算；序列开头不完整的第一个高周期视为无效（NaN）。
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+import pandas as pd
+import numpy as np
+
+from .indicator_cache import IndicatorCache, get_indicator_cache
+from .streaming import StreamingIndicator
+
+_NAN = float('nan')
+_ORIGIN_NS = pd.Timestamp('1970-01-05').value  # 周一
+_UNITS = {'m': 'minutes', 'H': 'hours', 'D': 'days', 'W': 'weeks'}
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+
+def timeframe_delta(timeframe: str) -> pd.Timedelta:
+    """
+    周期字符串转时长
+
+    Args:
+        timeframe: OKX写法（1m/15m/1H/4H/1D/1W），也接受pandas写法（如15min、4h）
+    """
+    match = re.fullmatch(r'(\d+)([mHDW])', timeframe)
+    if match:
+        return pd.Timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+    return pd.Timedelta(timeframe)
+
+
+def bars_per_period(timeframe: str, period: str = '1D') -> int:
+    """一个高周期包含的基础K线数（如4H -> 1D为6，15m -> 1D为96），至少为1"""
+    return max(int(timeframe_delta(period) // timeframe_delta(timeframe)), 1)
+
+
+def period_start(timestamps, rule: str) -> np.ndarray:
+    """各时间戳所在高周期的起始时间（datetime64[ns]）"""
+    ts = np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64)
+    step = timeframe_delta(rule).value
+    return ((ts - _ORIGIN_NS) // step * step + _ORIGIN_NS).view('datetime64[ns]')
+
+
+@dataclass
+class ResampledBars:
+    """
+    高周期K线及其与基础K线的对应关系
+
+    Attributes:
+        bars: 高周期OHLCV（timestamp为高周期起始时间，开头不完整的高周期为NaN）
+        group: 每根基础K线所属高周期的行号
+        visible: 每根基础K线收盘时已收盘的高周期K线数
+    """
+    bars: pd.DataFrame
+    group: np.ndarray
+    visible: np.ndarray
+
+    def align(self, values: Union[str, np.ndarray], shift: int = 0) -> np.ndarray:
+        """
+        把高周期序列对齐到基础K线（无未来函数）
+
+        Args:
+            values: 高周期列名或与bars等长的数组（如在高周期上计算的滚动指标）
+            shift: 0为最近一根已收盘的高周期，k为再往前k根
+
+        Returns:
+            与基础K线等长的数组，尚无已收盘高周期时为NaN
+        """
+        values = self.bars[values].to_numpy(dtype=np.float64) if isinstance(values, str) \
+            else np.asarray(values, dtype=np.float64)
+        index = self.visible - 1 - shift
+        out = np.full(len(index), np.nan)
+        valid = index >= 0
+        out[valid] = values[index[valid]]
+        return out
+
+
+def _resample_arrays(timestamps: np.ndarray, columns: Dict[str, np.ndarray], rule: str,
+                     base_timeframe: str) -> Dict[str, np.ndarray]:
+    """按高周期分组聚合（分组边界为起始时间变化处），计算每根基础K线可见的已收盘高周期数"""
+    n = len(timestamps)
+    if n == 0:
+        empty = {name: np.zeros(0) for name in OHLCV}
+        return {'timestamp': np.zeros(0, dtype='datetime64[ns]'), 'group': np.zeros(0, dtype=np.int64),
+                'visible': np.zeros(0, dtype=np.int64), **empty}
+
+    ts = np.asarray(timestamps, dtype='datetime64[ns]')
+    starts = period_start(ts, rule)
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    group = np.cumsum(np.r_[False, starts[1:] != starts[:-1]]).astype(np.int64)
+
+    result = {
+        'timestamp': starts[first],
+        'open': columns['open'][first],
+        'high': np.maximum.reduceat(columns['high'], first),
+        'low': np.minimum.reduceat(columns['low'], first),
+        'close': columns['close'][np.r_[first[1:] - 1, n - 1]],
+        'volume': np.add.reduceat(columns['volume'], first),
+    }
+    if ts[0] != starts[0]:  # 数据从高周期中途开始
+        for name in OHLCV:
+            result[name][0] = np.nan
+
+    # 基础K线收盘时间到达所在高周期的结束时间时，该高周期收盘
+    bar_end = ts + timeframe_delta(base_timeframe).to_timedelta64()
+    period_end = starts + timeframe_delta(rule).to_timedelta64()
+    result['group'] = group
+    result['visible'] = group + (bar_end >= period_end)
+    return result
+
+
+def resample(df: pd.DataFrame, rule: str = '1D', base_timeframe: str = '4H',
+             cache: Optional[IndicatorCache] = None) -> ResampledBars:
+    """
+    把基础K线重采样为高周期K线（结果按数据指纹缓存）
+
+    Args:
+        df: 基础K线（timestamp及OHLCV列，按时间升序，只读）
+        rule: 高周期（如1D、1W、4H）
+        base_timeframe: 基础K线周期
+        cache: 指标缓存（默认全局缓存）
+
+    Returns:
+        ResampledBars
+    """
+    cache = cache or get_indicator_cache()
+    fp = cache.fingerprint(df['timestamp'], *(df[c] for c in OHLCV))
+    computed = {}
+
+    def compute(name: str) -> np.ndarray:
+        if not computed:
+            columns = {c: df[c].to_numpy(dtype=np.float64) for c in OHLCV}
+            computed.update(_resample_arrays(df['timestamp'].to_numpy(), columns, rule, base_timeframe))
+        return computed[name]
+
+    fields = {name: cache.get(fp, 'resample', (rule, base_timeframe, name), lambda name=name: compute(name))
+              for name in ('timestamp', 'group', 'visible') + OHLCV}
+    bars = pd.DataFrame({name: fields[name] for name in ('timestamp',) + OHLCV})
+    return ResampledBars(bars=bars, group=fields['group'], visible=fields['visible'])
+
+
+class HTFBars(StreamingIndicator):
+    """
+    增量维护的高周期K线
+
+    逐根传入基础K线，维护当前未收盘的高周期和最近size根已收盘的高周期，
+    收盘判定与resample()相同
+    """
+
+    _fields = ('rule_ns', 'base_ns', 'size', 'start', 'current', 'completed')
+
+    def __init__(self, rule: str = '1D', base_timeframe: str = '4H', size: int = 1):
+        self.rule_ns = timeframe_delta(rule).value
+        self.base_ns = timeframe_delta(base_timeframe).value
+        self.size = size
+        self.start = None  # 当前高周期起始时间（ns）
+        self.current = None  # 当前高周期 [open, high, low, close, volume]，收盘后为None
+        self.completed = deque(maxlen=size)  # 最近size根已收盘高周期
+
+    def update(self, timestamp, open_: float, high: float, low: float, close: float,
+               volume: float = 0.0) -> int:
+        """
+        推进一根基础K线
+
+        Returns:
+            已收盘的高周期数（最多size）
+        """
+        ts = pd.Timestamp(timestamp).value
+        start = (ts - _ORIGIN_NS) // self.rule_ns * self.rule_ns + _ORIGIN_NS
+        if start != self.start:
+            if self.current is not None:
+                self.completed.append(self.current)
+            # 数据从高周期中途开始时第一个高周期无效
+            valid = self.start is not None or ts == start
+            self.current = [open_, high, low, close, volume] if valid else [_NAN] * 5
+            self.start = start
+        elif self.current is not None and self.current[1] == self.current[1]:
+            bar = self.current
+            bar[1] = max(bar[1], high)
+            bar[2] = min(bar[2], low)
+            bar[3] = close
+            bar[4] += volume
+
+        if self.current is not None and ts + self.base_ns >= start + self.rule_ns:
+            self.completed.append(self.current)
+            self.current = None
+        return len(self.completed)
+
+    def _window(self, field: int) -> list:
+        return [bar[field] for bar in self.completed]
+
+    def highest(self) -> float:
+        """最近size根已收盘高周期的最高价（不足size根或含无效高周期时为NaN）"""
+        highs = self._window(1)
+        if len(highs) < self.size or any(h != h for h in highs):
+            return _NAN
+        return max(highs)
+
+    def lowest(self) -> float:
+        """最近size根已收盘高周期的最低价（不足size根或含无效高周期时为NaN）"""
+        lows = self._window(2)
+        if len(lows) < self.size or any(x != x for x in lows):
+            return _NAN
+        return min(lows)
+
+    @property
+    def value(self) -> float:
+        return self.highest()
+
@@ -0,0 +1,272 @@
+"""
+蒙特卡洛 / 自助法稳健性检验
+基于BacktestEngine的回测结果批量生成重采样的权益路径（路径 × K线 的NumPy矩阵），
+给出收益率、夏普比率和最大回撤的置信区间，用于调整实盘参数前的压力测试
+"""
+
+from typing import Dict, Optional, Sequence
+import pandas as pd
+import numpy as np
+
+from .position_simulator import CommissionModel
+
+
+def path_metrics(returns: np.ndarray, lengths: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    按行向量化计算收益路径的指标（口径与BacktestEngine._calculate_metrics一致）
+
+    Args:
+        returns: 收益率矩阵（路径数 × K线数）
+        lengths: 每条路径的有效K线数（有效部分之前的收益率须为0），None表示整行有效
+
+    Returns:
+        {'total_return', 'sharpe_ratio', 'max_drawdown'}，每个为长度=路径数的数组
+    """
+    n_paths, n_bars = returns.shape
+    if lengths is None:
+        lengths = np.full(n_paths, n_bars)
+
+    cumulative = np.cumprod(1 + returns, axis=1)
+    # 峰值包含起点（净值1），首段即亏损时也计入回撤
+    running_max = np.maximum(np.maximum.accumulate(cumulative, axis=1), 1.0)
+    max_drawdown = ((cumulative - running_max) / running_max).min(axis=1)
+
+    # 有效部分之前的收益率为0，只需按有效长度修正均值和方差
+    mean = returns.sum(axis=1) / lengths
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = ((returns ** 2).sum(axis=1) - lengths * mean ** 2) / (lengths - 1)
+        std = np.sqrt(np.maximum(var, 0))
+        sharpe_ratio = np.where((lengths > 1) & (std > 0), mean / std * np.sqrt(365), 0.0)
+
+    return {
+        'total_return': cumulative[:, -1] - 1,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+    }
+
+
+class MonteCarloRobustness:
+    """
+    回测结果的稳健性检验
+
+    - shuffle_trades：打乱已平仓交易的先后顺序（可选有放回抽样），检验回撤对交易顺序的敏感度；
+      路径按交易计，收益率为每笔交易的资金倍数减1。
+    - block_bootstrap：按固定长度的块有放回地重采样逐K线收益率，保留短期自相关。
+    - random_starts：随机推迟起始K线后重新撮合同一组信号，检验入场时点的影响。
+
+    路径按batch_size分批生成，内存占用与路径总数无关；需要时可返回完整路径矩阵。
+    """
+
+    def __init__(self, engine, n_paths: int = 10000, block_size: int = 20,
+                 percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+                 random_state: Optional[int] = 0, batch_size: int = 1000):
+        """
+        初始化稳健性检验
+
+        Args:
+            engine: 产生回测结果的BacktestEngine（提供初始资金和手续费）
+            n_paths: 重采样路径数
+            block_size: 块自助法的块长度（K线数）
+            percentiles: 置信区间使用的百分位
+            random_state: 随机种子
+            batch_size: 每批生成的路径数
+        """
+        self.engine = engine
+        self.n_paths = n_paths
+        self.block_size = max(1, block_size)
+        self.percentiles = list(percentiles)
+        self.rng = np.random.default_rng(random_state)
+        self.batch_size = max(1, batch_size)
+
+    def run(self, result: Dict, max_offset: Optional[int] = None) -> pd.DataFrame:
+        """
+        依次运行三种检验
+
+        Args:
+            result: BacktestEngine.run_backtest的结果
+            max_offset: random_starts的最大推迟K线数
+
+        Returns:
+            置信区间表（行：检验方法×指标；列：各百分位和原回测值）
+        """
+        bands = [
+            self.shuffle_trades(result)['bands'].assign(method='shuffle_trades'),
+            self.block_bootstrap(result)['bands'].assign(method='block_bootstrap'),
+            self.random_starts(result, max_offset=max_offset)['bands'].assign(method='random_starts'),
+        ]
+        return pd.concat(bands).reset_index().set_index(['method', 'metric'])
+
+    def shuffle_trades(self, result: Dict, replace: bool = False, return_paths: bool = False) -> Dict:
+        """
+        打乱交易顺序
+
+        Args:
+            result: BacktestEngine.run_backtest的结果
+            replace: 是否有放回抽样（False时各路径为同一组交易的不同排列，总收益不变）
+            return_paths: 是否返回权益路径矩阵（路径数 × (交易数+1)）
+
+        Returns:
+            {'total_return', 'sharpe_ratio', 'max_drawdown', 'bands'[, 'paths']}
+        """
+        factors = self._trade_factors(result)
+        actual = path_metrics((factors - 1)[None, :])
+        if len(factors) == 0:
+            return self._summarize({k: np.zeros(self.n_paths) for k in actual}, actual)
+
+        def batch(n):
+            if replace:
+                idx = self.rng.integers(0, len(factors), size=(n, len(factors)))
+            else:
+                idx = np.argsort(self.rng.random((n, len(factors))), axis=1)
+            return factors[idx] - 1, None
+
+        return self._generate(batch, actual, return_paths, prepend_start=True)
+
+    def block_bootstrap(self, result: Dict, return_paths: bool = False) -> Dict:
+        """
+        块自助法重采样逐K线收益率
+
+        Args:
+            result: BacktestEngine.run_backtest的结果
+            return_paths: 是否返回权益路径矩阵（路径数 × K线数）
+
+        Returns:
+            {'total_return', 'sharpe_ratio', 'max_drawdown', 'bands'[, 'paths']}
+        """
+        returns = self._bar_returns(result)
+        n_bars = len(returns)
+        block = min(self.block_size, n_bars)
+        n_blocks = -(-n_bars // block)
+        offsets = np.arange(block)
+
+        def batch(n):
+            starts = self.rng.integers(0, n_bars - block + 1, size=(n, n_blocks))
+            idx = (starts[:, :, None] + offsets).reshape(n, -1)[:, :n_bars]
+            return returns[idx], None
+
+        return self._generate(batch, path_metrics(returns[None, :]), return_paths)
+
+    def random_starts(self, result: Dict, max_offset: Optional[int] = None,
+                      return_paths: bool = False) -> Dict:
+        """
+        随机推迟起始K线后重新撮合
+
+        第k条路径在offset_k（含）之前不交易，与在df.iloc[offset_k:]上回测相同，
+        指标只统计offset_k之后的K线。推迟起步的路径在首次买入b之前空仓，
+        持有到其后第一个卖出信号s，s之后与原回测同为空仓、此后逐K线变化相同，
+        因此权益 = 原回测权益 × (路径在s的现金 / 原回测在s的现金)，无需逐路径重新撮合。
+
+        Args:
+            result: BacktestEngine.run_backtest的结果（data需含signal和close列）
+            max_offset: 最大推迟K线数（默认为K线数的一半）
+            return_paths: 是否返回权益路径矩阵（路径数 × K线数，起始前为初始资金）
+
+        Returns:
+            {'total_return', 'sharpe_ratio', 'max_drawdown', 'offsets', 'bands'[, 'paths']}
+        """
+        data = result['data']
+        signals = data['signal'].to_numpy()
+        prices = data['close'].to_numpy(dtype=np.float64)
+        capital = data['capital'].to_numpy(dtype=np.float64)
+        n_bars = len(prices)
+        max_offset = min(n_bars // 2 if max_offset is None else max_offset, n_bars - 2)
+
+        commission = CommissionModel(rate=self.engine.commission)
+        initial_capital = float(self.engine.initial_capital)
+        next_buy = _next_index(signals == 1)
+        next_sell = _next_index(signals == -1)
+        prices_ext = np.append(prices, np.nan)
+        capital_ext = np.append(capital, np.nan)
+        bars = np.arange(n_bars)
+        all_offsets = []
+
+        def batch(n):
+            offsets = self.rng.integers(0, max_offset + 1, size=n)
+            all_offsets.append(offsets)
+
+            buy = next_buy[offsets + 1]  # 首次买入（无则为n_bars）
+            sell = next_sell[np.minimum(buy + 1, n_bars)]  # 其后第一个卖出
+            amount = commission.buy_amount(initial_capital, prices_ext[buy])
+            with np.errstate(invalid='ignore'):
+                scale = commission.sell_value(amount, prices_ext[sell]) / capital_ext[sell]
+
+            t = bars[None, :]
+            paths = np.where(
+                t < buy[:, None], initial_capital,
+                np.where(t < sell[:, None], amount[:, None] * prices, capital * scale[:, None])
+            )
+            returns = np.zeros_like(paths)
+            returns[:, 1:] = paths[:, 1:] / paths[:, :-1] - 1
+            return returns, n_bars - offsets
+
+        summary = self._generate(batch, path_metrics(self._bar_returns(result)[None, :]), return_paths)
+        summary['offsets'] = np.concatenate(all_offsets)
+        return summary
+
+    def _generate(self, batch, actual: Dict[str, np.ndarray], return_paths: bool,
+                  prepend_start: bool = False) -> Dict:
+        """
+        分批生成路径并汇总指标
+
+        Args:
+            batch: 生成n条路径的函数，返回(收益率矩阵, 有效长度或None)
+            actual: 原回测的指标
+            return_paths: 是否拼接返回权益路径矩阵
+            prepend_start: 权益路径前是否补上初始资金（按交易计的路径）
+        """
+        metrics = {name: [] for name in actual}
+        paths = []
+        remaining = self.n_paths
+        while remaining > 0:
+            n = min(self.batch_size, remaining)
+            returns, lengths = batch(n)
+            for name, values in path_metrics(returns, lengths).items():
+                metrics[name].append(values)
+            if return_paths:
+                equity = self.engine.initial_capital * np.cumprod(1 + returns, axis=1)
+                if prepend_start:
+                    equity = np.hstack([np.full((n, 1), float(self.engine.initial_capital)), equity])
+                paths.append(equity)
+            remaining -= n
+
+        summary = self._summarize({name: np.concatenate(values) for name, values in metrics.items()}, actual)
+        if return_paths:
+            summary['paths'] = np.concatenate(paths)
+        return summary
+
+    def _summarize(self, samples: Dict[str, np.ndarray], actual: Dict[str, np.ndarray]) -> Dict:
+        """计算各指标的百分位区间"""
+        rows = {}
+        for name, values in samples.items():
+            row = dict(zip([f'p{p:g}' for p in self.percentiles],
+                           np.percentile(values, self.percentiles)))
+            row['mean'] = float(values.mean())
+            row['actual'] = float(actual[name][0])
+            rows[name] = row
+
+        summary = dict(samples)
+        summary['bands'] = pd.DataFrame.from_dict(rows, orient='index').rename_axis('metric')
+        return summary
+
+    def _bar_returns(self, result: Dict) -> np.ndarray:
+        """回测结果的逐K线收益率（首根为0）"""
+        capital = result['data']['capital'].to_numpy(dtype=np.float64)
+        returns = np.zeros_like(capital)
+        returns[1:] = capital[1:] / capital[:-1] - 1
+        return returns
+
+    def _trade_factors(self, result: Dict) -> np.ndarray:
+        """每笔已平仓交易的资金倍数：卖出后权益 / 买入前权益"""
+        trades = result['trades']
+        capital = result['data']['capital'].to_numpy(dtype=np.float64)
+        buys = trades['index'][trades['side'] == 1]
+        sells = trades['index'][trades['side'] == -1]
+        buys = buys[:len(sells)]
+        return capital[sells] / capital[buys - 1]
+
+
+def _next_index(mask: np.ndarray) -> np.ndarray:
+    """每个位置i之后（含i）第一个mask为True的位置，无则为len(mask)；长度为len(mask)+1"""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.append(np.minimum.accumulate(idx[::-1])[::-1], n)
@@ -4,7 +4,9 @@ RSI（相对强弱指标）策略
 """
 
 import pandas as pd
-from .strategy_base import BaseStrategy
+from .strategy_base import BaseStrategy, Feature
+from .indicator_cache import get_indicator_cache, indicators
+from .streaming import RollingMean, safe_divide
 
 
 class RSIStrategy(BaseStrategy):
@@ -25,40 +27,69 @@ class RSIStrategy(BaseStrategy):
         
         super().__init__(name="RSI策略", params=default_params)
     
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_rsi(self, close: pd.Series, period: int) -> pd.Series:
+        """计算RSI（相同收盘价和周期的结果取自指标缓存）"""
+        cache = get_indicator_cache()
+        values = cache.get(cache.fingerprint(close), 'rsi', period, lambda: indicators.rsi(close, period))
+        return pd.Series(values, index=close.index)
+    
+    def compute_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         生成RSI交易信号
         
         Args:
-            df: K线数据
+            df: K线数据（只读）
             
         Returns:
-            添加了signal列的DataFrame
+            新增列DataFrame（rsi, signal）
         """
-        df = df.copy()
+        signals = pd.DataFrame(index=df.index)
         
         # 计算RSI
         rsi_period = self.params['rsi_period']
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
+        signals['rsi'] = self._calculate_rsi(df['close'], rsi_period)
         
         # 生成信号
-        df['signal'] = 0
+        signals['signal'] = 0
         
         oversold = self.params['oversold_threshold']
         overbought = self.params['overbought_threshold']
         
         # 超卖买入
-        df.loc[df['rsi'] < oversold, 'signal'] = 1
+        signals.loc[signals['rsi'] < oversold, 'signal'] = 1
         
         # 超买卖出
-        df.loc[df['rsi'] > overbought, 'signal'] = -1
+        signals.loc[signals['rsi'] > overbought, 'signal'] = -1
         
-        return df
+        return signals
     
+    def required_lookback(self) -> int:
+        """RSI窗口内的涨跌幅需要再往前一根收盘价"""
+        return self.params['rsi_period']
+
+    def required_features(self) -> list:
+        return [Feature('rsi', self.params['rsi_period'])]
+
+    def _init_stream(self) -> dict:
+        period = self.params['rsi_period']
+        return {'prev_close': float('nan'), 'gain': RollingMean(period), 'loss': RollingMean(period)}
+
+    def _step(self, stream: dict, bar) -> int:
+        """逐K线更新RSI（与_calculate_rsi相同：首根涨跌幅计为0）"""
+        close = float(bar['close'])
+        delta = close - stream['prev_close']
+        stream['prev_close'] = close
+        gain = stream['gain'].update(delta if delta > 0 else 0.0)
+        loss = stream['loss'].update(-delta if delta < 0 else 0.0)
+        rsi = 100 - 100 / (1 + safe_divide(gain, loss))
+
+        signal = 0
+        if rsi < self.params['oversold_threshold']:
+            signal = 1
+        if rsi > self.params['overbought_threshold']:
+            signal = -1
+        return signal
+
     def get_strategy_description(self) -> str:
         return f"""
 ## RSI超买超卖策略
@@ -4,13 +4,38 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple
+import itertools
+import math
+from typing import Dict, List, Mapping, Optional, Tuple
 import pandas as pd
 import numpy as np
 
+from .position_simulator import simulate_positions
+from .streaming import encode_state, decode_state
+from .feature_graph import Feature, HLC
+
+# EMA初值的残余权重低于此值时视为已收敛（计算required_lookback用）
+EMA_SETTLE_TOLERANCE = 1e-4
+
+
+def ema_settle_bars(span: int, tolerance: float = EMA_SETTLE_TOLERANCE) -> int:
+    """
+    EMA（adjust=False）需要多少根K线才能忘掉初值
+
+    初值的权重每根K线乘以 (1 - alpha)，alpha = 2 / (span + 1)，
+    返回使 (1 - alpha)^k <= tolerance 的最小k
+    """
+    if span <= 1:
+        return 0
+    return math.ceil(math.log(tolerance) / math.log(1 - 2 / (span + 1)))
+
 
 class BaseStrategy(ABC):
     """策略基类"""
+
+    # 信号依赖跨K线的持仓状态机（入场价、止损等）时为True：尾部计算无法还原尾部之前开出的持仓，
+    # latest_signals对这类策略在完整历史上计算
+    stateful = False
     
     def __init__(self, name: str, params: Dict = None):
         """
@@ -23,8 +48,47 @@ class BaseStrategy(ABC):
         self.name = name
         self.params = params or {}
         self.signals = []  # 交易信号历史
+        self._stream = None  # step()的流式状态
         
-    @abstractmethod
+    def compute_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        计算交易信号（只返回新增列）
+
+        df视为只读的K线视图，实现中不应修改或复制它；返回与df同索引、
+        只包含signal及诊断列（指标、入场价等）的新DataFrame，由调用方决定是否与K线拼接。
+
+        Args:
+            df: K线数据DataFrame，必须包含 timestamp, open, high, low, close, volume
+
+        Returns:
+            新增列DataFrame，signal列1=买入，-1=卖出，0=持有
+        """
+        # 兼容只实现了generate_signals的旧策略
+        if type(self).generate_signals is BaseStrategy.generate_signals:
+            raise NotImplementedError(f"{type(self).__name__} 需要实现 compute_signals")
+        full = self.generate_signals(df)
+        return full[[col for col in full.columns if col not in df.columns or col == 'signal']]
+
+    @staticmethod
+    def lean_signals(signals: pd.DataFrame, keep_diagnostics: bool = False) -> pd.DataFrame:
+        """
+        精简compute_signals的结果（用于精简回测模式）
+
+        Args:
+            signals: compute_signals返回的新增列
+            keep_diagnostics: False时只保留signal列；True时保留诊断列，float64列降为float32
+
+        Returns:
+            signal列为int8的新DataFrame
+        """
+        columns = {'signal': signals['signal'].to_numpy(dtype=np.int8)}
+        if keep_diagnostics:
+            for col in signals.columns:
+                if col != 'signal':
+                    values = signals[col].to_numpy()
+                    columns[col] = values.astype(np.float32) if values.dtype == np.float64 else values
+        return pd.DataFrame(columns, index=signals.index, copy=False)
+
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         生成交易信号
@@ -33,10 +97,120 @@ class BaseStrategy(ABC):
             df: K线数据DataFrame，必须包含 timestamp, open, high, low, close, volume
             
         Returns:
-            添加了signal列的DataFrame，1=买入，-1=卖出，0=持有
+            添加了signal列的DataFrame（K线数据的副本），1=买入，-1=卖出，0=持有
         """
-        pass
+        return df.assign(**self.compute_signals(df))
     
+    def required_lookback(self) -> Optional[int]:
+        """
+        计算某根K线的信号之前需要的历史K线数（预热期，由参数决定）
+
+        在「lookback根历史 + 目标K线」上调用compute_signals，目标K线的信号与在完整历史上计算相同：
+        滚动窗口类指标精确一致；EMA类指标按初值残余权重低于EMA_SETTLE_TOLERANCE计算预热期。
+        带持仓状态机的策略（stateful）以此作为加载数据的长度，尾部计算时不按它截取（见tail_lookback）。
+
+        Returns:
+            预热K线数；None表示需要完整历史（未声明预热期的策略）
+        """
+        return None
+
+    def required_features(self) -> List[Feature]:
+        """
+        声明compute_signals从指标缓存读取的特征（由参数决定）
+
+        同一轮中多个策略的特征由FeatureGraph去重后统一计算，未声明的特征仍由策略自行计算
+
+        Returns:
+            Feature列表
+        """
+        return []
+
+    def tail_lookback(self) -> Optional[int]:
+        """
+        尾部计算时保留的历史K线数
+
+        Returns:
+            required_lookback()；带持仓状态机的策略为None（完整历史，尾部起点的空仓状态与实际持仓可能不同）
+        """
+        return None if self.stateful else self.required_lookback()
+
+    def latest_signals(self, df: pd.DataFrame, bars: int = 1) -> pd.Series:
+        """
+        尾部计算：只在最后 tail_lookback() + bars 根K线上计算信号
+
+        用于查询最新信号等只关心末尾几根K线的场景，无状态策略的计算量与历史总长度无关；
+        带持仓状态机的策略在传入的全部K线上计算，与compute_signals一致。
+
+        Args:
+            df: K线数据（只读，按时间升序）
+            bars: 需要信号的末尾K线数
+
+        Returns:
+            最后bars根K线的signal（索引与df相同）
+        """
+        lookback = self.tail_lookback()
+        if lookback is not None and len(df) > lookback + bars:
+            df = df.iloc[len(df) - lookback - bars:]
+        return self.compute_signals(df)['signal'].iloc[max(len(df) - bars, 0):]
+
+    def step(self, bar: Mapping) -> int:
+        """
+        逐根推进一根新K线，返回该K线的信号
+
+        指标以流式方式O(1)更新，不必每次在整段历史上重算。从策略创建（或reset_stream）后
+        第i次调用的返回值，与在前i+1根K线上调用compute_signals得到的最后一个signal相同。
+
+        Args:
+            bar: 单根K线（dict或DataFrame的一行），包含 open, high, low, close, volume
+
+        Returns:
+            1=买入，-1=卖出，0=持有
+        """
+        if self._stream is None:
+            self._stream = self._init_stream()
+        return int(self._step(self._stream, bar))
+
+    @classmethod
+    def supports_step(cls) -> bool:
+        """是否支持逐K线step()（实现了_init_stream和_step）"""
+        return cls._init_stream is not BaseStrategy._init_stream
+
+    def reset_stream(self):
+        """丢弃流式状态（修改参数后需调用），下一次step()从头开始"""
+        self._stream = None
+
+    def stream_snapshot(self) -> Dict:
+        """
+        导出step()的流式状态
+
+        Returns:
+            可JSON序列化的状态字典
+        """
+        return {
+            'params': dict(self.params),
+            'stream': encode_state(self._stream) if self._stream is not None else None,
+        }
+
+    def restore_stream(self, snapshot: Dict):
+        """
+        从stream_snapshot()导出的状态恢复，之后的step()从快照处继续
+
+        Args:
+            snapshot: 状态字典（策略参数应与快照一致）
+        """
+        if snapshot['params'] != self.params:
+            raise ValueError(f"{self.name} 的参数与快照不一致")
+        stream = snapshot['stream']
+        self._stream = decode_state(stream) if stream is not None else None
+
+    def _init_stream(self) -> Dict:
+        """创建流式状态（流式指标对象及状态机变量），支持step()的策略需实现"""
+        raise NotImplementedError(f"{type(self).__name__} 不支持逐K线step()")
+
+    def _step(self, stream: Dict, bar: Mapping) -> int:
+        """用一根新K线更新流式状态并返回信号，支持step()的策略需实现"""
+        raise NotImplementedError(f"{type(self).__name__} 不支持逐K线step()")
+
     @abstractmethod
     def get_strategy_description(self) -> str:
         """
@@ -59,74 +233,62 @@ class BaseStrategy(ABC):
             添加了position、capital、returns列的DataFrame
         """
         df = df.copy()
-        df['position'] = 0.0  # 当前持仓（币的数量）
-        df['capital'] = initial_capital  # 当前资金
-        df['cash'] = initial_capital  # 现金
-        df['holdings'] = 0.0  # 持仓市值
-        
-        position = 0.0
-        cash = initial_capital
-        
-        for i in range(1, len(df)):
-            signal = df.iloc[i]['signal']
-            price = df.iloc[i]['close']
-            
-            # 买入信号且无持仓
-            if signal == 1 and position == 0:
-                position = cash / price * 0.99  # 99%资金买入（留1%手续费）
-                cash = 0
-                
-            # 卖出信号且有持仓
-            elif signal == -1 and position > 0:
-                cash = position * price * 0.99  # 99%卖出价值（扣1%手续费）
-                position = 0
-            
-            df.iloc[i, df.columns.get_loc('position')] = position
-            df.iloc[i, df.columns.get_loc('cash')] = cash
-            df.iloc[i, df.columns.get_loc('holdings')] = position * price
-            df.iloc[i, df.columns.get_loc('capital')] = cash + position * price
-        
+        # 99%资金买入/卖出（扣1%手续费）
+        sim = simulate_positions(
+            df['signal'].to_numpy(),
+            df['close'].to_numpy(dtype=np.float64),
+            commission=0.01,
+            initial_capital=initial_capital,
+            start=1,
+        )
+
+        df['position'] = sim.position  # 当前持仓（币的数量）
+        df['capital'] = sim.capital  # 当前资金
+        df['cash'] = sim.cash  # 现金
+        df['holdings'] = sim.holdings  # 持仓市值
+
         # 计算收益率
         df['returns'] = df['capital'].pct_change().fillna(0)
         
         return df
     
-    def optimize_params(self, df: pd.DataFrame, param_grid: Dict) -> Tuple[Dict, float]:
+    def optimize_params(self, df: pd.DataFrame, param_grid: Dict,
+                        workers: int = 1, search: str = 'grid') -> Tuple[Dict, float]:
         """
         网格搜索优化参数
         
         Args:
             df: K线数据
             param_grid: 参数网格，如 {'rsi_period': [7, 14, 21], 'threshold': [30, 40]}
+            workers: 并行进程数（大于1时使用ParallelOptimizer，仅search='grid'）
+            search: 'grid'穷举网格；'halving'/'hyperband'使用SuccessiveHalvingSearch按预算搜索
             
         Returns:
             (最佳参数字典, 最佳夏普比率)
         """
-        best_sharpe = -np.inf
-        best_params = None
-        
-        # 生成所有参数组合
-        keys = list(param_grid.keys())
-        values = list(param_grid.values())
-        
-        import itertools
-        for combo in itertools.product(*values):
-            params = dict(zip(keys, combo))
-            self.params = params
-            
-            # 生成信号并计算收益
-            df_test = self.generate_signals(df.copy())
-            df_test = self.calculate_positions(df_test)
-            
-            # 计算夏普比率
-            sharpe = self._calculate_sharpe(df_test['returns'])
-            
-            if sharpe > best_sharpe:
-                best_sharpe = sharpe
-                best_params = params.copy()
-        
-        return best_params, best_sharpe
-    
+        if search != 'grid':
+            from .successive_halving import SuccessiveHalvingSearch
+
+            searcher = SuccessiveHalvingSearch(metric='sharpe_ratio', mode=search,
+                                               initial_capital=10000, commission=0.01)
+            return searcher.optimize(type(self), df, param_grid)
+
+        # 所有参数组合通过信号矩阵批量回测（99%资金买入/卖出，扣1%手续费）
+        from .parallel_optimizer import ParallelOptimizer, select_best
+
+        if workers > 1:
+            optimizer = ParallelOptimizer(max_workers=workers, initial_capital=10000, commission=0.01)
+            grid = optimizer.run(type(self), df, param_grid)
+        else:
+            from .backtest_engine import BacktestEngine
+
+            engine = BacktestEngine(initial_capital=10000, commission=0.01)
+            grid = engine.run_grid(type(self), df, param_grid)
+
+        # 网格结果按itertools.product的顺序排列
+        combos = [dict(zip(param_grid.keys(), combo)) for combo in itertools.product(*param_grid.values())]
+        return select_best(grid, combos, 'sharpe_ratio')
+
     def _calculate_sharpe(self, returns: pd.Series) -> float:
         """
         计算夏普比率
@@ -0,0 +1,406 @@
+"""
+流式指标
+逐根K线推进、每根O(1)更新的指标对象，用于实盘只需要最新值的场景（不必每次在整段K线上重算），
+状态可导出为JSON并恢复；预热完成后的取值与pandas批量计算一致（滚动和类指标在浮点舍入误差内）
+"""
+
+import math
+from collections import deque
+from typing import Dict, Optional
+import numpy as np
+
+_NAN = float('nan')
+_REGISTRY: Dict[str, type] = {}
+
+
+class StreamingIndicator:
+    """
+    流式指标基类
+
+    子类实现update(...)返回最新值，并在_fields中列出需要导出的属性（包括构造参数）。
+    snapshot()导出可JSON序列化的状态，restore_indicator()按类型恢复。
+    """
+
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _REGISTRY[cls.__name__] = cls
+
+    value = _NAN
+
+    @property
+    def ready(self) -> bool:
+        """是否已有有效值"""
+        return not math.isnan(self.value)
+
+    def snapshot(self) -> Dict:
+        """导出状态"""
+        state = {'type': type(self).__name__}
+        for name in self._fields:
+            state[name] = encode_state(getattr(self, name))
+        return state
+
+    @classmethod
+    def restore(cls, snapshot: Dict) -> "StreamingIndicator":
+        """从snapshot()导出的状态恢复"""
+        indicator = cls.__new__(cls)
+        for name in cls._fields:
+            setattr(indicator, name, decode_state(snapshot[name]))
+        return indicator
+
+
+def restore_indicator(snapshot: Dict) -> StreamingIndicator:
+    """按snapshot中的类型恢复任意流式指标"""
+    return _REGISTRY[snapshot['type']].restore(snapshot)
+
+
+def encode_state(value):
+    """把流式指标及其容器（dict/list/deque/数组）编码为可JSON序列化的结构"""
+    if isinstance(value, StreamingIndicator):
+        return {'__indicator__': value.snapshot()}
+    if isinstance(value, deque):
+        return {'__deque__': [encode_state(v) for v in value], 'maxlen': value.maxlen}
+    if isinstance(value, np.ndarray):
+        return {'__array__': value.tolist(), 'dtype': str(value.dtype)}
+    if isinstance(value, (list, tuple)):
+        return [encode_state(v) for v in value]
+    if isinstance(value, dict):
+        return {k: encode_state(v) for k, v in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def decode_state(value):
+    """encode_state的逆操作"""
+    if isinstance(value, dict):
+        if '__indicator__' in value:
+            return restore_indicator(value['__indicator__'])
+        if '__deque__' in value:
+            return deque([decode_state(v) for v in value['__deque__']], maxlen=value['maxlen'])
+        if '__array__' in value:
+            return np.array(value['__array__'], dtype=value['dtype'])
+        return {k: decode_state(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [decode_state(v) for v in value]
+    return value
+
+
+def _isnan(x: float) -> bool:
+    return x != x
+
+
+class RollingMean(StreamingIndicator):
+    """
+    滚动均值（同 Series.rolling(window).mean()：窗口未满或含NaN时为NaN）
+
+    和值随加入/移出增量维护，每window次更新用math.fsum对窗口重新求和一次消除累积误差（均摊O(1)）。
+    """
+
+    _fields = ('window', 'values', 'total', 'nan_count', 'since_refresh', 'value')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.nan_count = 0
+        self.since_refresh = 0
+        self.value = _NAN
+
+    def update(self, x: float) -> float:
+        self.values.append(x)
+        if _isnan(x):
+            self.nan_count += 1
+        else:
+            self.total += x
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if _isnan(old):
+                self.nan_count -= 1
+            else:
+                self.total -= old
+
+        self.since_refresh += 1
+        if self.since_refresh >= self.window:
+            self.total = math.fsum(v for v in self.values if not _isnan(v))
+            self.since_refresh = 0
+
+        if len(self.values) == self.window and self.nan_count == 0:
+            self.value = self.total / self.window
+        else:
+            self.value = _NAN
+        return self.value
+
+
+class RollingStd(StreamingIndicator):
+    """
+    滚动标准差（同 Series.rolling(window).std(ddof)）
+
+    用Welford算法增量加入/移出，每window次更新按两遍法重算一次；
+    窗口内数值全部相同时与pandas一样返回0。
+    """
+
+    _fields = ('window', 'ddof', 'values', 'count', 'mean', 'm2', 'nan_count',
+               'same_count', 'since_refresh', 'value')
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque()
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.nan_count = 0
+        self.same_count = 0  # 末尾连续相同值的个数
+        self.since_refresh = 0
+        self.value = _NAN
+
+    def _add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, x: float):
+        self.count -= 1
+        if self.count == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (x - self.mean)
+
+    def update(self, x: float) -> float:
+        previous = self.values[-1] if self.values else _NAN
+        self.values.append(x)
+        self.same_count = self.same_count + 1 if x == previous else 1
+        if _isnan(x):
+            self.nan_count += 1
+        else:
+            self._add(x)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if _isnan(old):
+                self.nan_count -= 1
+            else:
+                self._remove(old)
+
+        self.since_refresh += 1
+        if self.since_refresh >= self.window:
+            valid = [v for v in self.values if not _isnan(v)]
+            self.count = len(valid)
+            self.mean = math.fsum(valid) / self.count if valid else 0.0
+            self.m2 = math.fsum((v - self.mean) ** 2 for v in valid)
+            self.since_refresh = 0
+
+        if len(self.values) == self.window and self.nan_count == 0 and self.count > self.ddof:
+            if self.same_count >= self.window:
+                self.value = 0.0
+            else:
+                self.value = math.sqrt(max(self.m2, 0.0) / (self.count - self.ddof))
+        else:
+            self.value = _NAN
+        return self.value
+
+
+class EWM(StreamingIndicator):
+    """
+    指数加权均值（同 Series.ewm(alpha=..., adjust=False).mean()，逐位一致）
+
+    span、alpha二选一；wilder(period)为Wilder平滑（alpha = 1/period）。
+    """
+
+    _fields = ('alpha', 'old_weight', 'value')
+
+    def __init__(self, span: Optional[float] = None, alpha: Optional[float] = None):
+        if (span is None) == (alpha is None):
+            raise ValueError("span和alpha需且只需指定一个")
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+        self.old_weight = 1.0
+        self.value = _NAN
+
+    @classmethod
+    def wilder(cls, period: int) -> "EWM":
+        return cls(alpha=1.0 / period)
+
+    def update(self, x: float) -> float:
+        # 与pandas ewm(adjust=False, ignore_na=False)的递推相同
+        if not _isnan(self.value):
+            self.old_weight *= 1.0 - self.alpha
+            if not _isnan(x):
+                if self.value != x:
+                    self.value = (self.old_weight * self.value + self.alpha * x) / (self.old_weight + self.alpha)
+                self.old_weight = 1.0
+        elif not _isnan(x):
+            self.value = x
+        return self.value
+
+
+class TrueRange(StreamingIndicator):
+    """真实波幅 max(High - Low, |High - Close_prev|, |Low - Close_prev|)，首根为High - Low"""
+
+    _fields = ('prev_close', 'value')
+
+    def __init__(self):
+        self.prev_close = _NAN
+        self.value = _NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        value = high - low
+        if not _isnan(self.prev_close):
+            value = max(value, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.value = value
+        return value
+
+
+class ATR(StreamingIndicator):
+    """ATR（真实波幅的EMA，与IndicatorCache.atr口径相同；wilder=True时为Wilder平滑）"""
+
+    _fields = ('true_range', 'average', 'value')
+
+    def __init__(self, period: int, wilder: bool = False):
+        self.true_range = TrueRange()
+        self.average = EWM.wilder(period) if wilder else EWM(span=period)
+        self.value = _NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value = self.average.update(self.true_range.update(high, low, close))
+        return self.value
+
+
+class _RollingExtreme(StreamingIndicator):
+    """单调队列维护的滚动极值（窗口未满或含NaN时为NaN）"""
+
+    _fields = ('window', 'count', 'candidates', 'nan_positions', 'value')
+    _is_max = True
+
+    def __init__(self, window: int):
+        self.window = window
+        self.count = 0
+        self.candidates = deque()  # [位置, 值]，值单调（最大值时递减）
+        self.nan_positions = deque()
+        self.value = _NAN
+
+    def update(self, x: float) -> float:
+        i = self.count
+        self.count += 1
+        if _isnan(x):
+            self.nan_positions.append(i)
+        else:
+            if self._is_max:
+                while self.candidates and self.candidates[-1][1] <= x:
+                    self.candidates.pop()
+            else:
+                while self.candidates and self.candidates[-1][1] >= x:
+                    self.candidates.pop()
+            self.candidates.append([i, x])
+
+        oldest = i - self.window + 1
+        while self.candidates and self.candidates[0][0] < oldest:
+            self.candidates.popleft()
+        while self.nan_positions and self.nan_positions[0] < oldest:
+            self.nan_positions.popleft()
+
+        if self.count >= self.window and not self.nan_positions and self.candidates:
+            self.value = self.candidates[0][1]
+        else:
+            self.value = _NAN
+        return self.value
+
+
+class RollingMax(_RollingExtreme):
+    """滚动最大值（同 Series.rolling(window).max()）"""
+    _is_max = True
+
+
+class RollingMin(_RollingExtreme):
+    """滚动最小值（同 Series.rolling(window).min()）"""
+    _is_max = False
+
+
+class RollingRegression(StreamingIndicator):
+    """
+    滚动线性回归（窗口内横坐标取0..window-1）
+
+    value为回归线在窗口最后一根的值（与TrendBreakoutStrategy._calculate_linear_regression相同），
+    slope为斜率。窗口内 sum_y、sum_xy 增量维护：窗口右移时每个点的横坐标减1，
+    sum_xy 减去移出后剩余的 sum_y，再加上新点的 (window-1)·y；每window次更新重算一次。
+    """
+
+    _fields = ('window', 'values', 'sum_y', 'sum_xy', 'nan_count', 'since_refresh', 'slope', 'value')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.nan_count = 0
+        self.since_refresh = 0
+        self.slope = _NAN
+        self.value = _NAN
+
+    def update(self, y: float) -> float:
+        n = self.window
+        if _isnan(y):
+            self.nan_count += 1
+        if len(self.values) == n:
+            old = self.values.popleft()
+            if _isnan(old):
+                self.nan_count -= 1
+            else:
+                self.sum_y -= old
+            self.sum_xy -= self.sum_y  # 剩余点的横坐标各减1
+        x = len(self.values)
+        self.values.append(y)
+        if not _isnan(y):
+            self.sum_y += y
+            self.sum_xy += x * y
+
+        self.since_refresh += 1
+        if self.since_refresh >= n:
+            valid = [(k, v) for k, v in enumerate(self.values) if not _isnan(v)]
+            self.sum_y = math.fsum(v for _, v in valid)
+            self.sum_xy = math.fsum(k * v for k, v in valid)
+            self.since_refresh = 0
+
+        if len(self.values) == n and self.nan_count == 0:
+            x_mean = (n - 1) / 2
+            sxx = n * (n * n - 1) / 12
+            self.slope = (self.sum_xy - x_mean * self.sum_y) / sxx if sxx else _NAN
+            self.value = self.sum_y / n + self.slope * (n - 1 - x_mean)
+        else:
+            self.slope = _NAN
+            self.value = _NAN
+        return self.value
+
+
+class History(StreamingIndicator):
+    """最近若干个值（ago(k)取k根之前的值，不足时为NaN），用于策略中的 X[k] 回溯引用"""
+
+    _fields = ('values',)
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size + 1)
+
+    @property
+    def value(self) -> float:
+        return self.values[-1] if self.values else _NAN
+
+    def update(self, x: float) -> float:
+        self.values.append(x)
+        return x
+
+    def ago(self, k: int) -> float:
+        return self.values[-1 - k] if k < len(self.values) else _NAN
+
+
+def safe_divide(a: float, b: float) -> float:
+    """与NumPy浮点除法相同的除零结果（±inf或NaN），不抛异常"""
+    if b == 0:
+        if _isnan(a) or a == 0:
+            return _NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
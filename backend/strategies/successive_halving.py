@@ -0,0 +1,161 @@
+"""
+逐轮减半（Successive Halving / Hyperband）参数搜索
+先在较短的近期K线上评估大量参数组合，只把表现最好的一部分晋级到更长的区间，
+用远少于穷举网格的计算量找到接近最优的参数
+"""
+
+import itertools
+import math
+from typing import Dict, List, Optional, Tuple, Union
+import pandas as pd
+import numpy as np
+
+from .backtest_engine import BacktestEngine
+
+
+class SuccessiveHalvingSearch:
+    """
+    预算受限的参数搜索
+
+    - halving：所有组合先在最近min_bars根K线上回测，按metric保留前1/eta晋级，
+      下一轮区间扩大eta倍，直到最后一轮在完整K线上回测剩余组合。
+    - hyperband：依次运行多个起始区间不同的逐轮减半（bracket），
+      起始区间越短的bracket随机抽取越多的组合，兼顾“广撒网”和“少量组合充分评估”。
+
+    每轮通过BacktestEngine.run_grid批量回测，metric可以是其指标表中的任意一列（越大越好）；
+    最佳参数只在完整K线上的结果中选出。
+    """
+
+    def __init__(self, metric: str = 'sharpe_ratio', eta: int = 3, min_bars: int = 200,
+                 mode: str = 'halving', random_state: Optional[int] = 0,
+                 initial_capital: float = 10000, commission: float = 0.001):
+        """
+        初始化搜索器
+
+        Args:
+            metric: 优化目标（BacktestEngine指标名，越大越好）
+            eta: 每轮淘汰比例的倒数（保留前1/eta），也是区间增长倍数
+            min_bars: 第一轮使用的K线数
+            mode: 'halving' 或 'hyperband'
+            random_state: hyperband抽样组合的随机种子
+            initial_capital: 初始资金
+            commission: 手续费率
+        """
+        if eta < 2:
+            raise ValueError("eta至少为2")
+        if mode not in ('halving', 'hyperband'):
+            raise ValueError(f"未知的搜索模式: {mode}")
+        self.metric = metric
+        self.eta = eta
+        self.min_bars = min_bars
+        self.mode = mode
+        self.random_state = random_state
+        self.engine = BacktestEngine(initial_capital=initial_capital, commission=commission)
+
+    def search(self, strategy_cls, df: pd.DataFrame, param_grid: Union[Dict, List[Dict]]) -> Dict:
+        """
+        运行搜索
+
+        Args:
+            strategy_cls: 策略类（BaseStrategy子类）
+            df: K线数据
+            param_grid: 参数网格或参数字典列表
+
+        Returns:
+            {
+                'best_params': 最佳参数字典（无有效结果时为None）,
+                'best_score': 完整K线上的最佳指标值,
+                'evaluations': 每次评估一行的DataFrame（bracket、rung、K线数、参数、指标）,
+                'n_evaluations': 评估的（组合, 区间）次数,
+                'budget_ratio': 回测K线总数 / 穷举网格所需K线总数,
+            }
+        """
+        if isinstance(param_grid, dict):
+            keys = list(param_grid.keys())
+            combos = [dict(zip(keys, combo)) for combo in itertools.product(*param_grid.values())]
+        else:
+            combos = list(param_grid)
+
+        df = df.reset_index(drop=True)
+        n_bars = len(df)
+        self._scores: Dict[Tuple[int, int], float] = {}  # (组合序号, K线数) -> 指标
+        records = []
+
+        if self.mode == 'halving':
+            self._run_bracket(strategy_cls, df, combos, list(range(len(combos))),
+                              self._budgets(n_bars, len(combos)), 0, records)
+        else:
+            rng = np.random.default_rng(self.random_state)
+            s_max = max(int(math.log(max(n_bars / self.min_bars, 1), self.eta)), 0)
+            for bracket, s in enumerate(range(s_max, -1, -1)):
+                n = min(len(combos), int(math.ceil((s_max + 1) / (s + 1) * self.eta ** s)))
+                candidates = sorted(rng.choice(len(combos), size=n, replace=False).tolist())
+                budgets = [max(int(n_bars / self.eta ** i), 2) for i in range(s, -1, -1)]
+                self._run_bracket(strategy_cls, df, combos, candidates, budgets, bracket, records)
+
+        evaluations = pd.DataFrame(records)
+        full = evaluations[evaluations['bars'] == n_bars] if not evaluations.empty else evaluations
+        scores = full[self.metric].to_numpy(dtype=np.float64) if not full.empty else np.array([])
+
+        best_params, best_score = None, -np.inf
+        if len(scores) and not np.isnan(scores).all():
+            best = int(np.nanargmax(scores))
+            best_params = combos[int(full['combo'].iloc[best])]
+            best_score = float(scores[best])
+
+        evaluated_bars = sum(bars for _, bars in self._scores)
+        return {
+            'best_params': best_params,
+            'best_score': best_score,
+            'evaluations': evaluations,
+            'n_evaluations': len(self._scores),
+            'budget_ratio': evaluated_bars / (n_bars * len(combos)) if combos else 0.0,
+        }
+
+    def optimize(self, strategy_cls, df: pd.DataFrame,
+                 param_grid: Union[Dict, List[Dict]]) -> Tuple[Optional[Dict], float]:
+        """
+        搜索最佳参数
+
+        Returns:
+            (最佳参数字典, 最佳指标值)
+        """
+        result = self.search(strategy_cls, df, param_grid)
+        return result['best_params'], result['best_score']
+
+    def _budgets(self, n_bars: int, n_combos: int) -> List[int]:
+        """逐轮减半各轮的K线数：从min_bars按eta倍增长，最后一轮为完整K线"""
+        rounds = 1
+        while (self.min_bars * self.eta ** rounds < n_bars
+               and math.ceil(n_combos / self.eta ** rounds) > 1):
+            rounds += 1
+        budgets = [min(self.min_bars * self.eta ** i, n_bars) for i in range(rounds - 1)]
+        return budgets + [n_bars]
+
+    def _run_bracket(self, strategy_cls, df: pd.DataFrame, combos: List[Dict], candidates: List[int],
+                     budgets: List[int], bracket: int, records: List[Dict]):
+        """在给定的各轮K线数上逐轮评估并淘汰"""
+        for rung, bars in enumerate(budgets):
+            scores = self._evaluate(strategy_cls, df, combos, candidates, bars)
+            for idx, score in zip(candidates, scores):
+                row = {'bracket': bracket, 'rung': rung, 'bars': bars, 'combo': idx}
+                row.update(combos[idx])
+                row[self.metric] = score
+                records.append(row)
+
+            if rung == len(budgets) - 1:
+                break
+            # 保留前1/eta（NaN视为最差），同分时保持原顺序
+            keep = max(1, len(candidates) // self.eta)
+            ranking = np.argsort(-np.nan_to_num(scores, nan=-np.inf), kind='stable')[:keep]
+            candidates = [candidates[i] for i in sorted(ranking)]
+
+    def _evaluate(self, strategy_cls, df: pd.DataFrame, combos: List[Dict],
+                  candidates: List[int], bars: int) -> np.ndarray:
+        """在最近bars根K线上回测候选组合（已评估过的直接复用）"""
+        todo = [idx for idx in candidates if (idx, bars) not in self._scores]
+        if todo:
+            grid = self.engine.run_grid(strategy_cls, df.iloc[-bars:], [combos[idx] for idx in todo])
+            for idx, score in zip(todo, grid[self.metric].to_numpy(dtype=np.float64)):
+                self._scores[(idx, bars)] = score
+        return np.array([self._scores[(idx, bars)] for idx in candidates])
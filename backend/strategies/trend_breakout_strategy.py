@@ -16,10 +16,15 @@
 - 4H时间周期优化
 """
 
+import math
 import pandas as pd
 import numpy as np
 from typing import Tuple
-from .strategy_base import BaseStrategy
+from .strategy_base import BaseStrategy, Feature
+from .indicator_cache import get_indicator_cache, indicators
+from .numba_support import jit, kernel_input
+from .streaming import RollingRegression, RollingMax, RollingMin, History
+from .resampler import HTFBars, bars_per_period, resample
 
 
 class TrendBreakoutStrategy(BaseStrategy):
@@ -38,6 +43,8 @@ class TrendBreakoutStrategy(BaseStrategy):
     - BarsValid = 6
     """
 
+    stateful = True
+
     def __init__(self, params: dict = None):
         default_params = {
             # 线性回归参数
@@ -58,6 +65,8 @@ class TrendBreakoutStrategy(BaseStrategy):
 
             # 日线参数
             'daily_lookback': 3,            # 日线高低点回溯天数
+            'daily_mode': 'rolling',        # rolling: 最近N天的基础K线滑动窗口；calendar: 最近N根已收盘的自然日K线
+            'timeframe': '4H',              # 基础K线周期（决定每天的K线数）
         }
         if params:
             default_params.update(params)
@@ -68,29 +77,12 @@ class TrendBreakoutStrategy(BaseStrategy):
         """
         计算线性回归值
 
-        使用最小二乘法计算线性回归线的当前值
+        使用最小二乘法计算线性回归线的当前值（窗口内x取0..period-1），O(n)
         """
-        def linreg(x):
-            if len(x) < period:
-                return np.nan
-            y = x.values
-            x_axis = np.arange(len(y))
-
-            # 最小二乘法
-            n = len(y)
-            sum_x = np.sum(x_axis)
-            sum_y = np.sum(y)
-            sum_xy = np.sum(x_axis * y)
-            sum_x2 = np.sum(x_axis ** 2)
-
-            # 斜率和截距
-            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x ** 2)
-            intercept = (sum_y - slope * sum_x) / n
-
-            # 返回最后一个点的回归值
-            return intercept + slope * (n - 1)
-
-        return series.rolling(window=period).apply(linreg, raw=False)
+        cache = get_indicator_cache()
+        values = cache.get(cache.fingerprint(series), 'linreg', period,
+                           lambda: indicators.rolling_linreg(series, period))
+        return pd.Series(values, index=series.index)
 
     def _calculate_biggest_range(self, df: pd.DataFrame, period: int) -> pd.Series:
         """
@@ -98,26 +90,47 @@ class TrendBreakoutStrategy(BaseStrategy):
 
         返回过去period根K线中最大的单根K线振幅（High - Low）
         """
-        high_low_range = df['high'] - df['low']
-        return high_low_range.rolling(window=period).max()
+        high, low = df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64)
+        cache = get_indicator_cache()
+        values = cache.get(cache.fingerprint(df['high'], df['low']), 'biggest_range', period,
+                           lambda: indicators.rolling_max(high - low, period))
+        return pd.Series(values, index=df.index)
+
+    def _daily_window(self) -> int:
+        """
+        日线高低点覆盖的基础K线数
+
+        rolling模式为 每天K线数 × 回溯天数；calendar模式多留一天，覆盖数据开头或当前未收盘的那一天
+        """
+        days = self.params['daily_lookback'] + (1 if self.params['daily_mode'] == 'calendar' else 0)
+        return bars_per_period(self.params['timeframe'], '1D') * days
 
     def _calculate_daily_levels(self, df: pd.DataFrame, lookback: int) -> Tuple[pd.Series, pd.Series]:
         """
         计算日线高低点
 
-        由于我们使用4H数据，需要聚合计算日线高低点
-        每天6根4H K线
+        rolling模式：最近lookback天的基础K线（每天K线数由timeframe决定）上的滚动最高/最低价
+        calendar模式：把基础K线重采样为自然日K线，取最近lookback根已收盘日K线的最高/最低价，
+        日K线在当天最后一根基础K线收盘后才可见
         """
-        bars_per_day = 6  # 4H时间周期，每天6根K线
-
+        cache = get_indicator_cache()
+        if self.params['daily_mode'] == 'calendar':
+            daily = resample(df, '1D', self.params['timeframe'])
+            high = daily.align(indicators.rolling_max(daily.bars['high'], lookback))
+            low = daily.align(indicators.rolling_min(daily.bars['low'], lookback))
+            return pd.Series(high, index=df.index), pd.Series(low, index=df.index)
+        if self.params['daily_mode'] != 'rolling':
+            raise ValueError(f"未知的日线模式: {self.params['daily_mode']}")
+
+        window = bars_per_period(self.params['timeframe'], '1D') * lookback
         # 计算日线高点
-        daily_high = df['high'].rolling(window=bars_per_day * lookback).max()
+        daily_high = cache.rolling_max(df['high'], window)
         # 计算日线低点
-        daily_low = df['low'].rolling(window=bars_per_day * lookback).min()
+        daily_low = cache.rolling_min(df['low'], window)
 
         return daily_high, daily_low
 
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         生成趋势突破交易信号
 
@@ -136,12 +149,12 @@ class TrendBreakoutStrategy(BaseStrategy):
         2. 触及止盈
 
         Args:
-            df: K线数据
+            df: K线数据（只读）
 
         Returns:
-            添加了signal列的DataFrame
+            新增列DataFrame（回归线、入场价位等指标、signal及开仓K线的价位）
         """
-        df = df.copy()
+        signals = pd.DataFrame(index=df.index)
 
         # 获取参数
         linreg_period = self.params['linreg_period']
@@ -155,132 +168,111 @@ class TrendBreakoutStrategy(BaseStrategy):
         use_trend_filter = self.params['use_trend_filter']
 
         # 计算技术指标
-        df['linreg'] = self._calculate_linear_regression(df['close'], linreg_period)
-        df['biggest_range'] = self._calculate_biggest_range(df, biggest_range_period)
+        signals['linreg'] = self._calculate_linear_regression(df['close'], linreg_period)
+        signals['biggest_range'] = self._calculate_biggest_range(df, biggest_range_period)
 
         # 计算日线高低点
         daily_high, daily_low = self._calculate_daily_levels(df, daily_lookback)
-        df['daily_high'] = daily_high
-        df['daily_low'] = daily_low
+        signals['daily_high'] = daily_high
+        signals['daily_low'] = daily_low
 
         # 计算入场价位
         # 做多入场价 = DailyHigh[lookback] + (mult * BiggestRange[2])
-        df['long_entry_price'] = df['daily_high'].shift(1) + (price_entry_mult * df['biggest_range'].shift(trend_lookback))
+        signals['long_entry_price'] = signals['daily_high'].shift(1) + (price_entry_mult * signals['biggest_range'].shift(trend_lookback))
         # 做空入场价 = DailyLow[lookback] - (mult * BiggestRange[2])
-        df['short_entry_price'] = df['daily_low'].shift(1) - (price_entry_mult * df['biggest_range'].shift(trend_lookback))
-
-        # 初始化信号
-        df['signal'] = 0
-        df['entry_price'] = np.nan
-        df['stop_loss'] = np.nan
-        df['take_profit'] = np.nan
-
-        # 持仓状态跟踪
-        position = 0  # 0: 无仓位, 1: 多头, -1: 空头
-        entry_price = 0
-        stop_loss = 0
-        take_profit = 0
-        entry_bar = 0  # 入场K线索引
-        pending_long = False
-        pending_short = False
-        pending_bar = 0
+        signals['short_entry_price'] = signals['daily_low'].shift(1) - (price_entry_mult * signals['biggest_range'].shift(trend_lookback))
 
         # 需要足够的历史数据来计算指标
-        start_idx = max(linreg_period, biggest_range_period, daily_lookback * 6) + trend_lookback + 5
-
-        for i in range(start_idx, len(df)):
-            current_price = df.iloc[i]['close']
-            high_price = df.iloc[i]['high']
-            low_price = df.iloc[i]['low']
-
-            # 获取回溯值
-            linreg_value = df.iloc[i - trend_lookback]['linreg'] if i >= trend_lookback else np.nan
-            close_lookback = df.iloc[i - trend_lookback]['close'] if i >= trend_lookback else current_price
-
-            # 趋势判断
-            if use_trend_filter and not np.isnan(linreg_value):
-                bullish_trend = close_lookback > linreg_value
-                bearish_trend = close_lookback < linreg_value
-            else:
-                bullish_trend = True
-                bearish_trend = True
-
-            # 入场价位
-            long_entry = df.iloc[i]['long_entry_price']
-            short_entry = df.iloc[i]['short_entry_price']
-
-            # 如果有持仓，检查出场条件
-            if position == 1:  # 多头持仓
-                # 检查止损
-                if low_price <= stop_loss:
-                    df.iloc[i, df.columns.get_loc('signal')] = -1
-                    position = 0
-                # 检查止盈
-                elif high_price >= take_profit:
-                    df.iloc[i, df.columns.get_loc('signal')] = -1
-                    position = 0
-
-            elif position == -1:  # 空头持仓
-                # 检查止损
-                if high_price >= stop_loss:
-                    df.iloc[i, df.columns.get_loc('signal')] = 1
-                    position = 0
-                # 检查止盈
-                elif low_price <= take_profit:
-                    df.iloc[i, df.columns.get_loc('signal')] = 1
-                    position = 0
-
-            # 如果无持仓，检查入场条件
-            if position == 0:
-                # 处理待定订单
-                if pending_long and (i - pending_bar) <= bars_valid:
-                    # 检查是否突破做多入场价
-                    if high_price >= long_entry and not np.isnan(long_entry):
-                        df.iloc[i, df.columns.get_loc('signal')] = 1
-                        position = 1
-                        entry_price = long_entry
-                        stop_loss = entry_price * (1 - stop_loss_pct)
-                        take_profit = entry_price * (1 + profit_target_pct)
-                        entry_bar = i
-                        pending_long = False
-
-                        df.iloc[i, df.columns.get_loc('entry_price')] = entry_price
-                        df.iloc[i, df.columns.get_loc('stop_loss')] = stop_loss
-                        df.iloc[i, df.columns.get_loc('take_profit')] = take_profit
-
-                elif pending_short and (i - pending_bar) <= bars_valid:
-                    # 检查是否跌破做空入场价
-                    if low_price <= short_entry and not np.isnan(short_entry):
-                        df.iloc[i, df.columns.get_loc('signal')] = -1
-                        position = -1
-                        entry_price = short_entry
-                        stop_loss = entry_price * (1 + stop_loss_pct)
-                        take_profit = entry_price * (1 - profit_target_pct)
-                        entry_bar = i
-                        pending_short = False
-
-                        df.iloc[i, df.columns.get_loc('entry_price')] = entry_price
-                        df.iloc[i, df.columns.get_loc('stop_loss')] = stop_loss
-                        df.iloc[i, df.columns.get_loc('take_profit')] = take_profit
-
-                # 检查新的入场信号
-                if not pending_long and not pending_short:
-                    # 做多条件：价格在回归线上方
-                    if bullish_trend and not np.isnan(long_entry):
-                        pending_long = True
-                        pending_bar = i
-                    # 做空条件：价格在回归线下方
-                    elif bearish_trend and not bullish_trend and not np.isnan(short_entry):
-                        pending_short = True
-                        pending_bar = i
-
-                # 重置过期的待定订单
-                if pending_long and (i - pending_bar) > bars_valid:
-                    pending_long = False
-                if pending_short and (i - pending_bar) > bars_valid:
-                    pending_short = False
-
-        return df
+        start_idx = max(linreg_period, biggest_range_period, self._daily_window()) + trend_lookback + 5
+
+        # 逐K线状态机在预先提取的数组上运行
+        signal, entry_prices, stop_losses, take_profits = _breakout_state_machine(
+            kernel_input(df['close'].to_numpy(dtype=np.float64)),
+            kernel_input(df['high'].to_numpy(dtype=np.float64)),
+            kernel_input(df['low'].to_numpy(dtype=np.float64)),
+            kernel_input(signals['linreg'].to_numpy(dtype=np.float64)),
+            kernel_input(signals['long_entry_price'].to_numpy(dtype=np.float64)),
+            kernel_input(signals['short_entry_price'].to_numpy(dtype=np.float64)),
+            start_idx, trend_lookback, bars_valid, stop_loss_pct, profit_target_pct,
+            use_trend_filter,
+        )
+
+        signals['signal'] = signal
+        signals['entry_price'] = entry_prices
+        signals['stop_loss'] = stop_losses
+        signals['take_profit'] = take_profits
+
+        return signals
+
+    def required_lookback(self) -> int:
+        """回归线、BiggestRange和日线高低点都是有限窗口，状态机的起始K线已覆盖全部窗口"""
+        p = self.params
+        return max(p['linreg_period'], p['biggest_range_period'], self._daily_window()) + p['trend_lookback'] + 5
+
+    def required_features(self) -> list:
+        p = self.params
+        features = [Feature('linreg', p['linreg_period']),
+                    Feature('biggest_range', p['biggest_range_period'], ('high', 'low'))]
+        if p['daily_mode'] == 'rolling':
+            daily_window = bars_per_period(p['timeframe'], '1D') * p['daily_lookback']
+            features += [Feature('rolling_max', daily_window, ('high',)),
+                         Feature('rolling_min', daily_window, ('low',))]
+        return features
+
+    def _init_stream(self) -> dict:
+        p = self.params
+        trend_lookback = p['trend_lookback']
+        if p['daily_mode'] == 'calendar':
+            daily = {'daily': HTFBars('1D', p['timeframe'], size=p['daily_lookback'])}
+        else:
+            daily_window = bars_per_period(p['timeframe'], '1D') * p['daily_lookback']
+            daily = {'daily_high': RollingMax(daily_window), 'daily_low': RollingMin(daily_window)}
+        return {
+            'bar': 0,
+            'close': History(trend_lookback),
+            'linreg': RollingRegression(p['linreg_period']),
+            'linreg_history': History(trend_lookback),
+            'biggest_range': RollingMax(p['biggest_range_period']),
+            'range_history': History(trend_lookback),
+            **daily,
+            'daily_high_history': History(1),
+            'daily_low_history': History(1),
+            'state': _breakout_initial_state(),
+        }
+
+    def _step(self, stream: dict, bar) -> int:
+        """逐K线更新回归线、BiggestRange和日线高低点，预热完成后推进状态机（与compute_signals共用_breakout_bar）"""
+        p = self.params
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        trend_lookback = p['trend_lookback']
+        i = stream['bar']
+        stream['bar'] = i + 1
+        stream['close'].update(close)
+        stream['linreg_history'].update(stream['linreg'].update(close))
+        stream['range_history'].update(stream['biggest_range'].update(high - low))
+        if 'daily' in stream:
+            daily = stream['daily']
+            daily.update(bar['timestamp'], float(bar['open']), high, low, close, float(bar['volume']))
+            stream['daily_high_history'].update(daily.highest())
+            stream['daily_low_history'].update(daily.lowest())
+        else:
+            stream['daily_high_history'].update(stream['daily_high'].update(high))
+            stream['daily_low_history'].update(stream['daily_low'].update(low))
+
+        start_idx = max(p['linreg_period'], p['biggest_range_period'], self._daily_window()) + trend_lookback + 5
+        if i < start_idx:
+            return 0
+
+        entry_offset = p['price_entry_mult'] * stream['range_history'].ago(trend_lookback)
+        signal, _ = _breakout_bar(
+            stream['state'], i, close, high, low,
+            stream['close'].ago(trend_lookback), stream['linreg_history'].ago(trend_lookback),
+            stream['daily_high_history'].ago(1) + entry_offset,
+            stream['daily_low_history'].ago(1) - entry_offset,
+            p['bars_valid'], p['stop_loss_pct'] / 100, p['profit_target_pct'] / 100,
+            p['use_trend_filter'],
+        )
+        return signal
 
     def get_strategy_description(self) -> str:
         return f"""
@@ -296,7 +288,7 @@ class TrendBreakoutStrategy(BaseStrategy):
 - 入场有效K线: {self.params['bars_valid']}
 - 止损: {self.params['stop_loss_pct']}%
 - 止盈: {self.params['profit_target_pct']}%
-- 日线回溯: {self.params['daily_lookback']}天
+- 日线回溯: {self.params['daily_lookback']}天（{'自然日K线' if self.params['daily_mode'] == 'calendar' else '滑动窗口'}，基础周期{self.params['timeframe']}）
 - 趋势过滤: {'开启' if self.params['use_trend_filter'] else '关闭'}
 
 ### 策略逻辑
@@ -335,3 +327,143 @@ class TrendBreakoutStrategy(BaseStrategy):
 - 震荡市场可能频繁止损
 - 突破后回调可能触发止损
 """
+
+
+# _breakout_bar的状态向量：[持仓方向, 入场价, 止损价, 止盈价, 待定做多, 待定做空, 待定订单K线序号]
+_BREAKOUT_STATE_SIZE = 7
+
+
+def _breakout_initial_state():
+    return kernel_input(np.zeros(_BREAKOUT_STATE_SIZE))
+
+
+@jit
+def _breakout_bar(state, i, current_price, high_price, low_price, close_lookback, linreg_value,
+                  long_entry, short_entry, bars_valid, stop_loss_pct, profit_target_pct,
+                  use_trend_filter):
+    """
+    趋势突破状态机推进一根K线
+
+    state就地更新（见_BREAKOUT_STATE_SIZE），i为K线序号（用于待定订单的有效期），
+    close_lookback / linreg_value为trend_lookback根之前的收盘价和回归值。
+    返回 (signal, 是否在本K线开仓)。
+    """
+    position = state[0]  # 0: 无仓位, 1: 多头, -1: 空头
+    entry_price = state[1]
+    stop_loss = state[2]
+    take_profit = state[3]
+    pending_long = state[4] != 0
+    pending_short = state[5] != 0
+    pending_bar = state[6]
+    signal = 0
+    opened = False
+
+    # 趋势判断
+    if use_trend_filter and not math.isnan(linreg_value):
+        bullish_trend = close_lookback > linreg_value
+        bearish_trend = close_lookback < linreg_value
+    else:
+        bullish_trend = True
+        bearish_trend = True
+
+    # 如果有持仓，检查出场条件
+    if position == 1:  # 多头持仓
+        # 检查止损或止盈
+        if low_price <= stop_loss or high_price >= take_profit:
+            signal = -1
+            position = 0
+
+    elif position == -1:  # 空头持仓
+        # 检查止损或止盈
+        if high_price >= stop_loss or low_price <= take_profit:
+            signal = 1
+            position = 0
+
+    # 如果无持仓，检查入场条件
+    if position == 0:
+        # 处理待定订单
+        if pending_long and (i - pending_bar) <= bars_valid:
+            # 检查是否突破做多入场价
+            if high_price >= long_entry and not math.isnan(long_entry):
+                signal = 1
+                position = 1
+                entry_price = long_entry
+                stop_loss = entry_price * (1 - stop_loss_pct)
+                take_profit = entry_price * (1 + profit_target_pct)
+                pending_long = False
+                opened = True
+
+        elif pending_short and (i - pending_bar) <= bars_valid:
+            # 检查是否跌破做空入场价
+            if low_price <= short_entry and not math.isnan(short_entry):
+                signal = -1
+                position = -1
+                entry_price = short_entry
+                stop_loss = entry_price * (1 + stop_loss_pct)
+                take_profit = entry_price * (1 - profit_target_pct)
+                pending_short = False
+                opened = True
+
+        # 检查新的入场信号
+        if not pending_long and not pending_short:
+            # 做多条件：价格在回归线上方
+            if bullish_trend and not math.isnan(long_entry):
+                pending_long = True
+                pending_bar = i
+            # 做空条件：价格在回归线下方
+            elif bearish_trend and not bullish_trend and not math.isnan(short_entry):
+                pending_short = True
+                pending_bar = i
+
+        # 重置过期的待定订单
+        if pending_long and (i - pending_bar) > bars_valid:
+            pending_long = False
+        if pending_short and (i - pending_bar) > bars_valid:
+            pending_short = False
+
+    state[0] = position
+    state[1] = entry_price
+    state[2] = stop_loss
+    state[3] = take_profit
+    state[4] = 1.0 if pending_long else 0.0
+    state[5] = 1.0 if pending_short else 0.0
+    state[6] = pending_bar
+    return signal, opened
+
+
+@jit
+def _breakout_state_machine(close, high, low, linreg, long_entry_price, short_entry_price,
+                            start_idx, trend_lookback, bars_valid, stop_loss_pct,
+                            profit_target_pct, use_trend_filter):
+    """
+    趋势突破的待定订单/止损止盈状态机
+
+    输入为收盘价、最高价、最低价、线性回归值、做多/做空入场价序列（数组或列表），
+    逐K线调用_breakout_bar（与step()共用同一份逻辑），
+    返回 (signal, entry_price, stop_loss, take_profit) 四个数组，
+    仅在开仓K线上记录价位，其余为NaN。
+    """
+    n = len(close)
+    signal = np.zeros(n, dtype=np.int64)
+    entry_prices = np.full(n, np.nan)
+    stop_losses = np.full(n, np.nan)
+    take_profits = np.full(n, np.nan)
+    state = [0.0] * _BREAKOUT_STATE_SIZE
+
+    for i in range(start_idx, n):
+        # 获取回溯值
+        linreg_value = linreg[i - trend_lookback] if i >= trend_lookback else np.nan
+        close_lookback = close[i - trend_lookback] if i >= trend_lookback else close[i]
+
+        bar_signal, opened = _breakout_bar(
+            state, i, close[i], high[i], low[i], close_lookback, linreg_value,
+            long_entry_price[i], short_entry_price[i], bars_valid, stop_loss_pct,
+            profit_target_pct, use_trend_filter,
+        )
+        signal[i] = bar_signal
+        if opened:
+            entry_prices[i] = state[1]
+            stop_losses[i] = state[2]
+            take_profits[i] = state[3]
+
+    return signal, entry_prices, stop_losses, take_profits
@@ -18,7 +18,15 @@
 
 import pandas as pd
 import numpy as np
-from .strategy_base import BaseStrategy
+from .strategy_base import BaseStrategy, Feature, HLC, ema_settle_bars
+from .indicator_cache import get_indicator_cache
+from .numba_support import jit, kernel_input
+from .streaming import ATR, EWM, History
+
+# 预热期的EMA容差：ATR/EMA只用于止损距离和趋势过滤等价位比较，对初值不如MACD的交叉敏感。
+# 残余权重5%时默认参数的预热期为279根K线（1e-4时为853根），合成数据上3000个端点中
+# 只有1个最新信号与完整历史不同；再放宽到10%（214根）时状态机的有效K线太少，不一致约1.4%
+SETTLE_TOLERANCE = 0.05
 
 
 class VolatilityHarvestStrategy(BaseStrategy):
@@ -35,6 +43,8 @@ class VolatilityHarvestStrategy(BaseStrategy):
     - TrailingStopCoef1 = 4.5 * ATR(185)
     """
 
+    stateful = True
+
     def __init__(self, params: dict = None):
         default_params = {
             # 核心ATR参数
@@ -66,29 +76,17 @@ class VolatilityHarvestStrategy(BaseStrategy):
         计算ATR（平均真实波幅）
 
         True Range = max(High - Low, abs(High - Close_prev), abs(Low - Close_prev))
-        ATR = SMA(True Range, period)
-        """
-        high = df['high']
-        low = df['low']
-        close = df['close']
-
-        # 计算True Range
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-
-        true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-        # 计算ATR（使用指数移动平均）
-        atr = true_range.ewm(span=period, adjust=False).mean()
+        ATR = EMA(True Range, period)
 
-        return atr
+        真实波幅和各周期的ATR取自指标缓存，参数扫描时只计算一次
+        """
+        return get_indicator_cache().atr(df, period)
 
     def _calculate_ema(self, series: pd.Series, period: int) -> pd.Series:
         """计算EMA"""
-        return series.ewm(span=period, adjust=False).mean()
+        return get_indicator_cache().ewm_mean(series, period)
 
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         生成波动收割交易信号
 
@@ -103,12 +101,12 @@ class VolatilityHarvestStrategy(BaseStrategy):
         3. 移动止损被触发
 
         Args:
-            df: K线数据
+            df: K线数据（只读）
 
         Returns:
-            添加了signal列的DataFrame
+            新增列DataFrame（ATR等指标、signal及开仓K线的价位）
         """
-        df = df.copy()
+        signals = pd.DataFrame(index=df.index)
 
         # 获取参数
         atr_period = self.params['atr_period']
@@ -122,124 +120,87 @@ class VolatilityHarvestStrategy(BaseStrategy):
         breakout_bars = self.params['breakout_bars']
 
         # 计算技术指标
-        df['atr'] = self._calculate_atr(df, atr_period)
-        df['atr_trail'] = self._calculate_atr(df, atr_trail_period)
-        df['ema_trend'] = self._calculate_ema(df['close'], trend_ema_period)
+        signals['atr'] = self._calculate_atr(df, atr_period)
+        signals['atr_trail'] = self._calculate_atr(df, atr_trail_period)
+        signals['ema_trend'] = self._calculate_ema(df['close'], trend_ema_period)
 
         # 计算ATR百分比（相对于价格）
-        df['atr_pct'] = df['atr'] / df['close'] * 100
+        signals['atr_pct'] = signals['atr'] / df['close'] * 100
 
         # 计算移动止损距离
-        df['trailing_stop_distance'] = df['atr_trail'] * atr_multiplier
-
-        # 初始化信号
-        df['signal'] = 0
-        df['entry_price'] = np.nan
-        df['stop_loss'] = np.nan
-        df['take_profit'] = np.nan
-        df['trailing_stop'] = np.nan
-
-        # 持仓状态跟踪
-        position = 0  # 0: 无仓位, 1: 多头, -1: 空头
-        entry_price = 0
-        stop_loss = 0
-        take_profit = 0
-        trailing_stop = 0
-        highest_since_entry = 0
-        lowest_since_entry = float('inf')
-
-        for i in range(max(atr_period, atr_trail_period, trend_ema_period) + breakout_bars, len(df)):
-            current_price = df.iloc[i]['close']
-            high_price = df.iloc[i]['high']
-            low_price = df.iloc[i]['low']
-            prev_close = df.iloc[i - breakout_bars]['close']
-            atr_value = df.iloc[i - 2]['atr'] if i >= 2 else df.iloc[i]['atr']  # ATR[2]
-            atr_trail_value = df.iloc[i]['atr_trail']
-            ema_value = df.iloc[i]['ema_trend']
-
-            # 波动性条件（ATR > 阈值）
-            volatility_ok = atr_value > entry_threshold
-
-            # 趋势条件
-            if use_trend_filter:
-                bullish_trend = current_price > ema_value
-                bearish_trend = current_price < ema_value
-            else:
-                bullish_trend = True
-                bearish_trend = True
-
-            # 如果有持仓，检查出场条件
-            if position == 1:  # 多头持仓
-                highest_since_entry = max(highest_since_entry, high_price)
-
-                # 更新移动止损
-                new_trailing_stop = highest_since_entry - (atr_trail_value * atr_multiplier)
-                if new_trailing_stop > trailing_stop:
-                    trailing_stop = new_trailing_stop
-
-                # 检查出场条件
-                if low_price <= stop_loss:
-                    df.iloc[i, df.columns.get_loc('signal')] = -1
-                    position = 0
-                elif high_price >= take_profit:
-                    df.iloc[i, df.columns.get_loc('signal')] = -1
-                    position = 0
-                elif low_price <= trailing_stop and trailing_stop > entry_price:
-                    df.iloc[i, df.columns.get_loc('signal')] = -1
-                    position = 0
-
-            elif position == -1:  # 空头持仓
-                lowest_since_entry = min(lowest_since_entry, low_price)
-
-                # 更新移动止损
-                new_trailing_stop = lowest_since_entry + (atr_trail_value * atr_multiplier)
-                if new_trailing_stop < trailing_stop:
-                    trailing_stop = new_trailing_stop
-
-                # 检查出场条件
-                if high_price >= stop_loss:
-                    df.iloc[i, df.columns.get_loc('signal')] = 1
-                    position = 0
-                elif low_price <= take_profit:
-                    df.iloc[i, df.columns.get_loc('signal')] = 1
-                    position = 0
-                elif high_price >= trailing_stop and trailing_stop < entry_price:
-                    df.iloc[i, df.columns.get_loc('signal')] = 1
-                    position = 0
-
-            # 如果无持仓，检查入场条件
-            if position == 0 and volatility_ok:
-                # 多头入场条件：价格突破前一根K线收盘价 + 趋势向上
-                if current_price > prev_close and bullish_trend:
-                    df.iloc[i, df.columns.get_loc('signal')] = 1
-                    position = 1
-                    entry_price = current_price
-                    stop_loss = entry_price * (1 - stop_loss_pct)
-                    take_profit = entry_price * (1 + profit_target_pct)
-                    trailing_stop = entry_price - (atr_trail_value * atr_multiplier)
-                    highest_since_entry = high_price
-
-                    df.iloc[i, df.columns.get_loc('entry_price')] = entry_price
-                    df.iloc[i, df.columns.get_loc('stop_loss')] = stop_loss
-                    df.iloc[i, df.columns.get_loc('take_profit')] = take_profit
-                    df.iloc[i, df.columns.get_loc('trailing_stop')] = trailing_stop
-
-                # 空头入场条件：价格跌破前一根K线收盘价 + 趋势向下
-                elif current_price < prev_close and bearish_trend and not bullish_trend:
-                    df.iloc[i, df.columns.get_loc('signal')] = -1
-                    position = -1
-                    entry_price = current_price
-                    stop_loss = entry_price * (1 + stop_loss_pct)
-                    take_profit = entry_price * (1 - profit_target_pct)
-                    trailing_stop = entry_price + (atr_trail_value * atr_multiplier)
-                    lowest_since_entry = low_price
-
-                    df.iloc[i, df.columns.get_loc('entry_price')] = entry_price
-                    df.iloc[i, df.columns.get_loc('stop_loss')] = stop_loss
-                    df.iloc[i, df.columns.get_loc('take_profit')] = take_profit
-                    df.iloc[i, df.columns.get_loc('trailing_stop')] = trailing_stop
-
-        return df
+        signals['trailing_stop_distance'] = signals['atr_trail'] * atr_multiplier
+
+        # 逐K线状态机在预先提取的数组上运行
+        signal, entry_prices, stop_losses, take_profits, trailing_stops = _harvest_state_machine(
+            kernel_input(df['close'].to_numpy(dtype=np.float64)),
+            kernel_input(df['high'].to_numpy(dtype=np.float64)),
+            kernel_input(df['low'].to_numpy(dtype=np.float64)),
+            kernel_input(signals['atr'].to_numpy(dtype=np.float64)),
+            kernel_input(signals['atr_trail'].to_numpy(dtype=np.float64)),
+            kernel_input(signals['ema_trend'].to_numpy(dtype=np.float64)),
+            max(atr_period, atr_trail_period, trend_ema_period) + breakout_bars,
+            breakout_bars, entry_threshold, stop_loss_pct, profit_target_pct,
+            atr_multiplier, use_trend_filter,
+        )
+
+        signals['signal'] = signal
+        signals['entry_price'] = entry_prices
+        signals['stop_loss'] = stop_losses
+        signals['take_profit'] = take_profits
+        signals['trailing_stop'] = trailing_stops
+
+        return signals
+
+    def required_lookback(self) -> int:
+        """
+        ATR/EMA按SETTLE_TOLERANCE收敛所需的K线数（ATR取2根前的值，真实波幅需要前一根收盘价），
+        且不少于状态机的起始K线
+        """
+        p = self.params
+        start_idx = max(p['atr_period'], p['atr_trail_period'], p['trend_ema_period']) + p['breakout_bars']
+        return max(ema_settle_bars(p['atr_period'], SETTLE_TOLERANCE) + 3,
+                   ema_settle_bars(p['atr_trail_period'], SETTLE_TOLERANCE) + 1,
+                   ema_settle_bars(p['trend_ema_period'], SETTLE_TOLERANCE),
+                   start_idx)
+
+    def required_features(self) -> list:
+        p = self.params
+        return [Feature('atr', p['atr_period'], HLC), Feature('atr', p['atr_trail_period'], HLC),
+                Feature('ewm_mean', p['trend_ema_period'])]
+
+    def _init_stream(self) -> dict:
+        p = self.params
+        return {
+            'bar': 0,
+            'close': History(p['breakout_bars']),
+            'atr': ATR(p['atr_period']),
+            'atr_history': History(2),
+            'atr_trail': ATR(p['atr_trail_period']),
+            'ema_trend': EWM(span=p['trend_ema_period']),
+            'state': _harvest_initial_state(),
+        }
+
+    def _step(self, stream: dict, bar) -> int:
+        """逐K线更新ATR/EMA，预热完成后推进状态机（与compute_signals共用_harvest_bar）"""
+        p = self.params
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        i = stream['bar']
+        stream['bar'] = i + 1
+        stream['close'].update(close)
+        stream['atr_history'].update(stream['atr'].update(high, low, close))
+        atr_trail = stream['atr_trail'].update(high, low, close)
+        ema_trend = stream['ema_trend'].update(close)
+
+        breakout_bars = p['breakout_bars']
+        if i < max(p['atr_period'], p['atr_trail_period'], p['trend_ema_period']) + breakout_bars:
+            return 0
+        signal, _ = _harvest_bar(
+            stream['state'], close, high, low, stream['close'].ago(breakout_bars),
+            stream['atr_history'].ago(2), atr_trail, ema_trend,
+            p['entry_atr_threshold'], p['stop_loss_pct'] / 100, p['profit_target_pct'] / 100,
+            p['atr_multiplier'], p['use_trend_filter'],
+        )
+        return signal
 
     def get_strategy_description(self) -> str:
         return f"""
@@ -328,3 +289,157 @@ class VolatilityHarvestConservativeStrategy(VolatilityHarvestStrategy):
 
         super().__init__(params=conservative_params)
         self.name = "波动收割策略(保守)"
+
+
+# _harvest_bar的状态向量：[持仓方向, 入场价, 止损价, 止盈价, 移动止损, 入场后最高价, 入场后最低价]
+_HARVEST_STATE_SIZE = 7
+
+
+def _harvest_initial_state():
+    state = np.zeros(_HARVEST_STATE_SIZE)
+    state[6] = np.inf
+    return kernel_input(state)
+
+
+@jit
+def _harvest_bar(state, current_price, high_price, low_price, prev_close, atr_value,
+                 atr_trail_value, ema_value, entry_threshold, stop_loss_pct, profit_target_pct,
+                 atr_multiplier, use_trend_filter):
+    """
+    波动收割状态机推进一根K线
+
+    state就地更新（见_HARVEST_STATE_SIZE），prev_close为breakout_bars根之前的收盘价，
+    atr_value为两根之前的ATR。返回 (signal, 是否在本K线开仓)。
+    """
+    position = state[0]  # 0: 无仓位, 1: 多头, -1: 空头
+    entry_price = state[1]
+    stop_loss = state[2]
+    take_profit = state[3]
+    trailing_stop = state[4]
+    highest_since_entry = state[5]
+    lowest_since_entry = state[6]
+    signal = 0
+    opened = False
+
+    # 波动性条件（ATR > 阈值）
+    volatility_ok = atr_value > entry_threshold
+
+    # 趋势条件
+    if use_trend_filter:
+        bullish_trend = current_price > ema_value
+        bearish_trend = current_price < ema_value
+    else:
+        bullish_trend = True
+        bearish_trend = True
+
+    # 如果有持仓，检查出场条件
+    if position == 1:  # 多头持仓
+        if high_price > highest_since_entry:
+            highest_since_entry = high_price
+
+        # 更新移动止损
+        new_trailing_stop = highest_since_entry - (atr_trail_value * atr_multiplier)
+        if new_trailing_stop > trailing_stop:
+            trailing_stop = new_trailing_stop
+
+        # 检查出场条件
+        if low_price <= stop_loss:
+            signal = -1
+            position = 0
+        elif high_price >= take_profit:
+            signal = -1
+            position = 0
+        elif low_price <= trailing_stop and trailing_stop > entry_price:
+            signal = -1
+            position = 0
+
+    elif position == -1:  # 空头持仓
+        if low_price < lowest_since_entry:
+            lowest_since_entry = low_price
+
+        # 更新移动止损
+        new_trailing_stop = lowest_since_entry + (atr_trail_value * atr_multiplier)
+        if new_trailing_stop < trailing_stop:
+            trailing_stop = new_trailing_stop
+
+        # 检查出场条件
+        if high_price >= stop_loss:
+            signal = 1
+            position = 0
+        elif low_price <= take_profit:
+            signal = 1
+            position = 0
+        elif high_price >= trailing_stop and trailing_stop < entry_price:
+            signal = 1
+            position = 0
+
+    # 如果无持仓，检查入场条件
+    if position == 0 and volatility_ok:
+        # 多头入场条件：价格突破前一根K线收盘价 + 趋势向上
+        if current_price > prev_close and bullish_trend:
+            signal = 1
+            position = 1
+            entry_price = current_price
+            stop_loss = entry_price * (1 - stop_loss_pct)
+            take_profit = entry_price * (1 + profit_target_pct)
+            trailing_stop = entry_price - (atr_trail_value * atr_multiplier)
+            highest_since_entry = high_price
+            opened = True
+
+        # 空头入场条件：价格跌破前一根K线收盘价 + 趋势向下
+        elif current_price < prev_close and bearish_trend and not bullish_trend:
+            signal = -1
+            position = -1
+            entry_price = current_price
+            stop_loss = entry_price * (1 + stop_loss_pct)
+            take_profit = entry_price * (1 - profit_target_pct)
+            trailing_stop = entry_price + (atr_trail_value * atr_multiplier)
+            lowest_since_entry = low_price
+            opened = True
+
+    state[0] = position
+    state[1] = entry_price
+    state[2] = stop_loss
+    state[3] = take_profit
+    state[4] = trailing_stop
+    state[5] = highest_since_entry
+    state[6] = lowest_since_entry
+    return signal, opened
+
+
+@jit
+def _harvest_state_machine(close, high, low, atr, atr_trail, ema_trend, start,
+                           breakout_bars, entry_threshold, stop_loss_pct, profit_target_pct,
+                           atr_multiplier, use_trend_filter):
+    """
+    波动收割的入场/出场/移动止损状态机
+
+    输入为收盘价、最高价、最低价、ATR、止损ATR、趋势EMA序列（数组或列表），
+    逐K线调用_harvest_bar（与step()共用同一份逻辑），
+    返回 (signal, entry_price, stop_loss, take_profit, trailing_stop) 五个数组，
+    仅在开仓K线上记录价位，其余为NaN。
+    """
+    n = len(close)
+    signal = np.zeros(n, dtype=np.int64)
+    entry_prices = np.full(n, np.nan)
+    stop_losses = np.full(n, np.nan)
+    take_profits = np.full(n, np.nan)
+    trailing_stops = np.full(n, np.nan)
+    state = [0.0] * _HARVEST_STATE_SIZE
+    state[6] = np.inf
+
+    for i in range(start, n):
+        atr_value = atr[i - 2] if i >= 2 else atr[i]  # ATR[2]
+        bar_signal, opened = _harvest_bar(
+            state, close[i], high[i], low[i], close[i - breakout_bars], atr_value,
+            atr_trail[i], ema_trend[i], entry_threshold, stop_loss_pct, profit_target_pct,
+            atr_multiplier, use_trend_filter,
+        )
+        signal[i] = bar_signal
+        if opened:
+            entry_prices[i] = state[1]
+            stop_losses[i] = state[2]
+            take_profits[i] = state[3]
+            trailing_stops[i] = state[4]
+
+    return signal, entry_prices, stop_losses, take_profits, trailing_stops
@@ -0,0 +1,244 @@
+"""
+滚动前推（Walk-Forward）优化
+在训练窗口上网格搜索参数，在紧随其后的测试窗口上检验，逐折向前滚动，
+输出每折结果和拼接后的样本外权益曲线
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+import pandas as pd
+import numpy as np
+
+from .backtest_engine import BacktestEngine
+from .position_simulator import simulate_signal_matrix
+from . import parallel_optimizer
+from .parallel_optimizer import SharedOHLCV, _init_worker
+
+
+def _signal_matrix(strategy_cls, frame: pd.DataFrame, combos: List[Dict]) -> np.ndarray:
+    """整段K线上每组参数一列的信号矩阵"""
+    signal_matrix = np.empty((len(frame), len(combos)), dtype=np.int8)
+    for j, params in enumerate(combos):
+        signal_matrix[:, j] = strategy_cls(params=params).compute_signals(frame)['signal'].to_numpy()
+    return signal_matrix
+
+
+def _score_folds(frame: pd.DataFrame, strategy_cls, combos: List[Dict], train_bounds: List[Tuple[int, int]],
+                 metric: str, initial_capital: float, commission: float) -> np.ndarray:
+    """
+    计算一组参数在每折训练窗口上的目标指标
+
+    信号在整段K线上只算一次，各折直接切片。指标和信号只依赖当前及之前的K线，
+    所以切片结果与只用截至训练窗口末尾的数据计算相同，不引入未来信息，
+    重叠的训练窗口也因此共用同一份指标计算。
+
+    Returns:
+        (参数组数, 折数) 的指标矩阵
+    """
+    engine = BacktestEngine(initial_capital=initial_capital, commission=commission)
+    signal_matrix = _signal_matrix(strategy_cls, frame, combos)
+    prices = frame['close'].to_numpy(dtype=np.float64)
+
+    scores = np.empty((len(combos), len(train_bounds)))
+    for k, (start, end) in enumerate(train_bounds):
+        sim = simulate_signal_matrix(
+            signal_matrix[start:end], prices[start:end],
+            commission=commission,
+            initial_capital=initial_capital,
+            start=1,
+        )
+        scores[:, k] = engine._calculate_grid_metrics(sim, frame.iloc[start:end])[metric]
+    return scores
+
+
+def _score_folds_worker(strategy_cls, combos: List[Dict], train_bounds: List[Tuple[int, int]],
+                        metric: str, initial_capital: float, commission: float) -> np.ndarray:
+    return _score_folds(parallel_optimizer._worker_frame, strategy_cls, combos, train_bounds,
+                        metric, initial_capital, commission)
+
+
+class WalkForwardOptimizer:
+    """
+    滚动前推优化器
+
+    - 折划分：训练窗口train_size根K线，之后test_size根为测试窗口，每折向前移动step根；
+      anchored=True时训练窗口起点固定在第0根（扩展窗口）。
+    - 并行：参数组合按chunk_size分块分发到多进程（K线通过共享内存发布一次），
+      每个任务在整段K线上为其参数计算一次信号，再对所有折的训练窗口打分，
+      重叠折之间不重复计算指标。
+    - 样本外：每折用训练得分最高的参数在测试窗口上回测（信号同样在整段K线上计算，
+      测试窗口开头已有完整的指标预热），每折从初始资金、空仓开始；
+      拼接时各折按上一折期末权益接续，相邻测试窗口重叠时只取到下一折测试开始前。
+    """
+
+    def __init__(self, train_size: int, test_size: int, step: Optional[int] = None,
+                 anchored: bool = False, metric: str = 'sharpe_ratio',
+                 max_workers: Optional[int] = None, chunk_size: int = 32,
+                 initial_capital: float = 10000, commission: float = 0.001):
+        """
+        初始化滚动前推优化器
+
+        Args:
+            train_size: 训练窗口K线数
+            test_size: 测试窗口K线数
+            step: 每折前移的K线数（默认等于test_size，测试窗口首尾相接）
+            anchored: 训练窗口是否从第0根开始逐折扩展
+            metric: 训练窗口上的优化目标（BacktestEngine指标名，越大越好）
+            max_workers: 进程数（默认CPU核数；1表示在当前进程中计算）
+            chunk_size: 每个任务包含的参数组合数
+            initial_capital: 初始资金
+            commission: 手续费率
+        """
+        if train_size < 2 or test_size < 2:
+            raise ValueError("训练和测试窗口至少需要2根K线")
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step or test_size
+        self.anchored = anchored
+        self.metric = metric
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.initial_capital = initial_capital
+        self.commission = commission
+
+    def folds(self, n_bars: int) -> List[Tuple[int, int, int]]:
+        """
+        划分折
+
+        Args:
+            n_bars: K线总数
+
+        Returns:
+            [(训练开始, 训练结束=测试开始, 测试结束), ...]，均为K线位置（左闭右开）
+        """
+        bounds = []
+        start = 0
+        while start + self.train_size + self.test_size <= n_bars:
+            train_end = start + self.train_size
+            bounds.append((0 if self.anchored else start, train_end, train_end + self.test_size))
+            start += self.step
+        return bounds
+
+    def run(self, strategy_cls, df: pd.DataFrame, param_grid: Union[Dict, List[Dict]]) -> Dict:
+        """
+        运行滚动前推优化
+
+        Args:
+            strategy_cls: 策略类（BaseStrategy子类）
+            df: K线数据
+            param_grid: 参数网格或参数字典列表
+
+        Returns:
+            {
+                'folds': 每折一行的DataFrame（窗口时间、最佳参数、训练得分、测试指标）,
+                'fold_equity': 每折测试窗口的权益Series列表,
+                'oos_equity': 拼接后的样本外权益Series,
+                'oos_metrics': 拼接后样本外权益的性能指标,
+                'train_scores': (参数组数, 折数) 的训练得分矩阵,
+            }
+        """
+        if isinstance(param_grid, dict):
+            keys = list(param_grid.keys())
+            combos = [dict(zip(keys, combo)) for combo in itertools.product(*param_grid.values())]
+        else:
+            combos = list(param_grid)
+
+        df = df.reset_index(drop=True)
+        bounds = self.folds(len(df))
+        if not bounds:
+            raise ValueError(f"K线数不足：至少需要{self.train_size + self.test_size}根")
+        train_bounds = [(start, end) for start, end, _ in bounds]
+
+        train_scores = self._score(strategy_cls, df, combos, train_bounds)
+
+        engine = BacktestEngine(initial_capital=self.initial_capital, commission=self.commission)
+        signal_cache: Dict[int, pd.DataFrame] = {}  # 参数序号 -> 整段K线上的信号
+        rows, fold_equity, fold_trades = [], [], []
+
+        for k, (train_start, train_end, test_end) in enumerate(bounds):
+            column = train_scores[:, k]
+            best = int(np.nanargmax(column)) if not np.isnan(column).all() else 0
+            if best not in signal_cache:
+                signal_cache[best] = strategy_cls(params=combos[best]).compute_signals(df)
+
+            test_df = df.iloc[train_end:test_end]
+            result, trades = engine._simulate_trading(test_df, signal_cache[best].iloc[train_end:test_end])
+            metrics = engine._calculate_metrics(result, trades)
+
+            fold_equity.append(pd.Series(result['capital'].to_numpy(),
+                                         index=pd.DatetimeIndex(test_df['timestamp']), name='capital'))
+            fold_trades.append(trades)
+            rows.append({
+                'fold': k,
+                'train_start': df['timestamp'].iloc[train_start],
+                'train_end': df['timestamp'].iloc[train_end - 1],
+                'test_start': df['timestamp'].iloc[train_end],
+                'test_end': df['timestamp'].iloc[test_end - 1],
+                'params': combos[best],
+                f'train_{self.metric}': column[best],
+                'total_return_pct': metrics['total_return_pct'],
+                'sharpe_ratio': metrics['sharpe_ratio'],
+                'max_drawdown_pct': metrics['max_drawdown_pct'],
+                'total_trades': metrics['total_trades'],
+                'win_rate': metrics['win_rate'],
+            })
+
+        oos_equity, oos_trades = self._stitch(bounds, fold_equity, fold_trades)
+        oos_frame = pd.DataFrame({'timestamp': oos_equity.index, 'capital': oos_equity.to_numpy()})
+
+        return {
+            'folds': pd.DataFrame(rows),
+            'fold_equity': fold_equity,
+            'oos_equity': oos_equity,
+            'oos_metrics': engine._calculate_metrics(oos_frame, oos_trades),
+            'train_scores': train_scores,
+        }
+
+    def _score(self, strategy_cls, df: pd.DataFrame, combos: List[Dict],
+               train_bounds: List[Tuple[int, int]]) -> np.ndarray:
+        """所有参数组合在各折训练窗口上的得分（按参数块并行）"""
+        chunks = [combos[i:i + self.chunk_size] for i in range(0, len(combos), self.chunk_size)]
+        args = (train_bounds, self.metric, self.initial_capital, self.commission)
+
+        if self.max_workers == 1 or len(chunks) == 1:
+            return np.vstack([_score_folds(df, strategy_cls, chunk, *args) for chunk in chunks])
+
+        shared = SharedOHLCV.publish(df)
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                     initargs=(shared.name, len(df))) as executor:
+                futures = [executor.submit(_score_folds_worker, strategy_cls, chunk, *args)
+                           for chunk in chunks]
+                return np.vstack([future.result() for future in futures])
+        finally:
+            shared.close()
+
+    def _stitch(self, bounds: List[Tuple[int, int, int]], fold_equity: List[pd.Series],
+                fold_trades: List[np.ndarray]) -> Tuple[pd.Series, np.ndarray]:
+        """按期末权益接续各折测试窗口，得到连续的样本外权益和成交明细"""
+        pieces, ledgers = [], []
+        capital = float(self.initial_capital)
+        offset = 0
+
+        for k, (equity, trades) in enumerate(zip(fold_equity, fold_trades)):
+            # 测试窗口重叠时截到下一折测试开始前
+            length = len(equity)
+            if k + 1 < len(bounds):
+                length = min(length, bounds[k + 1][1] - bounds[k][1])
+
+            scale = capital / self.initial_capital
+            values = equity.to_numpy()[:length] * scale
+            pieces.append(pd.Series(values, index=equity.index[:length]))
+
+            kept = trades[trades['index'] < length].copy()
+            for field in ['amount', 'value', 'profit']:
+                kept[field] *= scale
+            kept['index'] += offset
+            ledgers.append(kept)
+
+            capital = float(values[-1])
+            offset += length
+
+        return pd.concat(pieces).rename('capital'), np.concatenate(ledgers)
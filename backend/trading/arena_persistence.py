@@ -26,6 +26,8 @@ from strategies.rsi_strategy import RSIStrategy
 from strategies.macd_strategy import MACDStrategy
 from strategies.bb_strategy import BollingerBandsStrategy
 from strategies.volatility_harvest_strategy import VolatilityHarvestStrategy
+from strategies.position_simulator import simulate_positions, CommissionModel, PositionState
+from strategies.metrics import rolling_metrics
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -392,9 +394,8 @@ class ArenaPersistence:
 
             backtest_start = last_active
 
-        # 计算需要获取的天数
-        days_from_start = (datetime.now() - start_date).days + 2
-        days_needed = max(days_from_start, 30)
+        # 计算需要获取的天数：回测区间 + 策略预热期
+        days_needed = (datetime.now() - backtest_start).days + arena.signal_lookback_days()
 
         # 获取K线数据
         df = self.data_manager.get_latest_data_for_backtest(
@@ -412,96 +413,94 @@ class ArenaPersistence:
         result["synced"] = True
 
         # 筛选需要回测的数据
-        df_backtest = df[df['timestamp'] >= backtest_start].copy()
+        in_backtest = (df['timestamp'] >= backtest_start).to_numpy()
+        n_backtest = int(in_backtest.sum())
 
-        if df_backtest.empty:
+        if n_backtest == 0:
             logger.info("无需要回测的新数据")
             return result
 
         if is_first_run:
-            logger.info(f"首次回测: 从 {start_date} 到现在，共 {len(df_backtest)} 根K线")
+            logger.info(f"首次回测: 从 {start_date} 到现在，共 {n_backtest} 根K线")
         else:
-            logger.info(f"离线期间有 {len(df_backtest)} 根新K线")
+            logger.info(f"离线期间有 {n_backtest} 根新K线")
 
         # 为每个策略计算表现并模拟交易
         from backend.trading.strategy_arena import StrategyType
 
+        timestamps = df['timestamp'][in_backtest]
+        prices = df['close'].to_numpy(dtype=np.float64)[in_backtest]
+
         # 获取当前价格
         ticker = self.okx.get_ticker(arena.config.symbol)
         current_price = float(ticker.get('last', 0)) if ticker else 0
 
-        for strategy_type, state in arena.strategies.items():
-            strategy = arena.get_strategy_instance(strategy_type)
-
-            # 使用完整数据生成信号（需要历史数据计算指标）
-            df_with_signals = strategy.generate_signals(df.copy())
+        # 只在预热期+回测期间的末尾K线上生成信号，各策略共用公共特征
+        backtest_signals = arena.latest_signals(df, n_backtest)
 
-            # 筛选回测期间的信号
-            df_signals = df_with_signals[df_with_signals['timestamp'] >= backtest_start]
+        for strategy_type, state in arena.strategies.items():
+            signal = backtest_signals[strategy_type].to_numpy()
 
             # 统计信号数量
-            buy_signals = (df_signals['signal'] == 1).sum()
-            sell_signals = (df_signals['signal'] == -1).sum()
-
-            # 模拟交易执行
-            trades_executed = 0
-            commission = arena.config.commission
-
-            for idx, row in df_signals.iterrows():
-                signal = row['signal']
-                price = row['close']
+            buy_signals = (signal == 1).sum()
+            sell_signals = (signal == -1).sum()
+
+            # 模拟交易执行（从保存的策略状态继续）
+            commission = CommissionModel(rate=arena.config.commission, deduct_before_fill=True)
+            sim = simulate_positions(
+                signal,
+                prices,
+                commission=commission,
+                initial_state=PositionState(
+                    cash=state.current_capital,
+                    position=state.position,
+                    entry_price=state.entry_price,
+                ),
+            )
+            trades_executed = len(sim.trades)
 
-                # 买入信号且无持仓
-                if signal == 1 and state.position == 0 and state.current_capital > 0:
-                    amount = (state.current_capital * (1 - commission)) / price
-                    state.position = amount
-                    state.entry_price = price
-                    state.current_capital = 0
-                    trades_executed += 1
+            for t in sim.trades:
+                ts = timestamps.iloc[t['index']]
+                ts = ts.isoformat() if hasattr(ts, 'isoformat') else str(ts)
 
+                if t['type'] == 'BUY':
                     # 记录交易
                     trade = {
                         "strategy": strategy_type.value,
                         "type": "BUY",
-                        "price": price,
-                        "amount": amount,
-                        "cost": amount * price,
-                        "timestamp": row['timestamp'].isoformat() if hasattr(row['timestamp'], 'isoformat') else str(row['timestamp']),
+                        "price": t['price'],
+                        "amount": t['amount'],
+                        "cost": t['value'],
+                        "timestamp": ts,
                     }
-                    state.trades.append(trade)
                     if not is_first_run:  # 首次回测时不逐条打印，太多了
-                        logger.info(f"[{strategy_type.value}] 买入 {amount:.6f} @ {price:.2f}")
-
-                # 卖出信号且有持仓
-                elif signal == -1 and state.position > 0:
-                    sell_value = state.position * price * (1 - commission)
-                    profit = sell_value - (state.position * state.entry_price)
-                    profit_pct = (profit / (state.position * state.entry_price)) * 100
-
+                        logger.info(f"[{strategy_type.value}] 买入 {t['amount']:.6f} @ {t['price']:.2f}")
+                else:
                     trade = {
                         "strategy": strategy_type.value,
                         "type": "SELL",
-                        "price": price,
-                        "amount": state.position,
-                        "value": sell_value,
-                        "profit": profit,
-                        "profit_pct": profit_pct,
-                        "timestamp": row['timestamp'].isoformat() if hasattr(row['timestamp'], 'isoformat') else str(row['timestamp']),
+                        "price": t['price'],
+                        "amount": t['amount'],
+                        "value": t['value'],
+                        "profit": t['profit'],
+                        "profit_pct": t['profit_pct'],
+                        "timestamp": ts,
                     }
 
-                    if profit > 0:
+                    if t['profit'] > 0:
                         state.win_count += 1
                     else:
                         state.loss_count += 1
 
-                    state.current_capital = sell_value
-                    state.position = 0
-                    state.entry_price = 0
-                    trades_executed += 1
-
-                    state.trades.append(trade)
                     if not is_first_run:
-                        logger.info(f"[{strategy_type.value}] 卖出 @ {price:.2f}, 收益: {profit:.2f} ({profit_pct:.2f}%)")
+                        logger.info(f"[{strategy_type.value}] 卖出 @ {t['price']:.2f}, "
+                                   f"收益: {t['profit']:.2f} ({t['profit_pct']:.2f}%)")
+
+                state.trades.append(trade)
+
+            state.current_capital = sim.final_state.cash
+            state.position = sim.final_state.position
+            state.entry_price = sim.final_state.entry_price
 
             # 计算当前总收益率
             if state.initial_capital > 0:
@@ -537,23 +536,26 @@ class ArenaPersistence:
 
         return result
 
-    def generate_net_value_history(self, arena, start_date_str: str = "2026-01-01") -> pd.DataFrame:
+    def generate_net_value_history(self, arena, start_date_str: str = "2026-01-01",
+                                   rolling_window: Optional[int] = None) -> pd.DataFrame:
         """
         生成从指定日期开始的完整净值历史数据
 
         Args:
             arena: StrategyArena实例
             start_date_str: 起始日期 (格式: YYYY-MM-DD)
+            rolling_window: 滚动指标窗口K线数（为空时不计算）
 
         Returns:
-            DataFrame，包含 timestamp, strategy, net_value 列
+            DataFrame，包含 timestamp, strategy, net_value 列；
+            指定rolling_window时另含 rolling_sharpe, drawdown 列
         """
         from backend.trading.strategy_arena import StrategyType
 
         start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
 
-        # 计算需要获取的天数
-        days_needed = (datetime.now() - start_date).days + 5
+        # 计算需要获取的天数：起始日期之后 + 策略预热期
+        days_needed = (datetime.now() - start_date).days + arena.signal_lookback_days()
 
         # 获取K线数据
         df = self.data_manager.get_latest_data_for_backtest(
@@ -568,9 +570,9 @@ class ArenaPersistence:
             return pd.DataFrame()
 
         # 筛选从起始日期开始的数据
-        df_backtest = df[df['timestamp'] >= start_date].copy()
+        in_range = (df['timestamp'] >= start_date).to_numpy()
 
-        if df_backtest.empty:
+        if not in_range.any():
             return pd.DataFrame()
 
         # 获取初始资金（每个策略相同）
@@ -578,73 +580,43 @@ class ArenaPersistence:
         if initial_capital == 0:
             initial_capital = 478.35  # 默认值
 
-        commission = arena.config.commission
+        commission = CommissionModel(rate=arena.config.commission, deduct_before_fill=True)
 
-        # 为每个策略生成完整的信号序列
-        strategies_signals = {}
+        # 为每个策略生成完整的信号序列并模拟交易
+        timestamps = df['timestamp'].to_numpy()[in_range]
+        prices = df['close'].to_numpy(dtype=np.float64)[in_range]
+        strategy_names = []
+        net_values = []
+        # 只在预热期+起始日期之后的K线上生成信号，各策略共用公共特征
+        range_signals = arena.latest_signals(df, int(in_range.sum()))
         for strategy_type in arena.strategies.keys():
-            strategy = arena.get_strategy_instance(strategy_type)
-            df_with_signals = strategy.generate_signals(df.copy())
-            # 只保留从起始日期开始的数据
-            df_signals = df_with_signals[df_with_signals['timestamp'] >= start_date].copy()
-            strategies_signals[strategy_type] = df_signals
+            signal = range_signals[strategy_type].to_numpy()
 
-        # 按时间顺序模拟，记录每个时间点所有策略的净值
-        net_value_records = []
+            sim = simulate_positions(
+                signal,
+                prices,
+                commission=commission,
+                initial_capital=initial_capital,
+            )
 
-        # 初始化每个策略的状态
-        strategy_states = {}
-        for strategy_type in arena.strategies.keys():
-            strategy_states[strategy_type] = {
-                'capital': initial_capital,
-                'position': 0,
-                'entry_price': 0
-            }
+            strategy_names.append(strategy_type.value)
+            net_values.append(sim.net_value)
 
-        # 获取时间序列（以第一个策略的时间为准）
-        first_strategy = list(strategies_signals.keys())[0]
-        timestamps = strategies_signals[first_strategy]['timestamp'].tolist()
-
-        for i, ts in enumerate(timestamps):
-            current_price = strategies_signals[first_strategy].iloc[i]['close']
-
-            # 对每个策略执行交易逻辑
-            for strategy_type, state in strategy_states.items():
-                df_signals = strategies_signals[strategy_type]
-                if i >= len(df_signals):
-                    continue
-
-                signal = df_signals.iloc[i]['signal']
-                price = df_signals.iloc[i]['close']
-
-                # 买入信号且无持仓
-                if signal == 1 and state['position'] == 0 and state['capital'] > 0:
-                    amount = (state['capital'] * (1 - commission)) / price
-                    state['position'] = amount
-                    state['entry_price'] = price
-                    state['capital'] = 0
-
-                # 卖出信号且有持仓
-                elif signal == -1 and state['position'] > 0:
-                    sell_value = state['position'] * price * (1 - commission)
-                    state['capital'] = sell_value
-                    state['position'] = 0
-                    state['entry_price'] = 0
-
-                # 计算当前净值
-                if state['position'] > 0:
-                    net_value = state['position'] * price
-                else:
-                    net_value = state['capital']
+        # 按时间顺序排列，每个时间点依次记录所有策略的净值
+        net_value_matrix = np.column_stack(net_values)
+        result = pd.DataFrame({
+            'timestamp': np.repeat(timestamps, len(strategy_names)),
+            'strategy': np.tile(strategy_names, len(timestamps)),
+            'net_value': net_value_matrix.ravel(),
+        })
 
-                # 记录净值
-                net_value_records.append({
-                    'timestamp': ts,
-                    'strategy': strategy_type.value,
-                    'net_value': net_value
-                })
+        if rolling_window:
+            # 所有策略的滚动指标一次性按列计算
+            rolling = rolling_metrics(net_value_matrix, rolling_window)
+            result['rolling_sharpe'] = rolling['rolling_sharpe'].ravel()
+            result['drawdown'] = rolling['drawdown'].ravel()
 
-        return pd.DataFrame(net_value_records)
+        return result
 
     def _auto_optimize_params(self, arena, performance: Dict) -> List[Dict]:
         """
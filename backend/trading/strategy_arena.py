@@ -13,6 +13,7 @@
 import os
 import sys
 import json
+import math
 import threading
 import time
 from datetime import datetime, timedelta
@@ -25,7 +26,7 @@ import numpy as np
 # 添加父目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data_fetchers.okx_fetcher import OKXFetcher
+from data_fetchers.okx_fetcher import OKXFetcher, TIMEFRAME_HOURS
 from data_fetchers.historical_data_manager import HistoricalDataManager
 from strategies.rsi_strategy import RSIStrategy
 from strategies.macd_strategy import MACDStrategy
@@ -228,12 +229,52 @@ class StrategyArena:
         elif strategy_type == StrategyType.VOLATILITY_HARVEST:
             return VolatilityHarvestStrategy(params=params)
         elif strategy_type == StrategyType.TREND_BREAKOUT:
-            return TrendBreakoutStrategy(params=params)
+            # 日线高低点按竞技场的K线周期换算
+            return TrendBreakoutStrategy(params={'timeframe': self.config.timeframe, **params})
+
+    def signal_lookback_days(self, bars: int = 1) -> int:
+        """
+        计算末尾bars根K线的信号所需加载的天数
+
+        按各策略当前参数的最大预热期（required_lookback）加上bars根K线换算，
+        另留1天余量（末尾未收盘的K线、数据缺口）。带持仓状态机的策略在加载的全部K线上计算，
+        预热期之后的K线用于让状态机与实际持仓同步
+
+        Args:
+            bars: 需要信号的末尾K线数
+
+        Returns:
+            天数
+        """
+        lookback = max(self.get_strategy_instance(t).required_lookback() for t in self.strategies)
+        hours = (lookback + bars) * TIMEFRAME_HOURS.get(self.config.timeframe, 1)
+        return math.ceil(hours / 24) + 1
+
+    def latest_signals(self, df: pd.DataFrame, bars: int = 1) -> Dict[StrategyType, pd.Series]:
+        """
+        所有策略末尾bars根K线的信号
+
+        各策略在加载的K线（signal_lookback_days()天，已覆盖最长预热期）上直接计算信号。
+        竞技场含带状态机的策略，共用特征图（shared_latest_signals）同样要在全部K线上计算，
+        基准中与直接计算耗时相当（开销在各策略的DataFrame操作而非指标），因此不走特征图
+
+        Args:
+            df: K线数据
+            bars: 需要信号的末尾K线数
+
+        Returns:
+            {策略类型: signal序列}
+        """
+        first = max(len(df) - bars, 0)
+        return {t: self.get_strategy_instance(t).compute_signals(df)['signal'].iloc[first:]
+                for t in self.strategies}
 
     def get_current_signals(self) -> Dict[StrategyType, int]:
         """
         获取所有策略的当前信号
 
+        只加载各策略预热期所需的末尾K线
+
         Returns:
             {策略类型: 信号值}，信号值：1=买入, -1=卖出, 0=持有
         """
@@ -241,7 +282,7 @@ class StrategyArena:
         df = self.data_manager.get_latest_data_for_backtest(
             symbol=self.config.symbol,
             timeframe=self.config.timeframe,
-            days=30,  # 获取30天数据用于计算指标
+            days=self.signal_lookback_days(),
             auto_update=True
         )
 
@@ -252,12 +293,9 @@ class StrategyArena:
         signals = {}
         current_bar_time = df['timestamp'].iloc[-1]
 
-        for strategy_type in self.strategies:
-            strategy = self.get_strategy_instance(strategy_type)
-            df_signals = strategy.generate_signals(df.copy())
-
-            # 获取最新信号
-            latest_signal = int(df_signals['signal'].iloc[-1])
+        # 获取最新信号（只加载了最长预热期+最新一根K线所需的数据）
+        for strategy_type, signal in self.latest_signals(df).items():
+            latest_signal = int(signal.iloc[-1])
             signals[strategy_type] = latest_signal
 
             # 更新状态
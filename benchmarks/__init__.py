@@ -0,0 +1,4 @@
+"""
+性能基准
+合成K线生成器和回测热点路径的计时脚本
+"""
@@ -0,0 +1,183 @@
+"""
+指标库微基准
+在合成K线上对比backend.indicators内核与原先分散在策略/行情模块中的pandas写法，
+同时校验两者结果一致，结果可写入JSON
+
+用法：
+    python -m benchmarks.indicator_benchmarks --bars 1000000 --output indicator_bench.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from benchmarks.synthetic import synthetic_ohlcv
+from backend import indicators
+
+
+# ----------------------------------------------------------------------
+# 原pandas写法（对照基准）
+# ----------------------------------------------------------------------
+
+def _pandas_rsi(close: pd.Series, period: int) -> pd.Series:
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def _pandas_true_range(df: pd.DataFrame) -> pd.Series:
+    tr1 = df['high'] - df['low']
+    tr2 = abs(df['high'] - df['close'].shift(1))
+    tr3 = abs(df['low'] - df['close'].shift(1))
+    return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+
+def _pandas_macd(close: pd.Series) -> pd.Series:
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    return macd - macd.ewm(span=9, adjust=False).mean()
+
+
+def _pandas_bollinger(close: pd.Series, window: int) -> pd.Series:
+    middle = close.rolling(window=window).mean()
+    return middle + close.rolling(window=window).std() * 2
+
+
+def _pandas_linreg(series: pd.Series, n: int) -> pd.Series:
+    y = series.astype(np.float64)
+    position = np.arange(len(y), dtype=np.float64)
+    sum_y = y.rolling(window=n).sum()
+    sum_xy = (y * position).rolling(window=n).sum() - (position - (n - 1)) * sum_y
+    x_mean = (n - 1) / 2
+    slope = (sum_xy - x_mean * sum_y) / (n * (n * n - 1) / 12)
+    return sum_y / n + slope * (n - 1 - x_mean)
+
+
+def _pandas_indicator_frame(df: pd.DataFrame) -> np.ndarray:
+    """原OKXFetcher.calculate_indicators的全部列"""
+    close = df['close']
+    bb_std = close.rolling(window=20).std()
+    sma = close.rolling(window=20).mean()
+    return np.vstack([
+        _pandas_rsi(close, 14), _pandas_macd(close), sma + bb_std * 2, sma - bb_std * 2,
+        df['volume'].rolling(window=20).mean(),
+    ])
+
+
+def _kernel_indicator_frame(df: pd.DataFrame) -> np.ndarray:
+    close = df['close'].to_numpy()
+    bands = indicators.bollinger_bands(close, 20, num_std=2)
+    return np.vstack([
+        indicators.rsi(close, 14), indicators.macd(close)['hist'], bands['upper'], bands['lower'],
+        indicators.rolling_mean(df['volume'].to_numpy(), 20),
+    ])
+
+
+# 基准名 -> (pandas写法, 指标库内核)，两者输出应一致
+CASES: Dict[str, Tuple[Callable, Callable]] = {
+    'rsi_14': (lambda df: _pandas_rsi(df['close'], 14),
+               lambda df: indicators.rsi(df['close'].to_numpy(), 14)),
+    'rsi_7_14_21': (lambda df: np.vstack([_pandas_rsi(df['close'], p) for p in (7, 14, 21)]),
+                    lambda df: indicators.rsi(df['close'].to_numpy(), [7, 14, 21])),
+    'macd_12_26_9': (lambda df: _pandas_macd(df['close']),
+                     lambda df: indicators.macd(df['close'].to_numpy())['hist']),
+    'bollinger_20': (lambda df: _pandas_bollinger(df['close'], 20),
+                     lambda df: indicators.bollinger_bands(df['close'].to_numpy(), 20)['upper']),
+    'true_range': (_pandas_true_range,
+                   lambda df: indicators.true_range(df['high'].to_numpy(), df['low'].to_numpy(),
+                                                    df['close'].to_numpy())),
+    'atr_20_185': (lambda df: np.vstack([_pandas_true_range(df).ewm(span=p, adjust=False).mean()
+                                         for p in (20, 185)]),
+                   lambda df: indicators.atr(df['high'].to_numpy(), df['low'].to_numpy(),
+                                             df['close'].to_numpy(), [20, 185])),
+    'rolling_max_18_157': (lambda df: np.vstack([df['high'].rolling(window=w).max() for w in (18, 157)]),
+                           lambda df: indicators.rolling_max(df['high'].to_numpy(), [18, 157])),
+    'rolling_min_18': (lambda df: df['low'].rolling(window=18).min(),
+                       lambda df: indicators.rolling_min(df['low'].to_numpy(), 18)),
+    'linreg_102': (lambda df: _pandas_linreg(df['close'], 102),
+                   lambda df: indicators.rolling_linreg(df['close'].to_numpy(), 102)),
+    'indicator_frame': (_pandas_indicator_frame, _kernel_indicator_frame),
+}
+
+
+def _best_time(func: Callable, df: pd.DataFrame, repeat: int) -> Tuple[float, np.ndarray]:
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        best = min(best, time.perf_counter() - start)
+    return best, np.asarray(result, dtype=np.float64)
+
+
+def run_suite(n_bars: int = 1_000_000, repeat: int = 3, seed: int = 0,
+              cases: Optional[Sequence[str]] = None) -> List[Dict]:
+    """
+    运行微基准
+
+    Args:
+        n_bars: K线数
+        repeat: 每项重复次数（记录最短耗时）
+        seed: 合成K线的随机种子
+        cases: 要运行的基准名（CASES的键，默认全部）
+
+    Returns:
+        每项一条记录：pandas / 内核耗时、加速比和两者的最大相对误差
+    """
+    df = synthetic_ohlcv(n_bars, seed=seed, freq='1min')
+    results = []
+    for name in cases or CASES:
+        legacy, kernel = CASES[name]
+        legacy_s, expected = _best_time(legacy, df, repeat)
+        kernel_s, actual = _best_time(kernel, df, repeat)
+        if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+            raise AssertionError(f"{name}: NaN位置与pandas写法不一致")
+        valid = ~np.isnan(expected)
+        scale = np.maximum(np.abs(expected[valid]), 1e-12)
+        max_rel_error = float(np.max(np.abs(actual[valid] - expected[valid]) / scale)) if valid.any() else 0.0
+        results.append({
+            'case': name,
+            'n_bars': n_bars,
+            'pandas_s': legacy_s,
+            'kernel_s': kernel_s,
+            'speedup': legacy_s / kernel_s if kernel_s > 0 else float('inf'),
+            'max_rel_error': max_rel_error,
+        })
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="指标库微基准（对比原pandas写法）")
+    parser.add_argument('--bars', type=int, default=1_000_000, help="K线数")
+    parser.add_argument('--repeat', type=int, default=3, help="每项重复次数")
+    parser.add_argument('--seed', type=int, default=0, help="合成K线随机种子")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--output', default=None, help="JSON结果文件")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.bars, args.repeat, args.seed, args.cases)
+
+    print(f"\n{'基准':<22}{'pandas(s)':>12}{'内核(s)':>12}{'加速比':>10}{'最大相对误差':>16}")
+    for r in results:
+        print(f"{r['case']:<22}{r['pandas_s']:>12.4f}{r['kernel_s']:>12.4f}"
+              f"{r['speedup']:>10.2f}{r['max_rel_error']:>16.2e}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
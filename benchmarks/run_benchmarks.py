@@ -0,0 +1,265 @@
+"""
+回测性能基准
+在合成K线上计时各策略的generate_signals、BacktestEngine.run_backtest、optimize_params、
+竞技场一轮的最新信号以及ArenaPersistence.generate_net_value_history，完全离线运行，结果写入JSON，
+可与基线结果对比发现热点路径的性能回退
+
+用法：
+    python -m benchmarks.run_benchmarks --bars 1000000 --output bench_results.json
+    python -m benchmarks.run_benchmarks --baseline bench_results.json --tolerance 1.3
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from benchmarks.synthetic import synthetic_ohlcv
+from backend.strategies import (
+    RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+    VolatilityHarvestStrategy, TrendBreakoutStrategy, BacktestEngine
+)
+from backend.strategies.indicator_cache import get_indicator_cache
+from backend.strategies.feature_graph import shared_latest_signals
+from backend.strategies.numba_support import NUMBA_AVAILABLE
+
+# 信号/回测/优化基准的合成K线周期：策略只看K线序列，用1分钟周期使千万根K线仍在pandas时间戳范围内
+BENCH_FREQ = '1min'
+
+BENCHMARKS = ('generate_signals', 'run_backtest', 'optimize_params', 'latest_signals', 'net_value_history')
+
+# 策略类及optimize_params使用的参数网格
+STRATEGIES = {
+    'RSI': (RSIStrategy, {'rsi_period': [7, 14, 21], 'oversold_threshold': [25, 30],
+                          'overbought_threshold': [70, 75]}),
+    'MACD': (MACDStrategy, {'fast_period': [8, 12], 'slow_period': [21, 26], 'signal_period': [7, 9]}),
+    'BollingerBands': (BollingerBandsStrategy, {'bb_period': [14, 20, 30], 'bb_std': [1.5, 2.0, 2.5]}),
+    'VolatilityHarvest': (VolatilityHarvestStrategy, {'atr_period': [14, 20], 'atr_multiplier': [3.5, 4.5],
+                                                      'profit_target_pct': [1.0, 1.3]}),
+    'TrendBreakout': (TrendBreakoutStrategy, {'linreg_period': [60, 102], 'price_entry_mult': [0.3, 0.5],
+                                              'stop_loss_pct': [1.5, 1.8]}),
+}
+
+
+# 竞技场一轮中的策略（5种策略及只改阈值/倍数的变体）
+ARENA_STRATEGIES = [
+    (RSIStrategy, {}), (RSIStrategy, {'oversold_threshold': 20, 'overbought_threshold': 80}),
+    (MACDStrategy, {}), (MACDStrategy, {'fast_period': 8}),
+    (BollingerBandsStrategy, {}), (BollingerBandsStrategy, {'bb_std': 2.5}),
+    (VolatilityHarvestStrategy, {}), (VolatilityHarvestStrategy, {'atr_multiplier': 3.0}),
+    (TrendBreakoutStrategy, {}), (TrendBreakoutStrategy, {'price_entry_mult': 0.3}),
+]
+
+# 最新信号的计算方式：在全部K线上逐个compute_signals、逐个latest_signals、shared_latest_signals
+LATEST_SIGNAL_MODES: Dict[str, Callable] = {
+    'full_history': lambda strategies, df: [s.compute_signals(df)['signal'].iloc[-1:] for s in strategies],
+    'per_strategy': lambda strategies, df: [s.latest_signals(df) for s in strategies],
+    'shared': lambda strategies, df: shared_latest_signals(strategies, df),
+}
+
+
+def _time(func: Callable, repeat: int) -> List[float]:
+    """重复计时（每次前清空指标缓存，测量无缓存命中的耗时）"""
+    durations = []
+    for _ in range(repeat):
+        get_indicator_cache().clear()
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _record(benchmark: str, strategy: str, n_bars: int, durations: List[float]) -> Dict:
+    best = min(durations)
+    return {
+        'benchmark': benchmark,
+        'strategy': strategy,
+        'n_bars': n_bars,
+        'repeat': len(durations),
+        'best_s': best,
+        'median_s': float(np.median(durations)),
+        'bars_per_s': n_bars / best if best > 0 else float('inf'),
+    }
+
+
+def _net_value_history(n_bars: int, seed: int, repeat: int) -> List[float]:
+    """
+    在临时目录中构建竞技场和K线库后计时generate_net_value_history
+
+    竞技场各组件在当前目录下创建SQLite文件，计时期间切换到临时目录，不影响工作目录。
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            from backend.trading.strategy_arena import StrategyArena, ArenaConfig
+            from backend.trading.arena_persistence import ArenaPersistence
+            from backend.data_fetchers.historical_data_manager import HistoricalDataManager
+
+            config = ArenaConfig(live_trading=False)
+            arena = StrategyArena(config)
+            persistence = ArenaPersistence(db_path=os.path.join(tmp, 'arena.db'))
+            persistence.data_manager = HistoricalDataManager(db_path=os.path.join(tmp, 'klines.db'))
+
+            end = pd.Timestamp(datetime.now()).floor('4h') - pd.Timedelta(hours=4)
+            df = synthetic_ohlcv(n_bars, seed=seed, freq='4h', end=end)
+            persistence.data_manager.save_klines(df, config.symbol, config.timeframe)
+            start_date = (df['timestamp'].iloc[0] + timedelta(days=1)).strftime('%Y-%m-%d')
+
+            return _time(lambda: persistence.generate_net_value_history(arena, start_date_str=start_date),
+                         repeat)
+        finally:
+            os.chdir(cwd)
+
+
+def run_suite(n_bars: int = 100_000, repeat: int = 3, seed: int = 0,
+              benchmarks: Sequence[str] = BENCHMARKS, strategies: Optional[Sequence[str]] = None,
+              optimize_bars: Optional[int] = None, net_value_bars: int = 5000,
+              latest_bars: int = 2000) -> List[Dict]:
+    """
+    运行基准
+
+    Args:
+        n_bars: generate_signals / run_backtest 使用的K线数（BENCH_FREQ周期，可达千万根）
+        repeat: 每项重复次数（记录最短和中位耗时）
+        seed: 合成K线的随机种子
+        benchmarks: 要运行的基准项
+        strategies: 策略名列表（STRATEGIES的键，默认全部）
+        optimize_bars: optimize_params使用的K线数（默认min(n_bars, 20000)）
+        net_value_bars: generate_net_value_history使用的4H K线数
+            （时间截至当前，受pandas时间范围限制不宜超过约80万根）
+        latest_bars: 竞技场最新信号基准加载的K线数（每种计算方式一条记录，结果相同）
+
+    Returns:
+        每项一条记录的列表
+    """
+    strategies = list(strategies or STRATEGIES)
+    optimize_bars = optimize_bars or min(n_bars, 20_000)
+    results = []
+
+    if 'generate_signals' in benchmarks or 'run_backtest' in benchmarks:
+        df = synthetic_ohlcv(n_bars, seed=seed, freq=BENCH_FREQ)
+        engine = BacktestEngine()
+        for name in strategies:
+            strategy = STRATEGIES[name][0]()
+            if 'generate_signals' in benchmarks:
+                results.append(_record('generate_signals', name, n_bars,
+                                       _time(lambda: strategy.generate_signals(df), repeat)))
+            if 'run_backtest' in benchmarks:
+                results.append(_record('run_backtest', name, n_bars,
+                                       _time(lambda: engine.run_backtest(strategy, df), repeat)))
+        del df
+
+    if 'optimize_params' in benchmarks:
+        df = synthetic_ohlcv(optimize_bars, seed=seed, freq=BENCH_FREQ)
+        for name in strategies:
+            strategy_cls, grid = STRATEGIES[name]
+            results.append(_record('optimize_params', name, optimize_bars,
+                                   _time(lambda: strategy_cls().optimize_params(df, grid), repeat)))
+
+    if 'latest_signals' in benchmarks:
+        df = synthetic_ohlcv(latest_bars, seed=seed)
+        arena = [strategy_cls(params) for strategy_cls, params in ARENA_STRATEGIES]
+        expected = [s.iloc[-1] for s in LATEST_SIGNAL_MODES['full_history'](arena, df)]
+        for mode, func in LATEST_SIGNAL_MODES.items():
+            if [s.iloc[-1] for s in func(arena, df)] != expected:
+                raise AssertionError(f"latest_signals {mode}: 最新信号与完整历史不一致")
+            results.append(_record('latest_signals', mode, latest_bars,
+                                   _time(lambda: func(arena, df), repeat)))
+
+    if 'net_value_history' in benchmarks:
+        results.append(_record('net_value_history', 'arena', net_value_bars,
+                               _net_value_history(net_value_bars, seed, repeat)))
+
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float = 1.3) -> List[Dict]:
+    """
+    与基线对比
+
+    Args:
+        results: 本次结果
+        baseline: 基线结果（同一台机器上的历史输出）
+        tolerance: 允许的耗时倍数
+
+    Returns:
+        最短耗时超过 基线 × tolerance 的记录（附ratio）
+    """
+    reference = {(r['benchmark'], r['strategy'], r['n_bars']): r['best_s'] for r in baseline}
+    regressions = []
+    for record in results:
+        key = (record['benchmark'], record['strategy'], record['n_bars'])
+        if key in reference and reference[key] > 0:
+            ratio = record['best_s'] / reference[key]
+            if ratio > tolerance:
+                regressions.append({**record, 'baseline_s': reference[key], 'ratio': ratio})
+    return regressions
+
+
+def _environment() -> Dict:
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'numba': NUMBA_AVAILABLE,
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="回测性能基准（合成K线，离线运行）")
+    parser.add_argument('--bars', type=int, default=100_000, help="信号/回测基准的K线数（可达10000000）")
+    parser.add_argument('--repeat', type=int, default=3, help="每项重复次数")
+    parser.add_argument('--seed', type=int, default=0, help="合成K线随机种子")
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--optimize-bars', type=int, default=None, help="参数优化基准的K线数")
+    parser.add_argument('--net-value-bars', type=int, default=5000, help="净值曲线基准的4H K线数")
+    parser.add_argument('--latest-bars', type=int, default=2000, help="竞技场最新信号基准的K线数")
+    parser.add_argument('--output', default='bench_results.json', help="JSON结果文件")
+    parser.add_argument('--baseline', default=None, help="对比的基线JSON文件")
+    parser.add_argument('--tolerance', type=float, default=1.3, help="允许相对基线变慢的倍数")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.bars, args.repeat, args.seed, args.benchmarks, args.strategies,
+                        args.optimize_bars, args.net_value_bars, args.latest_bars)
+
+    print(f"\n{'基准':<20}{'策略':<20}{'K线数':>12}{'最短(s)':>12}{'中位(s)':>12}{'K线/秒':>14}")
+    for r in results:
+        print(f"{r['benchmark']:<20}{r['strategy']:<20}{r['n_bars']:>12}"
+              f"{r['best_s']:>12.4f}{r['median_s']:>12.4f}{r['bars_per_s']:>14.0f}")
+
+    output = {'environment': _environment(), 'results': results}
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        output['regressions'] = regressions
+        for r in regressions:
+            print(f"⚠️  性能回退: {r['benchmark']} {r['strategy']} "
+                  f"{r['best_s']:.4f}s vs 基线 {r['baseline_s']:.4f}s (×{r['ratio']:.2f})")
+        exit_code = 1 if regressions else 0
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1104,7 +1104,9 @@ elif page == "💰 交易记录":
                 # 使用回测数据生成完整的历史净值曲线
                 try:
                     with st.spinner("正在生成净值曲线..."):
-                        net_value_df = persistence.generate_net_value_history(arena, start_date_str="2026-01-01")
+                        net_value_df = persistence.generate_net_value_history(
+                            arena, start_date_str="2026-01-01", rolling_window=42
+                        )
 
                     if not net_value_df.empty:
                         import plotly.express as px
@@ -1155,6 +1157,26 @@ elif page == "💰 交易记录":
 
                         st.plotly_chart(fig, use_container_width=True)
 
+                        # 滚动夏普 / 滚动回撤（窗口42根4H K线，约7天）
+                        rolling_col1, rolling_col2 = st.columns(2)
+                        with rolling_col1:
+                            fig_sharpe = px.line(
+                                net_value_df, x='timestamp', y='rolling_sharpe', color='strategy',
+                                title='滚动夏普比率 (7天)',
+                                labels={'timestamp': '时间', 'rolling_sharpe': '夏普比率', 'strategy': '策略'}
+                            )
+                            fig_sharpe.update_layout(hovermode="x unified", height=350)
+                            st.plotly_chart(fig_sharpe, use_container_width=True)
+                        with rolling_col2:
+                            fig_drawdown = px.line(
+                                net_value_df.assign(drawdown=net_value_df['drawdown'] * 100),
+                                x='timestamp', y='drawdown', color='strategy',
+                                title='滚动回撤 (7天)',
+                                labels={'timestamp': '时间', 'drawdown': '回撤 (%)', 'strategy': '策略'}
+                            )
+                            fig_drawdown.update_layout(hovermode="x unified", height=350)
+                            st.plotly_chart(fig_drawdown, use_container_width=True)
+
                         # 显示各策略最新净值和收益率
                         st.markdown("**各策略最新净值:**")
                         latest_values = net_value_df.groupby('strategy').last().reset_index()
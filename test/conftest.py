@@ -0,0 +1,60 @@
+"""
+测试公用的模拟K线
+各测试文件直接导入make_klines（以便用 python test/test_xxx.py 单独运行），
+pytest下也可通过make_klines夹具取得同一个函数
+"""
+
+from datetime import datetime
+from typing import Optional
+
+import pytest
+import pandas as pd
+import numpy as np
+
+
+def make_klines(n_bars: int, seed: int = 42, freq: str = '4h', start: Optional[datetime] = None,
+                base_price: float = 50000.0, drift: float = 0.0005, volatility: float = 0.02,
+                mean_reversion: float = 0.0, reversion_volatility: float = 0.01) -> pd.DataFrame:
+    """
+    生成模拟BTC K线
+
+    收盘价为随机游走（每根K线收益率 ~ N(drift, volatility²)），开高低在收盘价上加均匀噪声。
+    mean_reversion > 0 时再叠加均值回归的对数偏离 d_t = (1 - mean_reversion)·d_{t-1} + ε_t，
+    ε ~ N(0, reversion_volatility²)，参数优劣在不同区间上较稳定（用于参数搜索的测试）
+
+    Args:
+        n_bars: K线数
+        seed: 随机种子
+        freq: K线周期（pandas频率字符串）
+        start: 第一根K线的时间（默认2024-01-01）
+        base_price: 起始价格
+        drift: 每根K线收益率均值
+        volatility: 每根K线收益率标准差
+        mean_reversion: 偏离的均值回归系数（0为纯随机游走）
+        reversion_volatility: 偏离的噪声标准差
+
+    Returns:
+        包含 timestamp, open, high, low, close, volume 的DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    prices = base_price * np.cumprod(1 + rng.normal(drift, volatility, n_bars))
+    if mean_reversion > 0:
+        noise = rng.normal(0, reversion_volatility, n_bars)
+        deviation = np.zeros(n_bars)
+        for i in range(1, n_bars):
+            deviation[i] = (1 - mean_reversion) * deviation[i - 1] + noise[i]
+        prices = prices * np.exp(deviation)
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start=start or datetime(2024, 1, 1), periods=n_bars, freq=freq),
+        'open': prices * (1 + rng.uniform(-0.005, 0.005, n_bars)),
+        'high': prices * (1 + rng.uniform(0, 0.02, n_bars)),
+        'low': prices * (1 - rng.uniform(0, 0.02, n_bars)),
+        'close': prices,
+        'volume': rng.uniform(100, 1000, n_bars),
+    })
+
+
+@pytest.fixture(name='make_klines')
+def make_klines_fixture():
+    """模拟K线生成函数"""
+    return make_klines
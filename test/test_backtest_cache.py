@@ -0,0 +1,138 @@
+"""
+测试回测结果缓存
+验证命中、参数规范化、新K线只清理重叠窗口和LRU淘汰
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def test_repeated_backtest_hits_cache(tmp_path):
+    """相同窗口、策略和参数的第二次回测命中缓存，结果与首次一致"""
+    from backend.data_fetchers.backtest_cache import BacktestCache
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    cache = BacktestCache(db_path=str(tmp_path / "cache.db"))
+    engine = BacktestEngine(initial_capital=10000)
+    df = make_klines(540, seed=1)
+
+    first = cache.run_backtest(engine, RSIStrategy({'rsi_period': 10}), df, "BTC-USDT", "4H")
+    second = cache.run_backtest(engine, RSIStrategy({'rsi_period': 10}), df, "BTC-USDT", "4H")
+
+    assert not first['cached'] and second['cached']
+    assert (cache.hits, cache.misses) == (1, 1)
+    for key, value in first['metrics'].items():
+        assert np.isclose(second['metrics'][key], value, equal_nan=True), key
+    np.testing.assert_array_equal(second['equity'].to_numpy(), first['data']['capital'].to_numpy())
+    assert second['equity'].index.equals(first['equity'].index)
+    for name in first['trades'].dtype.names:
+        np.testing.assert_array_equal(second['trades'][name], first['trades'][name])
+
+
+def test_cache_key_components(tmp_path):
+    """参数顺序不影响键；策略、参数、交易对、新K线都会改变键"""
+    from backend.data_fetchers.backtest_cache import BacktestCache
+    from backend.strategies import RSIStrategy, MACDStrategy
+
+    cache = BacktestCache(db_path=str(tmp_path / "cache.db"))
+    df = make_klines(300, seed=2)
+    params = {'rsi_period': 14, 'oversold_threshold': 30, 'overbought_threshold': 70}
+    reordered = dict(reversed(list(params.items())))
+
+    base = cache.make_key("BTC-USDT", "4H", df, RSIStrategy(params), 10000, 0.001)
+    assert base == cache.make_key("BTC-USDT", "4H", df, RSIStrategy(reordered), 10000, 0.001)
+    assert base == cache.make_key("BTC-USDT", "4H", df, RSIStrategy({'rsi_period': np.int64(14)}), 10000, 0.001)
+
+    assert base != cache.make_key("ETH-USDT", "4H", df, RSIStrategy(params), 10000, 0.001)
+    assert base != cache.make_key("BTC-USDT", "4H", df, RSIStrategy({'rsi_period': 15}), 10000, 0.001)
+    assert base != cache.make_key("BTC-USDT", "4H", df, MACDStrategy(), 10000, 0.001)
+    assert base != cache.make_key("BTC-USDT", "4H", df.iloc[1:], RSIStrategy(params), 10000, 0.001)
+
+    # 最后一根K线被修正（如未收盘K线更新）时不再命中
+    revised = df.copy()
+    revised.loc[revised.index[-1], 'close'] *= 1.001
+    assert base != cache.make_key("BTC-USDT", "4H", revised, RSIStrategy(params), 10000, 0.001)
+
+
+def test_appended_bars_keep_historical_cache(tmp_path):
+    """追加更晚的K线后，历史窗口的缓存仍然命中；新窗口不命中"""
+    from backend.data_fetchers.historical_data_manager import HistoricalDataManager
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    manager = HistoricalDataManager(db_path=str(tmp_path / "klines.db"))
+    df = make_klines(400, seed=3)
+    manager.save_klines(df.iloc[:300], "BTC-USDT", "4H")
+
+    engine = BacktestEngine()
+    window = manager.load_klines("BTC-USDT", "4H")
+    manager.backtest_cache.run_backtest(engine, RSIStrategy(), window, "BTC-USDT", "4H")
+
+    manager.save_klines(df.iloc[300:], "BTC-USDT", "4H")
+    assert manager.backtest_cache.run_backtest(engine, RSIStrategy(), window, "BTC-USDT", "4H")['cached']
+
+    window = manager.load_klines("BTC-USDT", "4H")
+    assert not manager.backtest_cache.run_backtest(engine, RSIStrategy(), window, "BTC-USDT", "4H")['cached']
+
+
+def test_overlapping_bars_invalidate_cache(tmp_path):
+    """补齐窗口内的缺口后，区间与其重叠的缓存被清理，不重叠的窗口保留"""
+    from backend.data_fetchers.historical_data_manager import HistoricalDataManager
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    manager = HistoricalDataManager(db_path=str(tmp_path / "klines.db"))
+    cache = manager.backtest_cache
+    df = make_klines(400, seed=5)
+    gap = df.iloc[250:260]
+    manager.save_klines(df.drop(gap.index), "BTC-USDT", "4H")
+
+    engine = BacktestEngine()
+    early = manager.load_klines("BTC-USDT", "4H", end_time=df['timestamp'].iloc[199])
+    spanning = manager.load_klines("BTC-USDT", "4H")
+    for window in [early, spanning]:
+        cache.run_backtest(engine, RSIStrategy(), window, "BTC-USDT", "4H")
+
+    assert manager.save_klines(gap, "BTC-USDT", "4H") == len(gap)
+    assert cache.run_backtest(engine, RSIStrategy(), early, "BTC-USDT", "4H")['cached']
+    assert not cache.run_backtest(engine, RSIStrategy(), spanning, "BTC-USDT", "4H")['cached']
+
+    # 重复写入已有K线不清理任何条目
+    manager.save_klines(df, "BTC-USDT", "4H")
+    assert cache.run_backtest(engine, RSIStrategy(), spanning, "BTC-USDT", "4H")['cached']
+
+
+def test_lru_eviction(tmp_path):
+    """超过条目上限时淘汰最久未访问的结果"""
+    from backend.data_fetchers.backtest_cache import BacktestCache
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    cache = BacktestCache(db_path=str(tmp_path / "cache.db"), max_entries=2)
+    engine = BacktestEngine()
+    df = make_klines(300, seed=4)
+
+    def run(period):
+        return cache.run_backtest(engine, RSIStrategy({'rsi_period': period}), df, "BTC-USDT", "4H")['cached']
+
+    run(7)
+    run(14)
+    assert run(7)  # 访问7，使14成为最久未访问
+    run(21)  # 淘汰14
+    assert run(7)
+    assert not run(14)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in [test_repeated_backtest_hits_cache, test_cache_key_components,
+                 test_appended_bars_keep_historical_cache, test_overlapping_bars_invalidate_cache,
+                 test_lru_eviction]:
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
@@ -0,0 +1,346 @@
+"""
+测试回测引擎
+验证基于数组的撮合核心与原逐K线循环结果完全一致
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _legacy_simulate_trading(df: pd.DataFrame, initial_capital: float, commission: float):
+    """原逐K线撮合实现（作为对照基准）"""
+    df = df.copy()
+    df['position'] = 0.0
+    df['cash'] = float(initial_capital)
+    df['holdings'] = 0.0
+    df['capital'] = float(initial_capital)
+    df['trade'] = 0
+
+    position = 0.0
+    cash = initial_capital
+    trades = []
+
+    for i in range(1, len(df)):
+        signal = df.iloc[i]['signal']
+        price = df.iloc[i]['close']
+        timestamp = df.iloc[i]['timestamp']
+
+        if signal == 1 and position == 0:
+            position = cash / price * (1 - commission)
+            cash = 0
+            df.iloc[i, df.columns.get_loc('trade')] = 1
+            trades.append({'timestamp': timestamp, 'type': 'BUY', 'price': price,
+                           'amount': position, 'value': position * price})
+        elif signal == -1 and position > 0:
+            cash = position * price * (1 - commission)
+            buy_trade = trades[-1] if trades else None
+            profit = cash - buy_trade['value'] if buy_trade else 0
+            profit_pct = (profit / buy_trade['value']) * 100 if buy_trade else 0
+            trades.append({'timestamp': timestamp, 'type': 'SELL', 'price': price,
+                           'amount': position, 'value': cash,
+                           'profit': profit, 'profit_pct': profit_pct})
+            position = 0
+            df.iloc[i, df.columns.get_loc('trade')] = -1
+
+        df.iloc[i, df.columns.get_loc('position')] = position
+        df.iloc[i, df.columns.get_loc('cash')] = cash
+        df.iloc[i, df.columns.get_loc('holdings')] = position * price
+        df.iloc[i, df.columns.get_loc('capital')] = cash + position * price
+
+    return df, trades
+
+
+def test_simulate_trading_matches_legacy():
+    """数组撮合核心与原实现逐列、逐笔一致"""
+    print("=" * 60)
+    print("测试数组撮合核心与原实现一致")
+    print("=" * 60)
+
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+        VolatilityHarvestStrategy, BacktestEngine
+    )
+
+    df = make_klines(1500)
+    engine = BacktestEngine(initial_capital=10000, commission=0.001)
+
+    for strategy in [RSIStrategy(), MACDStrategy(), BollingerBandsStrategy(), VolatilityHarvestStrategy()]:
+        df_signals = strategy.generate_signals(df)
+
+        result, trades = engine._simulate_trading(df_signals)
+        expected, expected_trades = _legacy_simulate_trading(
+            df_signals, engine.initial_capital, engine.commission
+        )
+
+        for col in ['position', 'cash', 'holdings', 'capital', 'trade']:
+            np.testing.assert_array_equal(result[col].to_numpy(), expected[col].to_numpy(),
+                                          err_msg=f"{strategy.name} {col} 不一致")
+
+        assert len(trades) == len(expected_trades), f"{strategy.name} 交易笔数不一致"
+        for row, expected_trade in zip(trades, expected_trades):
+            assert row['timestamp'] == np.datetime64(expected_trade['timestamp'])
+            assert row['side'] == (1 if expected_trade['type'] == 'BUY' else -1)
+            for key in ['price', 'amount', 'value']:
+                assert row[key] == expected_trade[key], f"{strategy.name} {key} 不一致"
+        print(f"   {strategy.name}: {len(trades)} 笔交易，结果一致")
+
+
+def test_simulate_trading_edge_cases():
+    """空信号、首根K线信号等边界情况"""
+    from backend.strategies import BacktestEngine
+
+    df = make_klines(50)
+    engine = BacktestEngine(initial_capital=10000)
+
+    # 无信号：权益保持初始资金
+    df['signal'] = 0
+    result, trades = engine._simulate_trading(df)
+    assert (result['capital'] == 10000).all()
+    assert len(trades) == 0
+
+    # 第0根K线的信号被忽略
+    df['signal'] = 0
+    df.loc[0, 'signal'] = 1
+    df.loc[10, 'signal'] = -1
+    result, _ = engine._simulate_trading(df)
+    assert (result['trade'] == 0).all()
+
+    # 连续重复信号只成交一次
+    df['signal'] = 0
+    df.loc[5:8, 'signal'] = 1
+    df.loc[20:22, 'signal'] = -1
+    result, _ = engine._simulate_trading(df)
+    assert result['trade'].tolist().count(1) == 1
+    assert result['trade'].tolist().count(-1) == 1
+    expected, _ = _legacy_simulate_trading(df, 10000, 0.001)
+    np.testing.assert_array_equal(result['capital'].to_numpy(), expected['capital'].to_numpy())
+
+
+def test_simulate_trading_speed():
+    """数组撮合核心相对原逐K线循环至少快50倍；50万根K线的耗时"""
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    engine = BacktestEngine(initial_capital=10000)
+
+    df = RSIStrategy().generate_signals(make_klines(2000))
+    start = time.perf_counter()
+    _legacy_simulate_trading(df, 10000, 0.001)
+    legacy = time.perf_counter() - start
+    durations = []
+    for _ in range(5):
+        start = time.perf_counter()
+        engine._simulate_trading(df)
+        durations.append(time.perf_counter() - start)
+    speedup = legacy / min(durations)
+    print(f"   2000根K线: 逐K线循环 {legacy:.3f}s，数组撮合 {min(durations):.4f}s（×{speedup:.0f}）")
+    assert speedup >= 50
+
+    df = RSIStrategy().generate_signals(make_klines(500_000))
+    start = time.perf_counter()
+    engine._simulate_trading(df)
+    elapsed = time.perf_counter() - start
+
+    print(f"   50万根K线撮合耗时: {elapsed:.3f}s")
+    assert elapsed < 10
+
+
+def test_result_keeps_kline_columns():
+    """回测结果表保留K线的全部列（与原df.copy()的结果表相同的列顺序）"""
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    df = make_klines(500, seed=5)
+    result = BacktestEngine().run_backtest(RSIStrategy(), df)['data']
+    signals = RSIStrategy().compute_signals(df)
+
+    expected = list(df.columns) + list(signals.columns) + ['position', 'cash', 'holdings', 'capital', 'trade']
+    assert list(result.columns) == expected
+    pd.testing.assert_frame_equal(result[df.columns], df)
+
+
+def test_trade_ledger_is_compact():
+    """成交明细以结构化数组返回，结果DataFrame不再逐行复制交易列表"""
+    import pickle
+    from backend.strategies import RSIStrategy, BacktestEngine
+    from backend.strategies.position_simulator import TRADE_LEDGER_DTYPE
+
+    df = make_klines(5000, seed=31)
+    result = BacktestEngine().run_backtest(RSIStrategy(), df)
+    trades, metrics = result['trades'], result['metrics']
+
+    assert trades.dtype == TRADE_LEDGER_DTYPE
+    assert 'trades_history' not in result['data'].columns
+    assert (result['data']['trade'] != 0).sum() == len(trades)
+
+    sells = trades[trades['side'] == -1]
+    assert metrics['total_trades'] == int((trades['side'] == 1).sum())
+    assert metrics['winning_trades'] + metrics['losing_trades'] == len(sells)
+    assert np.isclose(metrics['win_rate'], (sells['profit'] > 0).mean() * 100)
+    assert np.isclose(metrics['avg_trade_profit'], sells['profit'].mean())
+    assert np.isnan(trades[trades['side'] == 1]['profit']).all()
+
+    size = len(pickle.dumps(result['data'])) + len(pickle.dumps(trades))
+    print(f"   {len(trades)} 笔成交，结果序列化 {size / 1024:.0f} KB")
+
+
+def test_compute_signals_does_not_copy_input():
+    """compute_signals只返回新增列，不修改也不复制输入K线"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+        VolatilityHarvestStrategy, TrendBreakoutStrategy, BacktestEngine
+    )
+
+    df = make_klines(1000, seed=13)
+    original = df.copy()
+    engine = BacktestEngine(initial_capital=10000)
+
+    for strategy in [RSIStrategy(), MACDStrategy(), BollingerBandsStrategy(),
+                     VolatilityHarvestStrategy(), TrendBreakoutStrategy()]:
+        signals = strategy.compute_signals(df)
+        assert 'signal' in signals.columns
+        assert not set(signals.columns) & set(df.columns), f"{strategy.name} 返回了输入列"
+        assert signals.index.equals(df.index)
+        pd.testing.assert_frame_equal(df, original)
+
+        # generate_signals保持原接口：输入列+新增列
+        legacy = strategy.generate_signals(df)
+        assert list(legacy.columns) == list(df.columns) + list(signals.columns)
+
+        # 回测结果与基于generate_signals的旧流程一致
+        result = engine.run_backtest(strategy, df)
+        expected, _ = _legacy_simulate_trading(legacy, engine.initial_capital, engine.commission)
+        np.testing.assert_array_equal(result['data']['capital'].to_numpy(),
+                                      expected['capital'].to_numpy())
+
+
+def test_run_grid_matches_single_backtests():
+    """批量网格回测与逐个run_backtest的指标一致"""
+    print("\n" + "=" * 60)
+    print("测试批量网格回测")
+    print("=" * 60)
+
+    from backend.strategies import RSIStrategy, BollingerBandsStrategy, BacktestEngine
+
+    df = make_klines(2000, seed=5)
+    engine = BacktestEngine(initial_capital=10000)
+
+    cases = [
+        (RSIStrategy, {'rsi_period': [7, 14], 'oversold_threshold': [25, 30], 'overbought_threshold': [70, 75]}),
+        (BollingerBandsStrategy, {'bb_period': [15, 20], 'bb_std': [1.5, 2.0, 2.5]}),
+    ]
+
+    for strategy_cls, param_grid in cases:
+        grid = engine.run_grid(strategy_cls, df, param_grid, batch_size=3)
+        assert len(grid) == np.prod([len(v) for v in param_grid.values()])
+
+        for params, (_, row) in zip(grid[list(param_grid)].to_dict('records'), grid.iterrows()):
+            expected = engine.run_backtest(strategy_cls(params=params), df)['metrics']
+            for key in ['final_capital', 'total_return_pct', 'sharpe_ratio', 'max_drawdown_pct', 'win_rate',
+                        'avg_trade_profit', 'avg_trade_profit_pct', 'avg_daily_return']:
+                assert np.isclose(row[key], expected[key], rtol=1e-9, atol=1e-9), f"{params} {key}"
+            for key in ['total_trades', 'winning_trades', 'losing_trades', 'trading_days']:
+                assert row[key] == expected[key], f"{params} {key}"
+
+        print(f"   {strategy_cls.__name__}: {len(grid)} 组参数，指标一致")
+
+
+def test_optimize_params_uses_grid():
+    """optimize_params 返回网格中夏普比率最高的参数"""
+    from backend.strategies import MACDStrategy
+
+    df = make_klines(1500, seed=9)
+    param_grid = {'fast_period': [8, 12], 'slow_period': [21, 26], 'signal_period': [9]}
+
+    best_params, best_sharpe = MACDStrategy().optimize_params(df, param_grid)
+
+    sharpes = {}
+    for fast in param_grid['fast_period']:
+        for slow in param_grid['slow_period']:
+            strategy = MACDStrategy(params={'fast_period': fast, 'slow_period': slow, 'signal_period': 9})
+            df_test = strategy.calculate_positions(strategy.generate_signals(df))
+            sharpes[(fast, slow)] = strategy._calculate_sharpe(df_test['returns'])
+
+    expected = max(sharpes, key=sharpes.get)
+    assert (best_params['fast_period'], best_params['slow_period']) == expected
+    assert np.isclose(best_sharpe, sharpes[expected], rtol=1e-9)
+
+
+def test_lean_mode_matches_full():
+    """精简模式的权益、成交明细和指标与完整模式一致，结果表只保留必要列"""
+    from backend.strategies import VolatilityHarvestStrategy, TrendBreakoutStrategy, BacktestEngine
+
+    df = make_klines(5000, seed=8)
+    for strategy_cls in [VolatilityHarvestStrategy, TrendBreakoutStrategy]:
+        full = BacktestEngine().run_backtest(strategy_cls(), df)
+        lean = BacktestEngine(lean=True).run_backtest(strategy_cls(), df)
+
+        assert list(lean['data'].columns) == ['timestamp', 'signal', 'capital']
+        assert lean['data']['signal'].dtype == np.int8
+        np.testing.assert_array_equal(lean['data']['capital'].to_numpy(), full['data']['capital'].to_numpy())
+        for field in full['trades'].dtype.names:
+            np.testing.assert_array_equal(lean['trades'][field], full['trades'][field])
+        assert lean['metrics'] == full['metrics']
+
+        # 完整模式每根K线的内存至少是精简模式的4倍
+        full_bytes = full['data'].memory_usage(index=False).sum()
+        lean_bytes = lean['data'].memory_usage(index=False).sum()
+        assert full_bytes >= 4 * lean_bytes, f"{strategy_cls.__name__}: {full_bytes} vs {lean_bytes}"
+
+        diagnostics = BacktestEngine(lean=True, keep_diagnostics=True).run_backtest(strategy_cls(), df)['data']
+        kline_columns = set(df.columns) - {'timestamp'}
+        assert set(full['data'].columns) - kline_columns - {'position', 'cash', 'holdings', 'trade'} == \
+            set(diagnostics.columns)
+        float_columns = [c for c in diagnostics.columns if diagnostics[c].dtype.kind == 'f' and c != 'capital']
+        assert float_columns and all(diagnostics[c].dtype == np.float32 for c in float_columns)
+
+
+def test_lean_run_grid_memory():
+    """精简模式的网格回测结果与矩阵模拟一致，峰值内存至少低4倍"""
+    import tracemalloc
+    from backend.strategies import RSIStrategy, BacktestEngine
+    from backend.strategies.parallel_optimizer import ParallelOptimizer
+
+    df = make_klines(20000, seed=9)
+    param_grid = {'rsi_period': [7, 14, 21, 28], 'oversold_threshold': [20, 25, 30, 35],
+                  'overbought_threshold': [65, 70, 75, 80]}
+
+    peaks, grids = {}, {}
+    for lean in [False, True]:
+        engine = BacktestEngine(lean=lean)
+        engine.run_grid(RSIStrategy, df, param_grid)  # 预热指标缓存
+        tracemalloc.start()
+        grids[lean] = engine.run_grid(RSIStrategy, df, param_grid)
+        peaks[lean] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    print(f"   网格回测峰值内存: 完整 {peaks[False] / 1e6:.1f}MB，精简 {peaks[True] / 1e6:.1f}MB")
+    assert peaks[False] >= 4 * peaks[True]
+    assert list(grids[True].columns) == list(grids[False].columns)
+    np.testing.assert_allclose(grids[True].to_numpy(dtype=np.float64),
+                               grids[False].to_numpy(dtype=np.float64), rtol=1e-8)
+
+    parallel = ParallelOptimizer(max_workers=2, chunk_size=16, lean=True).run(RSIStrategy, df, param_grid)
+    np.testing.assert_allclose(parallel[grids[True].columns].to_numpy(dtype=np.float64),
+                               grids[True].to_numpy(dtype=np.float64))
+
+
+if __name__ == "__main__":
+    test_simulate_trading_matches_legacy()
+    test_simulate_trading_edge_cases()
+    test_simulate_trading_speed()
+    test_result_keeps_kline_columns()
+    test_trade_ledger_is_compact()
+    test_compute_signals_does_not_copy_input()
+    test_run_grid_matches_single_backtests()
+    test_optimize_params_uses_grid()
+    test_lean_mode_matches_full()
+    test_lean_run_grid_memory()
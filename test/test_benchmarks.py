@@ -0,0 +1,83 @@
+"""
+测试性能基准
+验证合成K线的确定性和形态，以及基准脚本在小规模数据上离线跑通并输出JSON
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+
+def test_synthetic_ohlcv():
+    """相同种子结果相同；OHLC关系成立；不同状态的波动率不同"""
+    from benchmarks.synthetic import synthetic_ohlcv
+
+    df = synthetic_ohlcv(20000, seed=7)
+    pd.testing.assert_frame_equal(df, synthetic_ohlcv(20000, seed=7))
+    assert not df['close'].equals(synthetic_ohlcv(20000, seed=8)['close'])
+
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    assert (df['high'] >= df[['open', 'close']].max(axis=1)).all()
+    assert (df['low'] <= df[['open', 'close']].min(axis=1)).all()
+    assert (df['volume'] > 0).all()
+    assert (df['open'].iloc[1:].to_numpy() == df['close'].iloc[:-1].to_numpy()).all()
+
+    rolling_vol = np.log(df['close']).diff().rolling(100).std().dropna()
+    assert rolling_vol.max() > 1.8 * rolling_vol.min()
+
+    end = pd.Timestamp('2026-01-01 08:00:00')
+    tail = synthetic_ohlcv(100, seed=7, end=end)
+    assert tail['timestamp'].iloc[-1] == end
+    assert (tail['timestamp'].diff().dropna() == pd.Timedelta(hours=4)).all()
+
+
+def test_timestamp_axis_holds_ten_million_bars():
+    """千万根基准K线的时间轴在pandas时间戳范围内；超出范围时先于生成价格报出明确错误"""
+    from benchmarks.synthetic import synthetic_ohlcv, timestamp_axis
+    from benchmarks.run_benchmarks import BENCH_FREQ
+
+    axis = timestamp_axis(10_000_000, BENCH_FREQ)
+    assert len(axis) == 10_000_000
+    assert axis[-1] - axis[0] == (len(axis) - 1) * pd.Timedelta(BENCH_FREQ)
+
+    try:
+        synthetic_ohlcv(10_000_000, freq='4h')
+        assert False, "千万根4H K线应报错"
+    except ValueError as e:
+        assert '时间戳范围' in str(e)
+
+
+def test_run_suite_writes_json(tmp_path):
+    """基准脚本离线跑通全部基准项，输出可解析的JSON并能与基线对比"""
+    from benchmarks.run_benchmarks import main, compare, BENCHMARKS, STRATEGIES, LATEST_SIGNAL_MODES
+
+    output = tmp_path / "bench.json"
+    argv = ['--bars', '3000', '--repeat', '1', '--optimize-bars', '1500',
+            '--net-value-bars', '600', '--latest-bars', '800', '--output', str(output)]
+    assert main(argv) == 0
+
+    results = json.loads(output.read_text(encoding='utf-8'))['results']
+    assert {r['benchmark'] for r in results} == set(BENCHMARKS)
+    assert len(results) == 3 * len(STRATEGIES) + len(LATEST_SIGNAL_MODES) + 1
+    assert all(r['best_s'] > 0 and r['bars_per_s'] > 0 for r in results)
+
+    slower = [{**r, 'best_s': r['best_s'] * 2} for r in results]
+    assert compare(results, results) == []
+    assert len(compare(slower, results, tolerance=1.5)) == len(results)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_synthetic_ohlcv()
+    test_timestamp_axis_holds_ten_million_bars()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_run_suite_writes_json(Path(tmp))
@@ -0,0 +1,132 @@
+"""
+测试分块回测
+验证从SQLite分块读取K线、跨块携带预热窗口和持仓状态后，结果与一次性回测一致
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _make_manager(tmp_path, n_bars: int = 6000):
+    from backend.data_fetchers.historical_data_manager import HistoricalDataManager
+
+    manager = HistoricalDataManager(db_path=str(tmp_path / "klines.db"))
+    manager.save_klines(make_klines(n_bars, seed=21), "BTC-USDT", "4H")
+    return manager
+
+
+def test_iter_klines_covers_range(tmp_path):
+    """分块读取按时间连续、不重不漏，并遵守起止时间"""
+    manager = _make_manager(tmp_path, n_bars=2500)
+    full = manager.load_klines("BTC-USDT", "4H")
+
+    chunks = list(manager.iter_klines("BTC-USDT", "4H", chunk_size=1000))
+    assert [len(c) for c in chunks] == [1000, 1000, 500]
+    stitched = np.concatenate([c['timestamp'].to_numpy() for c in chunks])
+    np.testing.assert_array_equal(stitched, full['timestamp'].to_numpy())
+
+    start, end = full['timestamp'].iloc[100], full['timestamp'].iloc[1999]
+    chunks = list(manager.iter_klines("BTC-USDT", "4H", start_time=start, end_time=end, chunk_size=700))
+    assert sum(len(c) for c in chunks) == 1900
+    assert chunks[0]['timestamp'].iloc[0] == start
+    assert chunks[-1]['timestamp'].iloc[-1] == end
+
+    assert list(manager.iter_klines("ETH-USDT", "4H")) == []
+
+
+def test_chunked_matches_in_memory(tmp_path):
+    """分块回测的权益曲线、成交明细和指标与一次性回测一致"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+        VolatilityHarvestStrategy, TrendBreakoutStrategy, BacktestEngine
+    )
+
+    manager = _make_manager(tmp_path)
+    df = manager.load_klines("BTC-USDT", "4H")
+    engine = BacktestEngine(initial_capital=10000)
+
+    for strategy_cls in [RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+                         VolatilityHarvestStrategy, TrendBreakoutStrategy]:
+        expected = engine.run_backtest(strategy_cls(), df)
+        chunked = engine.run_backtest_chunked(
+            strategy_cls(), manager.iter_klines("BTC-USDT", "4H", chunk_size=1500), warmup=1000
+        )
+        name = expected['strategy_name']
+
+        assert chunked['data_points'] == len(df)
+        np.testing.assert_allclose(chunked['equity'].to_numpy(),
+                                   expected['data']['capital'].to_numpy(), rtol=1e-12,
+                                   err_msg=name)
+        np.testing.assert_array_equal(chunked['equity'].index.to_numpy(), df['timestamp'].to_numpy())
+
+        assert len(chunked['trades']) == len(expected['trades']), name
+        for field in ['index', 'timestamp', 'side']:
+            np.testing.assert_array_equal(chunked['trades'][field], expected['trades'][field])
+
+        for key, value in expected['metrics'].items():
+            assert np.isclose(chunked['metrics'][key], value, rtol=1e-9, equal_nan=True), f"{name} {key}"
+        print(f"   {name}: {len(chunked['trades'])} 笔成交，分块结果一致")
+
+
+def test_chunked_carries_open_position_across_chunks(tmp_path):
+    """状态机策略的持仓跨越分块边界时，即使预热很短结果也与一次性回测一致"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+        VolatilityHarvestStrategy, TrendBreakoutStrategy, BacktestEngine
+    )
+
+    chunk_size = 700
+    manager = _make_manager(tmp_path)
+    df = manager.load_klines("BTC-USDT", "4H")
+    engine = BacktestEngine(initial_capital=10000)
+    boundaries = np.arange(chunk_size, len(df), chunk_size)
+
+    for strategy_cls in [RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+                         VolatilityHarvestStrategy, TrendBreakoutStrategy]:
+        expected = engine.run_backtest(strategy_cls(), df)
+        chunked = engine.run_backtest_chunked(
+            strategy_cls(), manager.iter_klines("BTC-USDT", "4H", chunk_size=chunk_size), warmup=5
+        )
+        name = expected['strategy_name']
+        np.testing.assert_array_equal(chunked['equity'].to_numpy(),
+                                      expected['data']['capital'].to_numpy(), err_msg=name)
+        for field in ['index', 'side', 'price']:
+            np.testing.assert_array_equal(chunked['trades'][field], expected['trades'][field])
+
+        if strategy_cls in (VolatilityHarvestStrategy, TrendBreakoutStrategy):
+            # 至少一笔持仓开在某块、平在后面的块
+            trades = chunked['trades']
+            buys = trades['index'][trades['side'] == 1]
+            sells = trades['index'][trades['side'] == -1]
+            held = [(buy < boundaries) & (boundaries <= sell) for buy, sell in zip(buys, sells)]
+            assert np.any(held), name
+
+
+def test_chunked_without_equity(tmp_path):
+    """不保留权益曲线时只返回指标和成交明细"""
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    manager = _make_manager(tmp_path, n_bars=1200)
+    engine = BacktestEngine()
+    result = engine.run_backtest_chunked(
+        RSIStrategy(), manager.iter_klines("BTC-USDT", "4H", chunk_size=500), keep_equity=False
+    )
+    assert 'equity' not in result
+    assert result['data_points'] == 1200
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in [test_iter_klines_covers_range, test_chunked_matches_in_memory,
+                 test_chunked_carries_open_position_across_chunks, test_chunked_without_equity]:
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
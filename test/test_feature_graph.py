@@ -0,0 +1,133 @@
+"""
+测试特征图
+验证多个策略声明的特征去重后只计算一次、策略计算信号时全部命中缓存且结果不变，
+以及多个策略共用一段尾部的最新信号与各策略单独计算一致
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _arena_strategies():
+    """竞技场的5种策略，外加激进/保守变体"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+        VolatilityHarvestStrategy, TrendBreakoutStrategy
+    )
+
+    return [
+        RSIStrategy(), RSIStrategy({'oversold_threshold': 20, 'overbought_threshold': 80}),
+        MACDStrategy(), MACDStrategy({'fast_period': 8}),
+        BollingerBandsStrategy(), BollingerBandsStrategy({'bb_std': 2.5}),
+        VolatilityHarvestStrategy(), VolatilityHarvestStrategy({'atr_multiplier': 3.0, 'trend_ema_period': 26}),
+        TrendBreakoutStrategy(), TrendBreakoutStrategy({'price_entry_mult': 0.3}),
+    ]
+
+
+def test_get_many_batches_missing_windows():
+    """多窗口读取只对未命中的窗口调用一次计算"""
+    from backend import indicators
+    from backend.strategies.indicator_cache import IndicatorCache
+
+    cache = IndicatorCache()
+    x = make_klines(500, seed=41)['close'].to_numpy()
+    fp = cache.fingerprint(x)
+    calls = []
+
+    def compute(windows):
+        calls.append(windows)
+        return indicators.rolling_mean(x, windows)
+
+    cache.get(fp, 'rolling_mean', 20, lambda: indicators.rolling_mean(x, 20))
+    values = cache.get_many(fp, 'rolling_mean', [10, 20, 30, 10], compute)
+    assert calls == [(10, 30)]
+    for w, v in zip([10, 20, 30, 10], values):
+        np.testing.assert_array_equal(v, indicators.rolling_mean(x, w))
+        assert not v.flags.writeable
+    assert cache.get_many(fp, 'rolling_mean', [30, 10], compute)[0] is values[2]
+    assert len(calls) == 1
+
+
+def test_graph_computes_each_feature_once():
+    """特征去重：变体共用的特征只算一次，之后所有策略的信号计算不再有缓存未命中"""
+    from backend.strategies.indicator_cache import get_indicator_cache
+    from backend.strategies.feature_graph import FeatureGraph, Feature
+
+    df = make_klines(2000, seed=42)
+    strategies = _arena_strategies()
+    cache = get_indicator_cache()
+
+    cache.clear()
+    expected = [s.compute_signals(df) for s in strategies]
+
+    cache.clear()
+    graph = FeatureGraph(df).add_strategies(strategies).evaluate()
+    unique = {f for s in strategies for f in s.required_features()}
+    assert graph.requested == sum(len(s.required_features()) for s in strategies)
+    # ewm_mean(26)被MACD慢线和VH变体的趋势EMA共用；true_range是ATR的依赖
+    assert Feature('ewm_mean', 26) in unique
+    assert graph.computed == len(unique) + 1 < graph.requested
+
+    misses = cache.misses
+    for strategy, signals in zip(strategies, expected):
+        actual = strategy.compute_signals(df)
+        assert actual.equals(signals), strategy.name
+    assert cache.misses == misses
+
+    # 已在缓存中的特征不再计算
+    again = FeatureGraph(df).add_strategies(strategies).evaluate()
+    assert again.computed == 0
+
+    try:
+        FeatureGraph(df).add([Feature('unknown', 3)])
+        assert False, "未知特征应报错"
+    except ValueError:
+        pass
+
+
+def test_shared_latest_signals():
+    """所有策略在最长预热期的同一段尾部上计算，结果与各自latest_signals一致，公共特征只计算一次"""
+    from backend.strategies.feature_graph import shared_latest_signals
+    from backend.strategies.indicator_cache import get_indicator_cache
+
+    df = make_klines(3000, seed=43)
+    strategies = _arena_strategies()
+    stateless = [s for s in strategies if not s.stateful]
+    for group in [strategies, stateless]:
+        shared = shared_latest_signals(group, df, bars=300)
+        for strategy, signals in zip(group, shared):
+            assert list(signals.index) == list(df.index[-300:])
+            np.testing.assert_array_equal(signals.to_numpy(), strategy.latest_signals(df, 300).to_numpy(),
+                                          err_msg=strategy.name)
+
+    # 无状态策略共用最长预热期的一段尾部：各策略在这段尾部上的特征都已在图中算好
+    cache = get_indicator_cache()
+    cache.clear()
+    shared_latest_signals(stateless, df)
+    misses = cache.misses
+    tail = df.iloc[-max(s.tail_lookback() for s in stateless) - 1:]
+    for strategy in stateless:
+        strategy.compute_signals(tail)
+    assert cache.misses == misses
+
+    # 只改阈值的变体共用特征
+    cache.clear()
+    shared_latest_signals(strategies[:2], df)
+    misses = cache.misses
+    cache.clear()
+    shared_latest_signals(strategies[:1], df)
+    assert cache.misses == misses
+
+
+if __name__ == "__main__":
+    test_get_many_batches_missing_windows()
+    test_graph_computes_each_feature_once()
+    test_shared_latest_signals()
@@ -0,0 +1,175 @@
+"""
+测试增量回测
+验证逐批追加K线的结果与全量回测一致，并支持快照恢复
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from backend.strategies.strategy_base import BaseStrategy
+from test.conftest import make_klines
+
+
+def _assert_metrics_close(metrics: dict, expected: dict):
+    for key in ['final_capital', 'total_return_pct', 'sharpe_ratio', 'max_drawdown_pct', 'win_rate']:
+        assert np.isclose(metrics[key], expected[key], rtol=1e-9, atol=1e-12), key
+    for key in ['total_trades', 'winning_trades', 'losing_trades', 'trading_days']:
+        assert metrics[key] == expected[key], key
+
+
+def test_incremental_matches_full_backtest():
+    """先整体加载历史、再逐批追加，信号、权益和指标与全量回测一致（默认用step()延续状态）"""
+    print("=" * 60)
+    print("测试增量回测")
+    print("=" * 60)
+
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy, VolatilityHarvestStrategy,
+        TrendBreakoutStrategy, BacktestEngine
+    )
+    from backend.strategies.incremental_backtest import IncrementalBacktest
+
+    df = make_klines(2500, seed=3)
+    split = 2000
+
+    for strategy_cls in [RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+                         VolatilityHarvestStrategy, TrendBreakoutStrategy]:
+        full = BacktestEngine().run_backtest(strategy_cls(), df)
+
+        incremental = IncrementalBacktest(strategy_cls())
+        assert incremental.streaming
+        parts = [incremental.append(df.iloc[:split])]
+        for i in range(split, len(df), 7):
+            parts.append(incremental.append(df.iloc[i:i + 7]))
+
+        signals = np.concatenate([p['signal'].to_numpy() for p in parts])
+        capital = np.concatenate([p['capital'].to_numpy() for p in parts])
+        np.testing.assert_array_equal(signals, full['data']['signal'].to_numpy())
+        np.testing.assert_array_equal(capital, full['data']['capital'].to_numpy())
+        _assert_metrics_close(incremental.metrics, full['metrics'])
+        np.testing.assert_array_equal(incremental.trades['index'], full['trades']['index'])
+        assert incremental.buffer.empty
+        print(f"   {strategy_cls.__name__}: {incremental.metrics['total_trades']} 笔交易，结果一致")
+
+
+class WindowOnlyStrategy(BaseStrategy):
+    """只实现compute_signals的策略（收盘价上穿/下穿滚动均值）"""
+
+    def __init__(self, params=None):
+        super().__init__("WindowOnly", params or {'window': 20})
+
+    def compute_signals(self, df):
+        close = df['close']
+        above = (close > close.rolling(self.params['window']).mean()).astype(int)
+        return pd.DataFrame({'signal': above.diff().fillna(0).astype(int)}, index=df.index)
+
+    def get_strategy_description(self):
+        return "滚动均值穿越"
+
+
+def test_window_mode_for_strategies_without_step():
+    """不支持step()的策略退回窗口模式，滚动窗口类指标与全量回测一致，只保留lookback根K线"""
+    from backend.strategies import BacktestEngine
+    from backend.strategies.incremental_backtest import IncrementalBacktest
+
+    df = make_klines(1500, seed=4)
+    full = BacktestEngine().run_backtest(WindowOnlyStrategy(), df)
+
+    incremental = IncrementalBacktest(WindowOnlyStrategy(), lookback=300)
+    assert not incremental.streaming
+    parts = [incremental.append(df.iloc[:1000])]
+    for i in range(1000, len(df), 11):
+        parts.append(incremental.append(df.iloc[i:i + 11]))
+
+    capital = np.concatenate([p['capital'].to_numpy() for p in parts])
+    np.testing.assert_array_equal(capital, full['data']['capital'].to_numpy())
+    _assert_metrics_close(incremental.metrics, full['metrics'])
+    assert len(incremental.buffer) == 300
+
+
+def test_duplicate_bars_are_ignored():
+    """重复推送已处理的K线不会改变状态"""
+    from backend.strategies import RSIStrategy
+    from backend.strategies.incremental_backtest import IncrementalBacktest
+
+    df = make_klines(600, seed=1)
+    incremental = IncrementalBacktest(RSIStrategy(), lookback=200)
+    incremental.append(df.iloc[:500])
+    metrics = incremental.metrics
+
+    assert incremental.append(df.iloc[450:500]).empty
+    assert incremental.metrics == metrics
+
+    result = incremental.append(df.iloc[490:510])
+    assert len(result) == 10
+    assert incremental.bar_count == 510
+
+
+def test_snapshot_restore_roundtrip():
+    """快照经JSON序列化后恢复，继续追加的结果与未中断时一致"""
+    from backend.strategies import VolatilityHarvestStrategy
+    from backend.strategies.incremental_backtest import IncrementalBacktest
+
+    df = make_klines(1500, seed=8)
+
+    uninterrupted = IncrementalBacktest(VolatilityHarvestStrategy(), lookback=600)
+    uninterrupted.append(df.iloc[:1000])
+    expected = uninterrupted.append(df.iloc[1000:])
+
+    first = IncrementalBacktest(VolatilityHarvestStrategy(), lookback=600)
+    first.append(df.iloc[:1000])
+    snapshot = json.loads(json.dumps(first.snapshot()))
+
+    restored = IncrementalBacktest.restore(VolatilityHarvestStrategy(snapshot['params']), snapshot)
+    result = restored.append(df.iloc[1000:])
+
+    np.testing.assert_array_equal(result['capital'].to_numpy(), expected['capital'].to_numpy())
+    assert restored.metrics == uninterrupted.metrics
+    for name in restored.trades.dtype.names:
+        np.testing.assert_array_equal(restored.trades[name], uninterrupted.trades[name])
+
+
+def test_restore_without_peak_timestamp():
+    """旧快照缺少peak_timestamp时，承接上一批的水下区间以第一根K线时间为起点，不报错"""
+    from backend.strategies import RSIStrategy, BacktestEngine
+    from backend.strategies.incremental_backtest import IncrementalBacktest
+
+    df = make_klines(1500, seed=8)
+    full = BacktestEngine().run_backtest(RSIStrategy(), df)
+
+    # 在最长水下区间的中间切分，第二批的最长水下区间承接第一批
+    capital = full['data']['capital'].to_numpy()
+    underwater = capital < np.maximum.accumulate(capital)
+    end = int(np.argmax(np.where(underwater, np.arange(len(df)) - np.maximum.accumulate(
+        np.where(underwater, 0, np.arange(len(df)))), 0)))
+    split = end - full['metrics']['max_drawdown_duration'] // 2
+
+    first = IncrementalBacktest(RSIStrategy())
+    first.append(df.iloc[:split])
+    assert first._underwater > 0
+    snapshot = json.loads(json.dumps(first.snapshot()))
+    del snapshot['peak_timestamp']
+
+    restored = IncrementalBacktest.restore(RSIStrategy(), snapshot)
+    restored.append(df.iloc[split:])
+    metrics = restored.metrics
+    assert metrics['max_drawdown_duration'] == full['metrics']['max_drawdown_duration']
+    expected_days = (df['timestamp'].iloc[end] - df['timestamp'].iloc[0]).days
+    assert metrics['max_drawdown_duration_days'] == expected_days
+    _assert_metrics_close(metrics, full['metrics'])
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_backtest()
+    test_duplicate_bars_are_ignored()
+    test_snapshot_restore_roundtrip()
+    test_window_mode_for_strategies_without_step()
+    test_restore_without_peak_timestamp()
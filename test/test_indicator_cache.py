@@ -0,0 +1,146 @@
+"""
+测试指标缓存
+验证缓存命中后信号与直接计算完全一致，以及LRU内存上限
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _reference_atr(df: pd.DataFrame, period: int) -> pd.Series:
+    """原ATR实现（对照基准）"""
+    tr1 = df['high'] - df['low']
+    tr2 = abs(df['high'] - df['close'].shift(1))
+    tr3 = abs(df['low'] - df['close'].shift(1))
+    return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1).ewm(span=period, adjust=False).mean()
+
+
+def _reference_rsi(close: pd.Series, period: int) -> pd.Series:
+    """原RSI实现（对照基准）"""
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def test_cached_indicators_match_direct_computation():
+    """缓存命中前后的指标值与直接计算逐位一致"""
+    from backend.strategies.indicator_cache import get_indicator_cache
+    from backend.strategies import RSIStrategy, BollingerBandsStrategy, VolatilityHarvestStrategy
+
+    df = make_klines(3000, seed=21)
+    cache = get_indicator_cache()
+    cache.clear()
+
+    for _ in range(2):
+        rsi = RSIStrategy(params={'rsi_period': 9}).generate_signals(df)
+        np.testing.assert_array_equal(rsi['rsi'].to_numpy(), _reference_rsi(df['close'], 9).to_numpy())
+
+        bb = BollingerBandsStrategy(params={'bb_period': 30}).generate_signals(df)
+        np.testing.assert_array_equal(bb['bb_middle'].to_numpy(),
+                                      df['close'].rolling(window=30).mean().to_numpy())
+        np.testing.assert_array_equal(bb['bb_std'].to_numpy(),
+                                      df['close'].rolling(window=30).std().to_numpy())
+
+        vh = VolatilityHarvestStrategy().generate_signals(df)
+        np.testing.assert_array_equal(vh['atr'].to_numpy(), _reference_atr(df, 20).to_numpy())
+        np.testing.assert_array_equal(vh['atr_trail'].to_numpy(), _reference_atr(df, 185).to_numpy())
+
+    assert cache.hits > 0
+    print(f"   命中 {cache.hits} 次，未命中 {cache.misses} 次")
+
+
+def test_cache_shared_across_param_grid():
+    """参数扫描中相同窗口只计算一次"""
+    from backend.strategies.indicator_cache import get_indicator_cache
+    from backend.strategies import BollingerBandsStrategy, BacktestEngine
+
+    df = make_klines(1000, seed=4)
+    cache = get_indicator_cache()
+    cache.clear()
+
+    BacktestEngine().run_grid(BollingerBandsStrategy, df, {'bb_period': [20], 'bb_std': [1.5, 2.0, 2.5, 3.0]})
+
+    # 均值和标准差各计算一次，其余3组参数全部命中
+    assert cache.misses == 2
+    assert cache.hits == 6
+
+
+def test_cache_key_depends_on_data():
+    """数据变化（如追加新K线）后不会命中旧结果"""
+    from backend.strategies.indicator_cache import IndicatorCache
+
+    df = make_klines(500, seed=8)
+    cache = IndicatorCache()
+
+    first = cache.rolling_mean(df['close'], 10)
+    modified = df['close'].copy()
+    modified.iloc[-1] *= 1.01
+    second = cache.rolling_mean(modified, 10)
+
+    assert cache.misses == 2
+    assert first.iloc[-1] != second.iloc[-1]
+
+    # 索引不同但数值相同的序列共用缓存
+    shifted = pd.Series(df['close'].to_numpy(), index=df.index + 100)
+    third = cache.rolling_mean(shifted, 10)
+    assert cache.hits == 1
+    assert third.index.equals(shifted.index)
+
+
+def test_lru_eviction_respects_memory_cap():
+    """超过内存上限时淘汰最久未使用的条目"""
+    from backend.strategies.indicator_cache import IndicatorCache
+
+    close = make_klines(1000, seed=2)['close']
+    entry_bytes = len(close) * 8
+    cache = IndicatorCache(max_bytes=3 * entry_bytes)
+
+    for window in [5, 10, 15]:
+        cache.rolling_mean(close, window)
+    assert len(cache) == 3
+
+    # 访问窗口5使其变为最近使用，再写入新条目应淘汰窗口10
+    cache.rolling_mean(close, 5)
+    cache.rolling_mean(close, 20)
+    assert len(cache) == 3
+    assert cache.nbytes <= cache.max_bytes
+
+    misses = cache.misses
+    cache.rolling_mean(close, 5)
+    assert cache.misses == misses
+    cache.rolling_mean(close, 10)
+    assert cache.misses == misses + 1
+
+
+def test_cached_values_are_read_only():
+    """缓存数组只读，调用方修改返回的列不会污染缓存"""
+    from backend.strategies.indicator_cache import IndicatorCache
+
+    df = make_klines(200, seed=6)
+    cache = IndicatorCache()
+    values = cache.get(cache.fingerprint(df['close']), 'rolling_mean', 5,
+                       lambda: df['close'].rolling(window=5).mean())
+    assert not values.flags.writeable
+
+    frame = df.copy()
+    frame['ma'] = cache.rolling_mean(df['close'], 5)
+    frame.loc[frame.index[-1], 'ma'] = -1.0
+    assert cache.rolling_mean(df['close'], 5).iloc[-1] != -1.0
+
+
+if __name__ == "__main__":
+    test_cached_indicators_match_direct_computation()
+    test_cache_shared_across_param_grid()
+    test_cache_key_depends_on_data()
+    test_lru_eviction_respects_memory_cap()
+    test_cached_values_are_read_only()
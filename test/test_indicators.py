@@ -0,0 +1,135 @@
+"""
+测试共享指标库
+验证各内核与原pandas写法逐位一致、多窗口二维输出、NaN处理，
+以及迁移后的行情指标列与原计算相同
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def test_kernels_match_pandas():
+    """滚动/EWM/真实波幅/RSI/布林带/线性回归与原pandas写法逐位一致"""
+    from backend import indicators
+    from benchmarks.indicator_benchmarks import _pandas_rsi, _pandas_true_range, _pandas_linreg
+
+    df = make_klines(4000, seed=21)
+    close, high, low = df['close'], df['high'], df['low']
+    x = close.to_numpy()
+
+    for w in (1, 2, 20, 157):
+        np.testing.assert_array_equal(indicators.rolling_max(x, w), close.rolling(w).max())
+        np.testing.assert_array_equal(indicators.rolling_min(x, w), close.rolling(w).min())
+        np.testing.assert_array_equal(indicators.rolling_mean(x, w), close.rolling(w).mean())
+        np.testing.assert_array_equal(indicators.rolling_sum(x, w), close.rolling(w).sum())
+    np.testing.assert_array_equal(indicators.rolling_std(x, 20), close.rolling(20).std())
+    np.testing.assert_array_equal(indicators.ema(close, 26), close.ewm(span=26, adjust=False).mean())
+    np.testing.assert_array_equal(indicators.wilder(x, 14), close.ewm(alpha=1 / 14, adjust=False).mean())
+
+    tr = indicators.true_range(high, low, close)
+    np.testing.assert_array_equal(tr, _pandas_true_range(df))
+    np.testing.assert_array_equal(indicators.atr(high, low, close, 20),
+                                  _pandas_true_range(df).ewm(span=20, adjust=False).mean())
+    np.testing.assert_array_equal(indicators.rsi(x, 14), _pandas_rsi(close, 14))
+    np.testing.assert_array_equal(indicators.rolling_linreg(x, 102), _pandas_linreg(close, 102))
+
+    bands = indicators.bollinger_bands(x, 20)
+    np.testing.assert_array_equal(bands['upper'], close.rolling(20).mean() + close.rolling(20).std() * 2)
+
+    macd = indicators.macd(x)
+    line = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    np.testing.assert_array_equal(macd['macd'], line)
+    np.testing.assert_array_equal(macd['signal'], line.ewm(span=9, adjust=False).mean())
+
+    # 窗口长于序列时全为NaN
+    assert np.isnan(indicators.rolling_max(x[:10], 20)).all()
+
+
+def test_multi_window_output():
+    """窗口传序列时返回 (窗口数, K线数)，每行与单窗口调用相同"""
+    from backend import indicators
+
+    x = make_klines(1500, seed=22)['close'].to_numpy()
+    windows = [7, 14, 21]
+    for func in (indicators.rolling_mean, indicators.rolling_max, indicators.rolling_min,
+                 indicators.rsi, indicators.ema, indicators.rolling_linreg):
+        stacked = func(x, windows)
+        assert stacked.shape == (3, len(x))
+        for row, w in zip(stacked, windows):
+            np.testing.assert_array_equal(row, func(x, w))
+
+    bands = indicators.bollinger_bands(x, windows)
+    assert all(v.shape == (3, len(x)) for v in bands.values())
+
+    try:
+        indicators.rolling_mean(x, [])
+        assert False, "空窗口列表应报错"
+    except ValueError:
+        pass
+
+
+def test_extremes_with_nan():
+    """窗口内含NaN时滚动极值为NaN，与pandas一致"""
+    from backend import indicators
+
+    series = make_klines(600, seed=23)['close']
+    series.iloc[100:103] = np.nan
+    series.iloc[400] = np.nan
+    for w in (1, 5, 37):
+        np.testing.assert_array_equal(indicators.rolling_max(series, w), series.rolling(w).max())
+        np.testing.assert_array_equal(indicators.rolling_min(series, w), series.rolling(w).min())
+
+
+def test_calculate_indicators_unchanged():
+    """OKXFetcher.calculate_indicators的各列与原pandas计算相同"""
+    from backend.data_fetchers.okx_fetcher import OKXFetcher
+    from benchmarks.indicator_benchmarks import _pandas_rsi
+
+    df = make_klines(800, seed=24)
+    result = OKXFetcher().calculate_indicators(df.copy())
+    close = df['close']
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+    sma = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    expected = {
+        'rsi': _pandas_rsi(close, 14), 'macd': macd, 'macd_signal': signal, 'macd_hist': macd - signal,
+        'sma_20': sma, 'bb_std': std, 'bb_upper': sma + std * 2, 'bb_lower': sma - std * 2,
+        'vol_ma_20': df['volume'].rolling(window=20).mean(),
+    }
+    for column, values in expected.items():
+        np.testing.assert_array_equal(result[column].to_numpy(), values.to_numpy(), err_msg=column)
+
+
+def test_indicator_benchmarks_json(tmp_path):
+    """指标微基准离线跑通并输出JSON，内核与pandas写法无误差"""
+    from benchmarks.indicator_benchmarks import main, CASES
+
+    output = tmp_path / "indicators.json"
+    assert main(['--bars', '3000', '--repeat', '1', '--output', str(output)]) == 0
+    results = json.loads(output.read_text(encoding='utf-8'))['results']
+    assert {r['case'] for r in results} == set(CASES)
+    assert all(r['max_rel_error'] == 0 for r in results)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_kernels_match_pandas()
+    test_multi_window_output()
+    test_extremes_with_nan()
+    test_calculate_indicators_unchanged()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_indicator_benchmarks_json(Path(tmp))
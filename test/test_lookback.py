@@ -0,0 +1,120 @@
+"""
+测试策略预热期声明和尾部计算
+验证required_lookback由参数决定，尾部计算的最新信号与在完整历史上计算一致
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def test_ema_settle_bars():
+    """经过ema_settle_bars根K线后EMA初值的残余权重不超过容差"""
+    from backend.strategies.strategy_base import ema_settle_bars
+
+    assert ema_settle_bars(1) == 0
+    for span in (9, 26, 185):
+        k = ema_settle_bars(span, 1e-4)
+        decay = 1 - 2 / (span + 1)
+        assert decay ** k <= 1e-4 < decay ** (k - 1)
+    assert ema_settle_bars(26, 1e-6) > ema_settle_bars(26, 1e-4)
+
+
+def test_required_lookback_follows_params():
+    """预热期随参数变化"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+        VolatilityHarvestStrategy, TrendBreakoutStrategy
+    )
+
+    assert RSIStrategy().required_lookback() == 14
+    assert RSIStrategy({'rsi_period': 21}).required_lookback() == 21
+    assert BollingerBandsStrategy({'bb_period': 30}).required_lookback() == 29
+    assert MACDStrategy({'slow_period': 40}).required_lookback() > MACDStrategy().required_lookback()
+    assert VolatilityHarvestStrategy({'atr_trail_period': 50}).required_lookback() < \
+        VolatilityHarvestStrategy().required_lookback()
+    assert VolatilityHarvestStrategy().required_lookback() == 279
+    assert TrendBreakoutStrategy().required_lookback() == 157 + 2 + 5
+    assert TrendBreakoutStrategy({'daily_lookback': 40}).required_lookback() == 240 + 2 + 5
+
+
+def test_latest_signals_match_full_history():
+    """在尾部K线上计算的最新信号与在完整历史上计算相同"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy, VolatilityHarvestStrategy, TrendBreakoutStrategy
+    )
+
+    df = make_klines(3000, seed=31)
+    for strategy in [RSIStrategy(), BollingerBandsStrategy(), MACDStrategy(),
+                     VolatilityHarvestStrategy(), TrendBreakoutStrategy()]:
+        full = strategy.compute_signals(df)['signal'].to_numpy()
+        assert (full[1500:] != 0).sum() > 10
+        for end in range(1500, len(df) + 1, 37):
+            latest = strategy.latest_signals(df.iloc[:end])
+            assert latest.index[0] == end - 1
+            assert latest.iloc[0] == full[end - 1], (strategy.name, end)
+
+        tail = strategy.latest_signals(df, 200)
+        np.testing.assert_array_equal(tail.to_numpy(), full[-200:], err_msg=strategy.name)
+
+
+def test_stateful_strategies_use_full_history():
+    """带持仓状态机的策略尾部计算不截取；只加载预热期的K线时最新信号仍与完整历史一致"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, VolatilityHarvestStrategy, TrendBreakoutStrategy
+    )
+
+    assert RSIStrategy().tail_lookback() == 14
+    assert MACDStrategy().tail_lookback() == MACDStrategy().required_lookback()
+    assert VolatilityHarvestStrategy().tail_lookback() is None
+    assert TrendBreakoutStrategy().tail_lookback() is None
+
+    df = make_klines(3000, seed=31)
+    strategy = VolatilityHarvestStrategy()
+    lookback = strategy.required_lookback()
+    full = strategy.compute_signals(df)['signal'].to_numpy()
+    for end in range(1500, len(df) + 1, 37):
+        loaded = df.iloc[end - 1 - lookback:end]
+        latest = strategy.latest_signals(loaded)
+        np.testing.assert_array_equal(latest, strategy.compute_signals(loaded)['signal'].iloc[-1:])
+        assert latest.iloc[0] == full[end - 1], end
+
+
+def test_latest_signals_short_history():
+    """历史不足预热期时在全部K线上计算"""
+    from backend.strategies import TrendBreakoutStrategy, BaseStrategy
+
+    df = make_klines(300, seed=32)
+    strategy = TrendBreakoutStrategy()
+    full = strategy.compute_signals(df)['signal']
+    np.testing.assert_array_equal(strategy.latest_signals(df, 500), full)
+    np.testing.assert_array_equal(strategy.latest_signals(df.iloc[:100], 5), full.iloc[95:100])
+
+    # 未声明预热期时使用完整历史
+    assert BaseStrategy.required_lookback(strategy) is None
+
+
+def test_arena_signal_lookback_days():
+    """竞技场按最大预热期换算加载天数"""
+    from backend.trading.strategy_arena import StrategyArena
+
+    arena = StrategyArena()
+    lookback = max(arena.get_strategy_instance(t).required_lookback() for t in arena.strategies)
+    days = arena.signal_lookback_days()
+    assert (days - 1) * 6 >= lookback + 1 > (days - 2) * 6
+
+
+if __name__ == "__main__":
+    test_ema_settle_bars()
+    test_required_lookback_follows_params()
+    test_latest_signals_match_full_history()
+    test_stateful_strategies_use_full_history()
+    test_latest_signals_short_history()
+    test_arena_signal_lookback_days()
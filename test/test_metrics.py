@@ -0,0 +1,154 @@
+"""
+测试绩效指标
+验证单遍计算与原pandas口径一致、回撤持续期/持仓占比等新增指标以及滚动指标
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _legacy_metrics(capital: pd.Series, initial_capital: float) -> dict:
+    """原BacktestEngine._calculate_metrics中基于pandas的计算"""
+    returns = capital.pct_change().fillna(0)
+    sharpe = returns.mean() / returns.std() * np.sqrt(365) if returns.std() > 0 else 0
+    cumulative = (1 + returns).cumprod()
+    running_max = cumulative.expanding().max()
+    max_drawdown = ((cumulative - running_max) / running_max).min()
+    return {
+        'total_return': (capital.iloc[-1] - initial_capital) / initial_capital,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': max_drawdown,
+    }
+
+
+def _brute_force_underwater(capital: np.ndarray):
+    """逐根统计最长水下区间"""
+    peak, run, longest, end = capital[0], 0, 0, 0
+    for i, c in enumerate(capital):
+        peak = max(peak, c)
+        run = run + 1 if c < peak else 0
+        if run > longest:
+            longest, end = run, i
+    return longest, end
+
+
+def test_metrics_match_legacy():
+    """收益率、夏普比率、最大回撤与原pandas计算一致，且不修改输入"""
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    df = make_klines(3000, seed=5)
+    engine = BacktestEngine(initial_capital=10000)
+    result = engine.run_backtest(RSIStrategy(), df)
+    data = result['data']
+
+    expected = _legacy_metrics(data['capital'], engine.initial_capital)
+    for key, value in expected.items():
+        assert np.isclose(result['metrics'][key], value), key
+
+    columns = list(data.columns)
+    engine._calculate_metrics(data, result['trades'])
+    assert list(data.columns) == columns
+    assert 'returns' not in data.columns
+
+
+def test_equity_kernel_matches_numpy():
+    """逐根扫描的内核与NumPy向量化路径结果相同"""
+    from backend.strategies.metrics import _equity_kernel, _equity_stats
+
+    kernel = getattr(_equity_kernel, 'py_func', _equity_kernel)
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        capital = 10000 * np.cumprod(1 + rng.normal(0, 0.01, 2000) * (rng.random(2000) < 0.6))
+        expected = kernel(capital)
+        actual = _equity_stats(capital)
+        np.testing.assert_allclose(actual[:3], expected[:3], rtol=1e-10, atol=1e-15)
+        assert tuple(actual[3:]) == tuple(expected[3:]) == _brute_force_underwater(capital)
+
+
+def test_drawdown_duration_and_exposure():
+    """回撤持续期按最长水下区间计；持仓占比与逐K线持仓一致"""
+    from backend.strategies import MACDStrategy, BacktestEngine
+    from backend.strategies.metrics import compute_metrics
+
+    capital = np.array([100, 110, 105, 100, 108, 111, 109, 110, 112, 90.0])
+    timestamps = pd.date_range('2024-01-01', periods=len(capital), freq='D')
+    metrics = compute_metrics(capital, 100, timestamps=timestamps)
+    assert metrics['max_drawdown_duration'] == 3  # 105, 100, 108 低于峰值110
+    assert metrics['max_drawdown_duration_days'] == 3
+    assert np.isclose(metrics['max_drawdown'], 90 / 112 - 1)
+    assert metrics['exposure_pct'] == 0 and metrics['total_trades'] == 0
+
+    df = make_klines(3000, seed=6)
+    result = BacktestEngine().run_backtest(MACDStrategy(), df)
+    data = result['data']
+    assert np.isclose(result['metrics']['exposure_pct'], (data['position'] > 0).mean() * 100)
+    assert result['metrics']['max_drawdown_duration'] == \
+        _brute_force_underwater(data['capital'].to_numpy())[0]
+
+
+def test_trade_statistics():
+    """逐笔交易统计：胜率、盈亏比、最长连续亏损"""
+    from backend.strategies.metrics import trade_statistics
+    from backend.strategies.position_simulator import TRADE_LEDGER_DTYPE
+
+    trades = np.zeros(7, dtype=TRADE_LEDGER_DTYPE)
+    trades['index'] = [1, 3, 5, 7, 9, 11, 15]
+    trades['side'] = [1, -1, 1, -1, 1, -1, 1]
+    trades['profit'] = [0, 10, 0, -4, 0, -1, 0]
+    trades['profit_pct'] = [0, 1.0, 0, -0.4, 0, -0.1, 0]
+
+    stats = trade_statistics(trades, n_bars=20)
+    assert stats['total_trades'] == 4
+    assert (stats['winning_trades'], stats['losing_trades']) == (1, 2)
+    assert np.isclose(stats['win_rate'], 100 / 3)
+    assert np.isclose(stats['profit_factor'], 10 / 5)
+    assert stats['max_consecutive_losses'] == 2
+    assert np.isclose(stats['avg_trade_profit'], 5 / 3)
+    assert np.isclose(stats['exposure_pct'], (2 + 2 + 2 + 5) / 20 * 100)
+
+
+def test_rolling_metrics_match_pandas():
+    """滚动夏普 / 滚动回撤与pandas rolling一致，二维输入按列计算"""
+    from backend.strategies.metrics import rolling_metrics
+
+    rng = np.random.default_rng(1)
+    window = 42
+    capital = 10000 * np.cumprod(1 + rng.normal(0.0005, 0.01, (1500, 3)) * (rng.random((1500, 3)) < 0.7), axis=0)
+    capital[200:300, 1] = capital[199, 1]  # 空仓区间夏普为0
+
+    rolling = rolling_metrics(capital, window)
+    for col in range(capital.shape[1]):
+        series = pd.Series(capital[:, col])
+        returns = series.pct_change().fillna(0)
+        sharpe = returns.rolling(window).mean() / returns.rolling(window).std() * np.sqrt(365)
+        sharpe = sharpe.where(returns.rolling(window).std() > 1e-12, 0.0)
+        sharpe.iloc[:window - 1] = np.nan
+        drawdown = series / series.rolling(window, min_periods=1).max() - 1
+
+        np.testing.assert_allclose(rolling['rolling_sharpe'][:, col], sharpe.to_numpy(), rtol=1e-7, atol=1e-9)
+        np.testing.assert_allclose(rolling['drawdown'][:, col], drawdown.to_numpy())
+        np.testing.assert_allclose(rolling['rolling_return'][:, col],
+                                   series.pct_change(window).to_numpy())
+
+        single = rolling_metrics(capital[:, col], window)
+        np.testing.assert_allclose(single['rolling_sharpe'], rolling['rolling_sharpe'][:, col])
+
+    assert (rolling['rolling_sharpe'][300 + window:320 + window, 1] != 0).any()
+    assert (rolling['rolling_sharpe'][200 + window:300, 1] == 0).all()
+
+
+if __name__ == "__main__":
+    test_metrics_match_legacy()
+    test_equity_kernel_matches_numpy()
+    test_drawdown_duration_and_exposure()
+    test_trade_statistics()
+    test_rolling_metrics_match_pandas()
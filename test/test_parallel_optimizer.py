@@ -0,0 +1,129 @@
+"""
+测试并行参数优化器
+验证多进程+共享内存的网格搜索结果与单进程run_grid一致
+"""
+
+import sys
+import os
+import time
+import logging
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from backend.strategies.rsi_strategy import RSIStrategy
+from test.conftest import make_klines
+
+
+class SlowRSIStrategy(RSIStrategy):
+    """用于测试超时的慢策略"""
+
+    def compute_signals(self, df):
+        if self.params['rsi_period'] == 99:
+            time.sleep(5)
+        return super().compute_signals(df)
+
+
+def test_shared_ohlcv_roundtrip():
+    """共享内存发布后重建的DataFrame与原数据一致"""
+    from backend.strategies.parallel_optimizer import SharedOHLCV
+
+    df = make_klines(300)
+    shared = SharedOHLCV.publish(df)
+    try:
+        frame = shared.to_frame()
+        pd.testing.assert_frame_equal(frame, df[frame.columns.tolist()], check_dtype=False)
+        del frame
+    finally:
+        shared.close()
+
+
+def test_parallel_matches_run_grid():
+    """并行结果与单进程run_grid一致，且保持参数组合顺序"""
+    print("=" * 60)
+    print("测试并行网格搜索")
+    print("=" * 60)
+
+    from backend.strategies.backtest_engine import BacktestEngine
+    from backend.strategies.parallel_optimizer import ParallelOptimizer
+
+    df = make_klines(1500)
+    param_grid = {'rsi_period': [7, 14, 21], 'oversold_threshold': [25, 30], 'overbought_threshold': [70, 75]}
+
+    expected = BacktestEngine().run_grid(RSIStrategy, df, param_grid)
+    optimizer = ParallelOptimizer(max_workers=2, chunk_size=3)
+    result = optimizer.run(RSIStrategy, df, param_grid)
+
+    assert result['error'].isna().all()
+    pd.testing.assert_frame_equal(result.drop(columns='error'), expected)
+
+    best_params, best_sharpe = optimizer.optimize(RSIStrategy, df, param_grid)
+    assert best_sharpe == expected['sharpe_ratio'].max()
+    print(f"   最佳参数: {best_params}, 夏普: {best_sharpe:.3f}")
+
+
+def test_task_timeout():
+    """超时的任务被标记，其余任务正常返回"""
+    from backend.strategies.parallel_optimizer import ParallelOptimizer
+
+    df = make_klines(500)
+    combos = [{'rsi_period': p} for p in [7, 99, 14]]
+
+    optimizer = ParallelOptimizer(max_workers=3, chunk_size=1, task_timeout=1.0)
+    result = optimizer.run(SlowRSIStrategy, df, combos)
+
+    assert result['rsi_period'].tolist() == [7, 99, 14]
+    assert result.loc[1, 'error'] is not None and np.isnan(result.loc[1, 'sharpe_ratio'])
+    assert result.loc[[0, 2], 'error'].isna().all()
+
+
+def test_timeout_does_not_cascade():
+    """单进程时任务超时后进程池重建，排在后面的任务不被误判超时，挂起的子进程被结束"""
+    from backend.strategies.parallel_optimizer import ParallelOptimizer
+
+    df = make_klines(500)
+    combos = [{'rsi_period': p} for p in [99, 7, 14]]
+
+    start = time.monotonic()
+    optimizer = ParallelOptimizer(max_workers=1, chunk_size=1, task_timeout=1.5)
+    result = optimizer.run(SlowRSIStrategy, df, combos)
+    elapsed = time.monotonic() - start
+
+    assert result.loc[0, 'error'] is not None and np.isnan(result.loc[0, 'sharpe_ratio'])
+    assert result.loc[[1, 2], 'error'].isna().all()
+    assert result.loc[[1, 2], 'sharpe_ratio'].notna().all()
+    # 不等待挂起的任务睡眠结束
+    assert elapsed < 4.5
+
+
+def test_all_chunks_fail():
+    """全部任务失败时返回 (None, -inf)，错误信息记入日志"""
+    from backend.strategies.parallel_optimizer import ParallelOptimizer
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    log = logging.getLogger('backend.strategies.parallel_optimizer')
+    log.addHandler(handler)
+    try:
+        df = make_klines(300)
+        optimizer = ParallelOptimizer(max_workers=2)
+        assert optimizer.optimize(RSIStrategy, df, {'rsi_period': ['x']}) == (None, -np.inf)
+        assert RSIStrategy().optimize_params(df, {'rsi_period': ['x', 'y']}, workers=2) == (None, -np.inf)
+    finally:
+        log.removeHandler(handler)
+
+    assert len(records) == 2
+    assert 'Error' in records[0].getMessage()
+
+
+if __name__ == "__main__":
+    test_shared_ohlcv_roundtrip()
+    test_parallel_matches_run_grid()
+    test_task_timeout()
+    test_timeout_does_not_cascade()
+    test_all_chunks_fail()
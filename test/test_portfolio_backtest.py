@@ -0,0 +1,140 @@
+"""
+测试多交易对组合回测
+验证并发读取、时间轴对齐、各分仓与单独回测一致、再平衡守恒以及并行与串行一致
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _make_data():
+    """三个交易对，SOL晚上市、ETH缺少部分K线"""
+    btc = make_klines(3000, seed=31)
+    eth = make_klines(3000, seed=32).drop(index=range(1200, 1210)).reset_index(drop=True)
+    sol = make_klines(3000, seed=33).iloc[800:].reset_index(drop=True)
+    return {'BTC-USDT': btc, 'ETH-USDT': eth, 'SOL-USDT': sol}
+
+
+def test_load_symbols_concurrently(tmp_path):
+    """并发读取多个交易对的K线，与逐个读取相同"""
+    from backend.data_fetchers.historical_data_manager import HistoricalDataManager
+    from backend.strategies.portfolio_backtest import PortfolioBacktester
+
+    manager = HistoricalDataManager(db_path=str(tmp_path / "klines.db"))
+    data = _make_data()
+    for symbol, df in data.items():
+        manager.save_klines(df, symbol, "4H")
+
+    loaded = PortfolioBacktester().load(manager, list(data), "4H")
+    assert list(loaded) == list(data)
+    for symbol in data:
+        expected = manager.load_klines(symbol, "4H")
+        np.testing.assert_array_equal(loaded[symbol]['close'].to_numpy(), expected['close'].to_numpy())
+
+
+def test_sleeves_match_standalone_backtests():
+    """各分仓与单独回测一致；组合权益为各分仓对齐后之和加现金"""
+    from backend.strategies import RSIStrategy, MACDStrategy, BollingerBandsStrategy, BacktestEngine
+    from backend.strategies.portfolio_backtest import PortfolioBacktester
+
+    data = _make_data()
+    strategies = {'BTC-USDT': [RSIStrategy(), MACDStrategy()],
+                  'ETH-USDT': BollingerBandsStrategy(), 'SOL-USDT': RSIStrategy()}
+    backtester = PortfolioBacktester(initial_capital=10000, allocation=0.2, max_workers=1)
+    result = backtester.run(strategies, data)
+
+    equity = result['equity']
+    assert len(equity) == 3000
+    assert np.isclose(result['weights']['cash'], 0.2)
+    assert equity['total'].iloc[0] == 10000
+
+    expected = BacktestEngine(initial_capital=2000).run_backtest(RSIStrategy(), data['SOL-USDT'])
+    sleeve = result['sleeves']['SOL-USDT/' + RSIStrategy().name]
+    np.testing.assert_allclose(sleeve['data']['capital'].to_numpy(), expected['data']['capital'].to_numpy())
+
+    # SOL上市前为初始资金，ETH缺失的K线沿用上一根权益
+    sol = equity['SOL-USDT/' + RSIStrategy().name]
+    assert (sol.iloc[:801] == 2000).all()
+    eth = equity['ETH-USDT/' + BollingerBandsStrategy().name]
+    assert (eth.iloc[1200:1210] == eth.iloc[1199]).all()
+
+    sleeve_columns = [c for c in equity.columns if c not in ('cash', 'total')]
+    np.testing.assert_allclose(equity['total'], equity[sleeve_columns].sum(axis=1) + 2000)
+    assert np.isclose(result['metrics']['final_capital'], equity['total'].iloc[-1])
+    assert result['metrics']['total_trades'] == sum(s['metrics']['total_trades'] for s in result['sleeves'].values())
+
+
+def test_inner_alignment():
+    """inner对齐时只在共同的K线上回测"""
+    from backend.strategies import RSIStrategy
+    from backend.strategies.portfolio_backtest import PortfolioBacktester
+
+    data = _make_data()
+    result = PortfolioBacktester(align='inner', max_workers=1).run(
+        {symbol: RSIStrategy() for symbol in data}, data)
+    assert len(result['equity']) == 3000 - 800 - 10
+    assert all(len(s['data']) == len(result['equity']) for s in result['sleeves'].values())
+
+
+def test_rebalance():
+    """无手续费时再平衡前后总权益不变，再平衡后各分仓回到目标比例"""
+    from backend.strategies import RSIStrategy, MACDStrategy
+    from backend.strategies.portfolio_backtest import PortfolioBacktester
+
+    data = _make_data()
+    strategies = {'BTC-USDT': RSIStrategy(), 'ETH-USDT': MACDStrategy()}
+    allocation = {'BTC-USDT': 0.5, 'ETH-USDT': 0.3}
+    fixed = PortfolioBacktester(allocation=allocation, max_workers=1).run(strategies, data)['equity']
+    result = PortfolioBacktester(allocation=allocation, rebalance_every=100,
+                                 commission=0.0, max_workers=1).run(strategies, data)
+    equity = result['equity']
+
+    # 再平衡K线收盘后各分仓和现金回到目标比例
+    assert np.isclose(equity['cash'].iloc[99], 2000)
+    for bar in [100, 500, 2900]:
+        total = equity['total'].iloc[bar]
+        np.testing.assert_allclose(equity.iloc[bar, :2].to_numpy() / total, [0.5, 0.3])
+        assert np.isclose(equity['cash'].iloc[bar] / total, 0.2)
+
+    # 再平衡只是资金转移：前一根到再平衡K线的总权益变化等于各分仓当根收益之和
+    sleeves = result['sleeves']
+    bar = 300
+    growth = np.array([
+        sleeves[name]['data']['capital'].iloc[bar] / sleeves[name]['data']['capital'].iloc[bar - 1]
+        for name in equity.columns[:2]
+    ])
+    before = equity.iloc[bar - 1, :2].to_numpy()
+    assert np.isclose(equity['total'].iloc[bar], (before * growth).sum() + equity['cash'].iloc[bar - 1])
+    assert not np.allclose(fixed['total'].to_numpy(), equity['total'].to_numpy())
+
+
+def test_parallel_matches_serial():
+    """按交易对并行回测与串行结果一致"""
+    from backend.strategies import RSIStrategy, TrendBreakoutStrategy
+    from backend.strategies.portfolio_backtest import PortfolioBacktester
+
+    data = _make_data()
+    strategies = {symbol: [RSIStrategy(), TrendBreakoutStrategy()] for symbol in data}
+    serial = PortfolioBacktester(max_workers=1, rebalance_every=200).run(strategies, data)
+    parallel = PortfolioBacktester(max_workers=3, rebalance_every=200).run(strategies, data)
+    np.testing.assert_allclose(parallel['equity'].to_numpy(), serial['equity'].to_numpy())
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_load_symbols_concurrently(Path(tmp))
+    test_sleeves_match_standalone_backtests()
+    test_inner_alignment()
+    test_rebalance()
+    test_parallel_matches_serial()
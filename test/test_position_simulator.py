@@ -0,0 +1,114 @@
+"""
+测试共享持仓模拟器
+验证回测引擎、策略基类和竞技场的撮合口径与原实现一致，并支持从保存状态继续
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _make_signals(n_bars: int, seed: int = 7) -> pd.DataFrame:
+    """生成模拟K线收盘价和随机信号"""
+    df = make_klines(n_bars, seed=seed, freq='1h', volatility=0.01)[['timestamp', 'close']]
+    df['signal'] = np.random.default_rng(seed).choice([-1, 0, 0, 0, 1], size=n_bars)
+    return df
+
+
+def _legacy_arena_replay(df: pd.DataFrame, capital: float, commission: float,
+                         position: float = 0, entry_price: float = 0):
+    """原竞技场逐行撮合（对照基准）"""
+    net_values = []
+    trades = []
+    for _, row in df.iterrows():
+        signal, price = row['signal'], row['close']
+        if signal == 1 and position == 0 and capital > 0:
+            amount = (capital * (1 - commission)) / price
+            position, entry_price, capital = amount, price, 0
+            trades.append(('BUY', price, amount))
+        elif signal == -1 and position > 0:
+            sell_value = position * price * (1 - commission)
+            profit = sell_value - (position * entry_price)
+            trades.append(('SELL', price, profit))
+            capital, position, entry_price = sell_value, 0, 0
+        net_values.append(position * price if position > 0 else capital)
+    return np.array(net_values), trades, (capital, position, entry_price)
+
+
+def test_arena_commission_model_matches_legacy():
+    """竞技场口径（先扣手续费）与原逐行实现完全一致"""
+    from backend.strategies.position_simulator import (
+        simulate_positions, CommissionModel, PositionState
+    )
+
+    df = _make_signals(3000)
+    expected_nv, expected_trades, expected_state = _legacy_arena_replay(df, 1000.0, 0.001)
+
+    sim = simulate_positions(
+        df['signal'].to_numpy(), df['close'].to_numpy(),
+        commission=CommissionModel(rate=0.001, deduct_before_fill=True),
+        initial_state=PositionState(cash=1000.0),
+    )
+
+    np.testing.assert_array_equal(sim.net_value, expected_nv)
+    trades = [(t['type'], t['price'], t['amount'] if t['type'] == 'BUY' else t['profit'])
+              for t in sim.trades]
+    assert trades == expected_trades
+    assert (sim.final_state.cash, sim.final_state.position, sim.final_state.entry_price) == expected_state
+    print(f"   竞技场口径: {len(trades)} 笔交易，结果一致")
+
+
+def test_resume_from_saved_state():
+    """分段模拟并从保存状态继续，与一次性模拟结果一致"""
+    from backend.strategies.position_simulator import simulate_positions
+
+    df = _make_signals(2000, seed=11)
+    signals, prices = df['signal'].to_numpy(), df['close'].to_numpy()
+
+    full = simulate_positions(signals, prices, commission=0.001, initial_capital=5000)
+
+    split = 1234
+    first = simulate_positions(signals[:split], prices[:split], commission=0.001, initial_capital=5000)
+    second = simulate_positions(signals[split:], prices[split:], commission=0.001,
+                                initial_state=first.final_state)
+
+    np.testing.assert_array_equal(np.concatenate([first.capital, second.capital]), full.capital)
+    assert len(first.trades) + len(second.trades) == len(full.trades)
+    assert second.final_state == full.final_state
+
+
+def test_calculate_positions_matches_legacy():
+    """策略基类的calculate_positions（1%手续费）与原实现一致"""
+    from backend.strategies import RSIStrategy
+
+    df = _make_signals(800, seed=3)
+    result = RSIStrategy().calculate_positions(df, initial_capital=10000)
+
+    position, cash = 0.0, 10000
+    capital = [10000.0]
+    for i in range(1, len(df)):
+        signal, price = df['signal'].iloc[i], df['close'].iloc[i]
+        if signal == 1 and position == 0:
+            position = cash / price * 0.99
+            cash = 0
+        elif signal == -1 and position > 0:
+            cash = position * price * 0.99
+            position = 0
+        capital.append(cash + position * price)
+
+    np.testing.assert_array_equal(result['capital'].to_numpy(), np.array(capital))
+    assert 'returns' in result.columns
+
+
+if __name__ == "__main__":
+    test_arena_commission_model_matches_legacy()
+    test_resume_from_saved_state()
+    test_calculate_positions_matches_legacy()
@@ -0,0 +1,165 @@
+"""
+测试多周期重采样
+验证高周期OHLCV与pandas重采样一致、对齐无未来函数、增量维护与批量一致，
+以及趋势突破策略在1H/15m K线上按真实日线计算
+"""
+
+import sys
+import os
+import json
+from datetime import datetime
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def _klines(n_bars: int, freq: str, seed: int, start: str = '2024-01-01 07:00') -> pd.DataFrame:
+    """从一天中途开始的K线（第一个日线不完整）"""
+    return synthetic_ohlcv(n_bars, seed=seed, freq=freq, start=datetime.fromisoformat(start))
+
+
+def test_timeframe_helpers():
+    """周期换算与高周期起点"""
+    from backend.strategies.resampler import timeframe_delta, bars_per_period, period_start
+
+    assert timeframe_delta('15m') == pd.Timedelta(minutes=15)
+    assert timeframe_delta('4H') == timeframe_delta('4h') == pd.Timedelta(hours=4)
+    assert bars_per_period('4H', '1D') == 6
+    assert bars_per_period('1H', '1D') == 24
+    assert bars_per_period('15m', '1D') == 96
+    assert bars_per_period('1D', '4H') == 1
+
+    ts = pd.to_datetime(['2024-01-03 13:45', '2024-01-07 23:59'])  # 周三、周日
+    np.testing.assert_array_equal(period_start(ts, '1D'), pd.to_datetime(['2024-01-03', '2024-01-07']))
+    np.testing.assert_array_equal(period_start(ts, '1W'), pd.to_datetime(['2024-01-01', '2024-01-01']))
+    np.testing.assert_array_equal(period_start(ts, '4H'), pd.to_datetime(['2024-01-03 12:00', '2024-01-07 20:00']))
+
+
+def test_resample_matches_pandas():
+    """日线/周线OHLCV与pandas resample一致，开头不完整的高周期为NaN"""
+    from backend.strategies.resampler import resample
+
+    df = _klines(24 * 40, '1h', seed=51)
+    for rule, pandas_rule in [('1D', '1D'), ('1W', 'W-MON'), ('4H', '4h')]:
+        result = resample(df, rule, '1H').bars
+        expected = df.set_index('timestamp').resample(pandas_rule, label='left', closed='left').agg(
+            {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+        expected = expected.dropna().reset_index()
+        assert len(result) == len(expected)
+        np.testing.assert_array_equal(result['timestamp'].to_numpy(), expected['timestamp'].to_numpy())
+        first_complete = rule == '4H' and df['timestamp'].iloc[0].hour % 4 == 0
+        for col in ['open', 'high', 'low', 'close']:
+            np.testing.assert_array_equal(result[col].to_numpy()[1:], expected[col].to_numpy()[1:])
+            assert np.isnan(result[col].iloc[0]) != first_complete
+        np.testing.assert_allclose(result['volume'].to_numpy()[1:], expected['volume'].to_numpy()[1:])
+
+
+def test_align_has_no_lookahead():
+    """对齐结果只依赖已收盘的高周期：在前缀K线上计算与在完整K线上计算相同"""
+    from backend.strategies.resampler import resample
+
+    df = _klines(96 * 10, '15min', seed=52)
+    daily = resample(df, '1D', '15m')
+    full = daily.align('high')
+    previous = daily.align('high', shift=1)
+
+    # 当天最后一根15m K线（23:45）收盘时日线才可见
+    ts = df['timestamp']
+    day_end = (ts.dt.hour == 23) & (ts.dt.minute == 45)
+    changes = np.flatnonzero(np.diff(np.nan_to_num(full, nan=-1.0)) != 0) + 1
+    assert day_end.to_numpy()[changes].all()
+    np.testing.assert_array_equal(previous[1:][day_end.to_numpy()[1:]], full[:-1][day_end.to_numpy()[1:]])
+
+    for end in [50, 96 * 3 + 67, 96 * 6 + 95, 96 * 8]:
+        prefix = resample(df.iloc[:end], '1D', '15m').align('high')
+        np.testing.assert_array_equal(prefix, full[:end])
+
+
+def test_resample_is_cached():
+    """相同K线和周期的重采样取自缓存"""
+    from backend.strategies.indicator_cache import get_indicator_cache
+    from backend.strategies.resampler import resample
+
+    df = _klines(500, '1h', seed=53)
+    cache = get_indicator_cache()
+    first = resample(df, '1D', '1H')
+    misses = cache.misses
+    second = resample(df.copy(), '1D', '1H')
+    assert cache.misses == misses
+    assert second.visible is first.visible
+
+
+def test_htf_bars_incremental():
+    """增量维护的高周期与批量重采样一致，快照恢复后继续一致"""
+    from backend import indicators
+    from backend.strategies.resampler import resample, HTFBars
+    from backend.strategies.streaming import restore_indicator
+
+    df = _klines(24 * 30, '1h', seed=54)
+    daily = resample(df, '1D', '1H')
+    expected_high = daily.align(indicators.rolling_max(daily.bars['high'], 3))
+    expected_low = daily.align(indicators.rolling_min(daily.bars['low'], 3))
+
+    bars = df.to_dict('records')
+    htf = HTFBars('1D', '1H', size=3)
+    highs, lows = [], []
+    for i, bar in enumerate(bars):
+        if i == 300:
+            htf = restore_indicator(json.loads(json.dumps(htf.snapshot())))
+        htf.update(bar['timestamp'], bar['open'], bar['high'], bar['low'], bar['close'], bar['volume'])
+        highs.append(htf.highest())
+        lows.append(htf.lowest())
+    np.testing.assert_array_equal(highs, expected_high)
+    np.testing.assert_array_equal(lows, expected_low)
+
+
+def test_trend_breakout_daily_levels_on_lower_timeframes():
+    """趋势突破在1H/15m K线上：rolling模式按每天K线数换算窗口，calendar模式用真实日线，step()与批量一致"""
+    from backend.strategies import TrendBreakoutStrategy
+    from backend.strategies.resampler import resample
+
+    for freq, timeframe, per_day in [('1h', '1H', 24), ('15min', '15m', 96)]:
+        df = _klines(per_day * 25, freq, seed=55)
+
+        rolling = TrendBreakoutStrategy({'timeframe': timeframe})
+        high, low = rolling._calculate_daily_levels(df, 3)
+        np.testing.assert_array_equal(high, df['high'].rolling(per_day * 3).max())
+        np.testing.assert_array_equal(low, df['low'].rolling(per_day * 3).min())
+
+        params = {'timeframe': timeframe, 'daily_mode': 'calendar', 'linreg_period': per_day,
+                  'biggest_range_period': per_day, 'bars_valid': per_day // 4}
+        calendar = TrendBreakoutStrategy(params)
+        high, _ = calendar._calculate_daily_levels(df, 3)
+        daily = resample(df, '1D', timeframe).bars
+        # 1月6日收盘后取1月4~6日的日线；1月4日收盘前窗口含不完整的1月1日，为NaN
+        visible = np.flatnonzero(df['timestamp'] >= pd.Timestamp('2024-01-07'))[0]
+        assert high.iloc[visible] == daily['high'].iloc[3:6].max()
+        assert high.iloc[visible - 1 - per_day * 2] == daily['high'].iloc[1:4].max()
+        assert np.isnan(high.iloc[visible - 2 - per_day * 2])
+
+        for strategy in [rolling, calendar]:
+            expected = strategy.compute_signals(df)['signal'].to_numpy()
+            assert (expected != 0).sum() > 5
+            np.testing.assert_array_equal([strategy.step(bar) for bar in df.to_dict('records')], expected)
+
+    assert TrendBreakoutStrategy({'timeframe': '15m', 'daily_lookback': 3}).required_lookback() == 96 * 3 + 7
+    try:
+        TrendBreakoutStrategy({'daily_mode': 'weekly'}).compute_signals(df)
+        assert False, "未知日线模式应报错"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_timeframe_helpers()
+    test_resample_matches_pandas()
+    test_align_has_no_lookahead()
+    test_resample_is_cached()
+    test_htf_bars_incremental()
+    test_trend_breakout_daily_levels_on_lower_timeframes()
@@ -0,0 +1,108 @@
+"""
+测试蒙特卡洛稳健性检验
+验证三种重采样与逐条回测一致、置信区间表结构以及大规模路径的耗时
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _backtest(n_bars: int = 3000, seed: int = 2):
+    from backend.strategies import RSIStrategy, BacktestEngine
+
+    df = make_klines(n_bars, seed=seed)
+    engine = BacktestEngine(initial_capital=10000)
+    return engine, df, engine.run_backtest(RSIStrategy(), df)
+
+
+def test_path_metrics_match_engine():
+    """单条路径的指标与BacktestEngine._calculate_metrics一致"""
+    from backend.strategies.robustness import path_metrics
+
+    _, _, result = _backtest()
+    capital = result['data']['capital'].to_numpy()
+    returns = np.zeros_like(capital)
+    returns[1:] = capital[1:] / capital[:-1] - 1
+
+    metrics = path_metrics(returns[None, :])
+    assert np.isclose(metrics['total_return'][0], result['metrics']['total_return'])
+    assert np.isclose(metrics['sharpe_ratio'][0], result['metrics']['sharpe_ratio'])
+    assert np.isclose(metrics['max_drawdown'][0], result['metrics']['max_drawdown'])
+
+
+def test_random_starts_match_sliced_backtests():
+    """推迟起步的路径与在切片上重新撮合同一组信号的结果一致"""
+    from backend.strategies.robustness import MonteCarloRobustness
+
+    engine, df, result = _backtest()
+    mc = MonteCarloRobustness(engine, n_paths=50, batch_size=16, random_state=1)
+    samples = mc.random_starts(result, max_offset=1500, return_paths=True)
+    signals = result['data'][['signal']]
+
+    assert samples['paths'].shape == (50, len(df))
+    for k, offset in enumerate(samples['offsets'][:10]):
+        sliced, trades = engine._simulate_trading(df.iloc[offset:], signals.iloc[offset:])
+        expected = engine._calculate_metrics(sliced, trades)
+        np.testing.assert_allclose(samples['paths'][k, offset:], sliced['capital'].to_numpy(), rtol=1e-10)
+        assert (samples['paths'][k, :offset + 1] == engine.initial_capital).all()
+        for key in ['total_return', 'sharpe_ratio', 'max_drawdown']:
+            assert np.isclose(samples[key][k], expected[key], rtol=1e-8), f"offset={offset} {key}"
+
+
+def test_shuffle_and_bootstrap():
+    """打乱交易顺序不改变总收益；块长等于K线数时自助法复现原权益"""
+    from backend.strategies.robustness import MonteCarloRobustness
+
+    engine, df, result = _backtest()
+    mc = MonteCarloRobustness(engine, n_paths=200, random_state=3)
+
+    shuffled = mc.shuffle_trades(result, return_paths=True)
+    n_closed = int((result['trades']['side'] == -1).sum())
+    assert shuffled['paths'].shape == (200, n_closed + 1)
+    assert (shuffled['paths'][:, 0] == engine.initial_capital).all()
+    assert np.allclose(shuffled['total_return'], shuffled['total_return'][0])
+    assert shuffled['max_drawdown'].std() > 0
+
+    resampled = mc.shuffle_trades(result, replace=True)
+    assert resampled['total_return'].std() > 0
+
+    whole = MonteCarloRobustness(engine, n_paths=20, block_size=len(df)).block_bootstrap(result, return_paths=True)
+    np.testing.assert_allclose(whole['paths'], np.tile(result['data']['capital'].to_numpy(), (20, 1)))
+
+    bands = mc.run(result)
+    assert list(bands.index.get_level_values('method').unique()) == \
+        ['shuffle_trades', 'block_bootstrap', 'random_starts']
+    assert {'p5', 'p50', 'p95', 'mean', 'actual'} <= set(bands.columns)
+    assert (bands['p5'] <= bands['p95']).all()
+
+
+def test_large_path_count_speed():
+    """1万条路径 × 5000根K线在数秒内完成"""
+    from backend.strategies.robustness import MonteCarloRobustness
+
+    engine, _, result = _backtest(n_bars=5000)
+    mc = MonteCarloRobustness(engine, n_paths=10000)
+
+    for method in ['shuffle_trades', 'block_bootstrap', 'random_starts']:
+        start = time.perf_counter()
+        samples = getattr(mc, method)(result)
+        elapsed = time.perf_counter() - start
+        print(f"   {method}: 1万条路径耗时 {elapsed:.2f}s")
+        assert len(samples['total_return']) == 10000
+        assert elapsed < 15
+
+
+if __name__ == "__main__":
+    test_path_metrics_match_engine()
+    test_random_starts_match_sliced_backtests()
+    test_shuffle_and_bootstrap()
+    test_large_path_count_speed()
@@ -0,0 +1,132 @@
+"""
+测试流式指标和逐K线step()
+验证流式指标预热后与pandas批量计算一致、快照可恢复，
+以及各策略step()与compute_signals、流式增量回测与全量回测一致
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _stream(indicator, *columns):
+    return np.array([indicator.update(*values) for values in zip(*columns)])
+
+
+def test_indicators_match_pandas():
+    """滚动均值/标准差/极值、EWM、ATR、线性回归与pandas批量计算一致"""
+    from backend.strategies import TrendBreakoutStrategy
+    from backend.strategies.indicator_cache import IndicatorCache
+    from backend.strategies.streaming import (
+        RollingMean, RollingStd, RollingMax, RollingMin, EWM, ATR, RollingRegression
+    )
+
+    df = make_klines(5000, seed=11)
+    close = df['close']
+    values = close.tolist()
+    # 含NaN和连续相同值的序列
+    gappy = close.copy()
+    gappy.iloc[700:703] = np.nan
+    gappy.iloc[1500:1540] = gappy.iloc[1500]
+
+    for series in [close, gappy]:
+        x = series.tolist()
+        np.testing.assert_allclose(_stream(RollingMean(20), x), series.rolling(20).mean(), rtol=1e-10)
+        np.testing.assert_allclose(_stream(RollingStd(20), x), series.rolling(20).std(),
+                                   rtol=1e-7, atol=1e-9)
+        np.testing.assert_array_equal(_stream(RollingMax(37), x), series.rolling(37).max())
+        np.testing.assert_array_equal(_stream(RollingMin(37), x), series.rolling(37).min())
+        np.testing.assert_array_equal(_stream(EWM(span=26), x), series.ewm(span=26, adjust=False).mean())
+        np.testing.assert_array_equal(_stream(EWM.wilder(14), x), series.ewm(alpha=1 / 14, adjust=False).mean())
+    assert (_stream(RollingStd(20), gappy.tolist())[1519:1540] == 0).all()
+
+    np.testing.assert_array_equal(
+        _stream(ATR(20), df['high'].tolist(), df['low'].tolist(), values),
+        IndicatorCache().atr(df, 20).to_numpy(),
+    )
+    np.testing.assert_allclose(
+        _stream(RollingRegression(102), values),
+        TrendBreakoutStrategy()._calculate_linear_regression(close, 102), rtol=1e-9,
+    )
+
+
+def test_indicator_snapshot_restore():
+    """指标中途导出JSON快照后恢复，继续更新的结果与不中断相同"""
+    from backend.strategies.streaming import (
+        RollingStd, RollingMax, ATR, RollingRegression, restore_indicator
+    )
+
+    df = make_klines(800, seed=12)
+    high, low, close = df['high'].tolist(), df['low'].tolist(), df['close'].tolist()
+
+    for make, columns in [(lambda: RollingStd(30), [close]), (lambda: RollingMax(50), [close]),
+                          (lambda: ATR(14), [high, low, close]), (lambda: RollingRegression(60), [close])]:
+        expected = _stream(make(), *columns)
+        indicator = make()
+        head = _stream(indicator, *[c[:333] for c in columns])
+        restored = restore_indicator(json.loads(json.dumps(indicator.snapshot())))
+        tail = _stream(restored, *[c[333:] for c in columns])
+        np.testing.assert_array_equal(np.concatenate([head, tail]), expected)
+
+
+def test_step_matches_compute_signals():
+    """各策略逐根step()的信号与在完整K线上compute_signals相同，快照恢复后继续一致"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+        VolatilityHarvestStrategy, TrendBreakoutStrategy
+    )
+
+    df = make_klines(3000, seed=13)
+    bars = df.to_dict('records')
+
+    for strategy in [RSIStrategy(), MACDStrategy(), BollingerBandsStrategy(),
+                     VolatilityHarvestStrategy(), TrendBreakoutStrategy(),
+                     TrendBreakoutStrategy({'trend_lookback': 0, 'bars_valid': 2})]:
+        expected = strategy.compute_signals(df)['signal'].to_numpy()
+        assert (expected != 0).sum() > 10
+
+        head = [strategy.step(bar) for bar in bars[:1700]]
+        snapshot = json.loads(json.dumps(strategy.stream_snapshot()))
+        resumed = type(strategy)(strategy.params)
+        resumed.restore_stream(snapshot)
+        tail = [resumed.step(bar) for bar in bars[1700:]]
+        np.testing.assert_array_equal(head + tail, expected, err_msg=strategy.name)
+
+        strategy.reset_stream()
+        assert strategy.step(bars[0]) == expected[0]
+
+
+def test_streaming_incremental_backtest():
+    """流式增量回测与全量回测一致，且不保留K线窗口"""
+    from backend.strategies import VolatilityHarvestStrategy, TrendBreakoutStrategy, BacktestEngine
+    from backend.strategies.incremental_backtest import IncrementalBacktest
+
+    df = make_klines(2500, seed=14)
+    for strategy_cls in [VolatilityHarvestStrategy, TrendBreakoutStrategy]:
+        full = BacktestEngine().run_backtest(strategy_cls(), df)
+
+        incremental = IncrementalBacktest(strategy_cls(), streaming=True)
+        incremental.append(df.iloc[:1200])
+        snapshot = json.loads(json.dumps(incremental.snapshot()))
+        incremental = IncrementalBacktest.restore(strategy_cls(), snapshot)
+        for i in range(1200, len(df), 9):
+            incremental.append(df.iloc[i:i + 9])
+
+        assert incremental.buffer.empty
+        assert np.isclose(incremental.metrics['final_capital'], full['metrics']['final_capital'], rtol=1e-12)
+        np.testing.assert_array_equal(incremental.trades['index'], full['trades']['index'])
+
+
+if __name__ == "__main__":
+    test_indicators_match_pandas()
+    test_indicator_snapshot_restore()
+    test_step_matches_compute_signals()
+    test_streaming_incremental_backtest()
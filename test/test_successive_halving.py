@@ -0,0 +1,102 @@
+"""
+测试逐轮减半参数搜索
+验证各轮区间划分、完整区间上的结果与网格回测一致，以及用少量预算找到接近最优的参数
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+import numpy as np
+
+from test.conftest import make_klines
+
+
+def _mean_reverting_klines(n_bars: int, seed: int):
+    """带均值回归成分和缓慢趋势的K线（参数优劣在不同区间上较稳定）"""
+    return make_klines(n_bars, seed=seed, drift=0.0002, volatility=0.004, mean_reversion=0.03)
+
+
+GRIDS = {
+    'RSIStrategy': {'rsi_period': [5, 7, 9, 11, 14, 18, 21, 25, 30],
+                    'oversold_threshold': [20, 25, 30], 'overbought_threshold': [65, 70, 75]},
+    'MACDStrategy': {'fast_period': [6, 8, 10, 12, 15], 'slow_period': [20, 26, 32, 40],
+                     'signal_period': [5, 7, 9, 12]},
+    'BollingerBandsStrategy': {'bb_period': [10, 14, 18, 20, 25, 30, 40, 50],
+                               'bb_std': [1.0, 1.5, 2.0, 2.5, 3.0]},
+}
+
+
+def test_halving_budgets():
+    """各轮K线数按eta倍增长，最后一轮为完整区间，剩余组合不少于1个"""
+    from backend.strategies.successive_halving import SuccessiveHalvingSearch
+
+    search = SuccessiveHalvingSearch(eta=3, min_bars=200)
+    assert search._budgets(6000, 81) == [200, 600, 1800, 6000]
+    assert search._budgets(6000, 9) == [200, 6000]  # 9组 -> 3组在完整区间上评估
+    assert search._budgets(6000, 1) == [6000]
+    assert search._budgets(150, 81) == [150]
+
+
+def test_full_rung_matches_grid():
+    """完整区间上的评估结果与run_grid一致，最佳参数从中选出"""
+    from backend.strategies import RSIStrategy, BacktestEngine
+    from backend.strategies.successive_halving import SuccessiveHalvingSearch
+
+    df = _mean_reverting_klines(3000, seed=3)
+    grid = GRIDS['RSIStrategy']
+    result = SuccessiveHalvingSearch(metric='win_rate', min_bars=300).search(RSIStrategy, df, grid)
+    full = BacktestEngine().run_grid(RSIStrategy, df, grid)
+
+    evaluations = result['evaluations']
+    finalists = evaluations[evaluations['bars'] == len(df)]
+    assert 1 <= len(finalists) < len(full)
+    np.testing.assert_allclose(finalists['win_rate'].to_numpy(),
+                               full['win_rate'].to_numpy()[finalists['combo'].to_numpy()])
+    assert result['best_score'] == finalists['win_rate'].max()
+    assert result['n_evaluations'] == len(evaluations)
+
+
+def test_finds_near_optimal_params():
+    """逐轮减半和Hyperband用远少于穷举的预算找到排名前10%的参数"""
+    from backend import strategies
+    from backend.strategies import BacktestEngine
+    from backend.strategies.successive_halving import SuccessiveHalvingSearch
+
+    df = _mean_reverting_klines(6000, seed=26)
+    engine = BacktestEngine()
+
+    for name, grid in GRIDS.items():
+        strategy_cls = getattr(strategies, name)
+        full = np.sort(engine.run_grid(strategy_cls, df, grid)['sharpe_ratio'].to_numpy())[::-1]
+
+        for mode in ['halving', 'hyperband']:
+            result = SuccessiveHalvingSearch(mode=mode).search(strategy_cls, df, grid)
+            rank = int((full > result['best_score'] + 1e-12).sum())
+            print(f"   {name} {mode}: 排名 {rank + 1}/{len(full)}，预算 {result['budget_ratio']:.0%}")
+            assert rank <= len(full) * 0.1, f"{name} {mode}"
+            assert result['budget_ratio'] < 0.4, f"{name} {mode}"
+
+
+def test_optimize_params_search_mode():
+    """optimize_params可切换为按预算搜索"""
+    from backend.strategies import BollingerBandsStrategy
+
+    df = _mean_reverting_klines(2000, seed=4)
+    grid = GRIDS['BollingerBandsStrategy']
+    best_params, best_sharpe = BollingerBandsStrategy().optimize_params(df, grid, search='hyperband')
+
+    assert set(best_params) == set(grid)
+    assert best_params['bb_period'] in grid['bb_period']
+    assert np.isfinite(best_sharpe)
+
+
+if __name__ == "__main__":
+    test_halving_budgets()
+    test_full_rung_matches_grid()
+    test_finds_near_optimal_params()
+    test_optimize_params_search_mode()
@@ -0,0 +1,228 @@
+"""
+测试趋势突破策略
+验证O(n)滚动线性回归、数组状态机与原实现一致
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pytest
+import pandas as pd
+import numpy as np
+
+from test.conftest import make_klines
+
+# 对照测试的数据源：模拟K线总是运行，真实BTC数据只在本地历史K线库中有时运行
+SOURCES = ['synthetic', 'btc']
+
+
+def _load_klines(source: str) -> pd.DataFrame:
+    """模拟K线，或本地历史K线库中的BTC 4H数据（不足1000根时跳过测试）"""
+    if source == 'synthetic':
+        return make_klines(3000, seed=17)
+
+    db_path = os.path.join(project_root, "data", "historical_klines.db")
+    if os.path.exists(db_path):
+        from backend.data_fetchers.historical_data_manager import HistoricalDataManager
+        df = HistoricalDataManager(db_path=db_path).load_klines("BTC-USDT", "4H")
+        if len(df) >= 1000:
+            return df
+    pytest.skip(f"本地没有BTC 4H历史K线（{db_path}）")
+
+
+def _legacy_linear_regression(series: pd.Series, period: int) -> pd.Series:
+    """原逐窗口线性回归实现（对照基准）"""
+    def linreg(x):
+        if len(x) < period:
+            return np.nan
+        y = x.values
+        x_axis = np.arange(len(y))
+        n = len(y)
+        sum_x = np.sum(x_axis)
+        sum_y = np.sum(y)
+        sum_xy = np.sum(x_axis * y)
+        sum_x2 = np.sum(x_axis ** 2)
+        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x ** 2)
+        intercept = (sum_y - slope * sum_x) / n
+        return intercept + slope * (n - 1)
+
+    return series.rolling(window=period).apply(linreg, raw=False)
+
+
+@pytest.mark.parametrize('source', SOURCES)
+def test_linear_regression_matches_legacy(source):
+    """滚动求和的回归值与逐窗口最小二乘一致"""
+    from backend.strategies import TrendBreakoutStrategy
+
+    df = _load_klines(source)
+    strategy = TrendBreakoutStrategy()
+
+    for period in [2, 20, 102]:
+        expected = _legacy_linear_regression(df['close'], period)
+        result = strategy._calculate_linear_regression(df['close'], period)
+
+        np.testing.assert_array_equal(result.isna().to_numpy(), expected.isna().to_numpy())
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-10)
+        assert result.index.equals(df.index)
+
+
+def test_linear_regression_handles_missing_values():
+    """含NaN的窗口与原实现一样输出NaN"""
+    from backend.strategies import TrendBreakoutStrategy
+
+    close = make_klines(500, seed=3)['close'].copy()
+    close.iloc[[50, 51, 300]] = np.nan
+
+    expected = _legacy_linear_regression(close, 30)
+    result = TrendBreakoutStrategy()._calculate_linear_regression(close, 30)
+
+    np.testing.assert_array_equal(result.isna().to_numpy(), expected.isna().to_numpy())
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-10)
+
+
+@pytest.mark.parametrize('source', SOURCES)
+def test_signals_unchanged(source):
+    """替换回归实现后交易信号不变"""
+    from backend.strategies import TrendBreakoutStrategy
+
+    df = _load_klines(source)
+    strategy = TrendBreakoutStrategy()
+    result = strategy.generate_signals(df)
+
+    legacy = TrendBreakoutStrategy()
+    legacy._calculate_linear_regression = _legacy_linear_regression
+    expected = legacy.generate_signals(df)
+
+    np.testing.assert_array_equal(result['signal'].to_numpy(), expected['signal'].to_numpy())
+    print(f"   {len(df)} 根K线，{(result['signal'] != 0).sum()} 个信号，结果一致")
+
+
+def _legacy_state_machine(df: pd.DataFrame, params: dict) -> pd.DataFrame:
+    """原逐K线iloc待定订单状态机（对照基准），输入为已计算好入场价的DataFrame"""
+    df = df.copy()
+    stop_loss_pct = params['stop_loss_pct'] / 100
+    profit_target_pct = params['profit_target_pct'] / 100
+    trend_lookback = params['trend_lookback']
+    bars_valid = params['bars_valid']
+
+    df['signal'] = 0
+    for col in ['entry_price', 'stop_loss', 'take_profit']:
+        df[col] = np.nan
+
+    position = 0
+    entry_price = stop_loss = take_profit = 0
+    pending_long = pending_short = False
+    pending_bar = 0
+    start_idx = max(params['linreg_period'], params['biggest_range_period'],
+                    params['daily_lookback'] * 6) + trend_lookback + 5
+
+    def record(i, signal):
+        df.iloc[i, df.columns.get_loc('signal')] = signal
+        df.iloc[i, df.columns.get_loc('entry_price')] = entry_price
+        df.iloc[i, df.columns.get_loc('stop_loss')] = stop_loss
+        df.iloc[i, df.columns.get_loc('take_profit')] = take_profit
+
+    for i in range(start_idx, len(df)):
+        high, low = df.iloc[i]['high'], df.iloc[i]['low']
+        linreg_value = df.iloc[i - trend_lookback]['linreg'] if i >= trend_lookback else np.nan
+        close_lookback = df.iloc[i - trend_lookback]['close'] if i >= trend_lookback else df.iloc[i]['close']
+        if params['use_trend_filter'] and not np.isnan(linreg_value):
+            bullish, bearish = close_lookback > linreg_value, close_lookback < linreg_value
+        else:
+            bullish = bearish = True
+        long_entry = df.iloc[i]['long_entry_price']
+        short_entry = df.iloc[i]['short_entry_price']
+
+        if position == 1 and (low <= stop_loss or high >= take_profit):
+            df.iloc[i, df.columns.get_loc('signal')] = -1
+            position = 0
+        elif position == -1 and (high >= stop_loss or low <= take_profit):
+            df.iloc[i, df.columns.get_loc('signal')] = 1
+            position = 0
+
+        if position == 0:
+            if pending_long and (i - pending_bar) <= bars_valid:
+                if high >= long_entry and not np.isnan(long_entry):
+                    position, entry_price = 1, long_entry
+                    stop_loss = entry_price * (1 - stop_loss_pct)
+                    take_profit = entry_price * (1 + profit_target_pct)
+                    pending_long = False
+                    record(i, 1)
+            elif pending_short and (i - pending_bar) <= bars_valid:
+                if low <= short_entry and not np.isnan(short_entry):
+                    position, entry_price = -1, short_entry
+                    stop_loss = entry_price * (1 + stop_loss_pct)
+                    take_profit = entry_price * (1 - profit_target_pct)
+                    pending_short = False
+                    record(i, -1)
+
+            if not pending_long and not pending_short:
+                if bullish and not np.isnan(long_entry):
+                    pending_long, pending_bar = True, i
+                elif bearish and not bullish and not np.isnan(short_entry):
+                    pending_short, pending_bar = True, i
+
+            if pending_long and (i - pending_bar) > bars_valid:
+                pending_long = False
+            if pending_short and (i - pending_bar) > bars_valid:
+                pending_short = False
+
+    return df
+
+
+@pytest.mark.parametrize('source', SOURCES)
+def test_state_machine_matches_legacy(source):
+    """数组状态机与原iloc循环逐列逐位一致（待定订单、过期、止损止盈）"""
+    from backend.strategies import TrendBreakoutStrategy
+
+    df = _load_klines(source)
+    strategies = [
+        TrendBreakoutStrategy(),
+        TrendBreakoutStrategy(params={'use_trend_filter': False}),
+        TrendBreakoutStrategy(params={'bars_valid': 1, 'stop_loss_pct': 0.8, 'profit_target_pct': 0.5}),
+        TrendBreakoutStrategy(params={'linreg_period': 30, 'biggest_range_period': 40,
+                                      'price_entry_mult': 0.1, 'trend_lookback': 0}),
+    ]
+
+    for strategy in strategies:
+        result = strategy.generate_signals(df)
+        expected = _legacy_state_machine(result, strategy.params)
+
+        for col in ['signal', 'entry_price', 'stop_loss', 'take_profit']:
+            assert result[col].dtype == expected[col].dtype, f"{strategy.params} {col} 类型不一致"
+            np.testing.assert_array_equal(result[col].to_numpy(), expected[col].to_numpy(),
+                                          err_msg=f"{strategy.params} {col} 不一致")
+        print(f"   {(result['signal'] != 0).sum()} 个信号，结果一致")
+
+
+def test_state_machine_compiled_and_python_agree():
+    """编译后的状态机（有numba时）与纯Python列表输入的结果相同"""
+    from backend.strategies import TrendBreakoutStrategy
+    from backend.strategies.trend_breakout_strategy import _breakout_state_machine
+
+    df = TrendBreakoutStrategy().generate_signals(make_klines(1500, seed=12))
+    columns = [df[c].to_numpy() for c in
+               ['close', 'high', 'low', 'linreg', 'long_entry_price', 'short_entry_price']]
+    args = (164, 2, 6, 0.018, 0.016, True)
+
+    python_kernel = getattr(_breakout_state_machine, 'py_func', _breakout_state_machine)
+    from_arrays = _breakout_state_machine(*columns, *args)
+    from_lists = python_kernel(*[c.tolist() for c in columns], *args)
+    for a, b in zip(from_arrays, from_lists):
+        np.testing.assert_array_equal(a, b)
+
+
+if __name__ == "__main__":
+    for test in [test_linear_regression_matches_legacy, test_signals_unchanged,
+                 test_state_machine_matches_legacy]:
+        for source in SOURCES:
+            try:
+                test(source)
+            except pytest.skip.Exception as e:
+                print(f"   跳过 {test.__name__}[{source}]: {e}")
+    test_linear_regression_handles_missing_values()
+    test_state_machine_compiled_and_python_agree()
@@ -10,10 +10,13 @@ import os
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+import pytest
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from test.conftest import make_klines
+
 
 def test_volatility_harvest_strategy():
     """测试波动收割策略"""
@@ -176,8 +179,153 @@ def test_with_real_data():
         print(f"真实数据测试跳过: {str(e)}")
 
 
+def _legacy_state_machine(df: pd.DataFrame, params: dict) -> pd.DataFrame:
+    """原逐K线iloc状态机（对照基准），输入为已计算好指标的DataFrame"""
+    df = df.copy()
+    stop_loss_pct = params['stop_loss_pct'] / 100
+    profit_target_pct = params['profit_target_pct'] / 100
+    atr_multiplier = params['atr_multiplier']
+    breakout_bars = params['breakout_bars']
+
+    df['signal'] = 0
+    for col in ['entry_price', 'stop_loss', 'take_profit', 'trailing_stop']:
+        df[col] = np.nan
+
+    position = 0
+    entry_price = stop_loss = take_profit = trailing_stop = highest = 0
+    lowest = float('inf')
+    start = max(params['atr_period'], params['atr_trail_period'], params['trend_ema_period']) + breakout_bars
+
+    for i in range(start, len(df)):
+        price, high, low = df.iloc[i]['close'], df.iloc[i]['high'], df.iloc[i]['low']
+        prev_close = df.iloc[i - breakout_bars]['close']
+        atr_value = df.iloc[i - 2]['atr'] if i >= 2 else df.iloc[i]['atr']
+        trail = df.iloc[i]['atr_trail']
+        ema = df.iloc[i]['ema_trend']
+        volatility_ok = atr_value > params['entry_atr_threshold']
+        if params['use_trend_filter']:
+            bullish, bearish = price > ema, price < ema
+        else:
+            bullish = bearish = True
+
+        if position == 1:
+            highest = max(highest, high)
+            trailing_stop = max(trailing_stop, highest - trail * atr_multiplier)
+            if low <= stop_loss or high >= take_profit or (low <= trailing_stop and trailing_stop > entry_price):
+                df.iloc[i, df.columns.get_loc('signal')] = -1
+                position = 0
+        elif position == -1:
+            lowest = min(lowest, low)
+            trailing_stop = min(trailing_stop, lowest + trail * atr_multiplier)
+            if high >= stop_loss or low <= take_profit or (high >= trailing_stop and trailing_stop < entry_price):
+                df.iloc[i, df.columns.get_loc('signal')] = 1
+                position = 0
+
+        if position == 0 and volatility_ok:
+            if price > prev_close and bullish:
+                position, entry_price = 1, price
+                stop_loss = price * (1 - stop_loss_pct)
+                take_profit = price * (1 + profit_target_pct)
+                trailing_stop = price - trail * atr_multiplier
+                highest = high
+            elif price < prev_close and bearish and not bullish:
+                position, entry_price = -1, price
+                stop_loss = price * (1 + stop_loss_pct)
+                take_profit = price * (1 - profit_target_pct)
+                trailing_stop = price + trail * atr_multiplier
+                lowest = low
+            else:
+                continue
+            df.iloc[i, df.columns.get_loc('signal')] = position
+            for col, value in [('entry_price', entry_price), ('stop_loss', stop_loss),
+                               ('take_profit', take_profit), ('trailing_stop', trailing_stop)]:
+                df.iloc[i, df.columns.get_loc(col)] = value
+
+    return df
+
+
+def test_state_machine_matches_legacy():
+    """数组状态机与原iloc循环逐列逐位一致（含激进版、保守版）"""
+    from backend.strategies.volatility_harvest_strategy import (
+        VolatilityHarvestStrategy, VolatilityHarvestAggressiveStrategy,
+        VolatilityHarvestConservativeStrategy
+    )
+
+    df = make_klines(3000, seed=13)
+    strategies = [
+        VolatilityHarvestStrategy(),
+        VolatilityHarvestAggressiveStrategy(),
+        VolatilityHarvestConservativeStrategy(),
+        VolatilityHarvestStrategy(params={'use_trend_filter': False, 'entry_atr_threshold': 800}),
+    ]
+
+    for strategy in strategies:
+        result = strategy.generate_signals(df)
+        expected = _legacy_state_machine(result, strategy.params)
+
+        for col in ['signal', 'entry_price', 'stop_loss', 'take_profit', 'trailing_stop']:
+            assert result[col].dtype == expected[col].dtype, f"{strategy.name} {col} 类型不一致"
+            np.testing.assert_array_equal(result[col].to_numpy(), expected[col].to_numpy(),
+                                          err_msg=f"{strategy.name} {col} 不一致")
+        print(f"   {strategy.name}: {(result['signal'] != 0).sum()} 个信号，结果一致")
+
+
+def test_state_machine_compiled_and_python_agree():
+    """编译后的状态机（有numba时）与纯Python列表输入的结果相同"""
+    from backend.strategies.volatility_harvest_strategy import (
+        VolatilityHarvestStrategy, _harvest_state_machine
+    )
+
+    strategy = VolatilityHarvestStrategy()
+    df = strategy.generate_signals(make_klines(1000, seed=2))
+    columns = [df[c].to_numpy() for c in ['close', 'high', 'low', 'atr', 'atr_trail', 'ema_trend']]
+    args = (206, 1, 0.0, 0.03, 0.013, 4.5, True)
+
+    python_kernel = getattr(_harvest_state_machine, 'py_func', _harvest_state_machine)
+    from_arrays = _harvest_state_machine(*columns, *args)
+    from_lists = python_kernel(*[c.tolist() for c in columns], *args)
+    for a, b in zip(from_arrays, from_lists):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_state_machine_numba_matches_legacy():
+    """numba编译的状态机与原iloc循环逐位一致（未安装numba时跳过）"""
+    numba = pytest.importorskip('numba')
+    from backend.strategies.volatility_harvest_strategy import (
+        VolatilityHarvestStrategy, VolatilityHarvestAggressiveStrategy, _harvest_state_machine
+    )
+
+    # 不依赖导入时的NUMBA_AVAILABLE，显式编译纯Python版本
+    compiled = numba.njit(getattr(_harvest_state_machine, 'py_func', _harvest_state_machine))
+
+    df = make_klines(3000, seed=13)
+    for strategy in [VolatilityHarvestStrategy(), VolatilityHarvestAggressiveStrategy(),
+                     VolatilityHarvestStrategy(params={'use_trend_filter': False, 'entry_atr_threshold': 800})]:
+        p = strategy.params
+        result = strategy.generate_signals(df)
+        expected = _legacy_state_machine(result, p)
+
+        outputs = compiled(
+            *[np.ascontiguousarray(result[c].to_numpy(dtype=np.float64))
+              for c in ['close', 'high', 'low', 'atr', 'atr_trail', 'ema_trend']],
+            max(p['atr_period'], p['atr_trail_period'], p['trend_ema_period']) + p['breakout_bars'],
+            p['breakout_bars'], p['entry_atr_threshold'], p['stop_loss_pct'] / 100,
+            p['profit_target_pct'] / 100, p['atr_multiplier'], p['use_trend_filter'],
+        )
+        for col, values in zip(['signal', 'entry_price', 'stop_loss', 'take_profit', 'trailing_stop'], outputs):
+            np.testing.assert_array_equal(values, expected[col].to_numpy(),
+                                          err_msg=f"{strategy.name} {col} 不一致")
+        assert (outputs[0] != 0).sum() > 0
+
+
 if __name__ == "__main__":
     # 运行测试
     test_volatility_harvest_strategy()
     test_strategy_agent_integration()
     test_with_real_data()
+    test_state_machine_matches_legacy()
+    test_state_machine_compiled_and_python_agree()
+    try:
+        test_state_machine_numba_matches_legacy()
+    except pytest.skip.Exception as e:
+        print(f"   跳过 test_state_machine_numba_matches_legacy: {e}")
@@ -0,0 +1,121 @@
+"""
+测试滚动前推优化
+验证折划分、训练得分与逐窗口网格回测一致、并行与串行一致以及样本外权益拼接
+"""
+
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from test.conftest import make_klines
+
+
+RSI_GRID = {'rsi_period': [7, 14], 'oversold_threshold': [25, 30], 'overbought_threshold': [70, 75]}
+
+
+def test_fold_layout():
+    """滚动窗口与扩展窗口的折划分"""
+    from backend.strategies.walk_forward import WalkForwardOptimizer
+
+    rolling = WalkForwardOptimizer(train_size=100, test_size=50)
+    assert rolling.folds(300) == [(0, 100, 150), (50, 150, 200), (100, 200, 250), (150, 250, 300)]
+
+    anchored = WalkForwardOptimizer(train_size=100, test_size=50, step=100, anchored=True)
+    assert anchored.folds(320) == [(0, 100, 150), (0, 200, 250)]
+
+    assert WalkForwardOptimizer(train_size=100, test_size=50).folds(149) == []
+
+
+def test_signals_are_causal():
+    """信号只依赖当前及之前的K线：整段计算后截断与只用前缀计算一致（各折共用整段信号的前提）"""
+    from backend.strategies import (
+        RSIStrategy, MACDStrategy, BollingerBandsStrategy,
+        VolatilityHarvestStrategy, TrendBreakoutStrategy
+    )
+
+    df = make_klines(1500, seed=8)
+    for strategy in [RSIStrategy(), MACDStrategy(), BollingerBandsStrategy(),
+                     VolatilityHarvestStrategy(), TrendBreakoutStrategy()]:
+        full = strategy.compute_signals(df)['signal'].to_numpy()
+        for end in [400, 1000]:
+            prefix = strategy.compute_signals(df.iloc[:end])['signal'].to_numpy()
+            np.testing.assert_array_equal(full[:end], prefix, err_msg=strategy.name)
+
+
+def test_train_scores_match_grid():
+    """扩展窗口下每折训练得分与在前缀上run_grid的结果一致，最佳参数据此选出"""
+    from backend.strategies import RSIStrategy, BacktestEngine
+    from backend.strategies.walk_forward import WalkForwardOptimizer
+
+    df = make_klines(1600, seed=9)
+    optimizer = WalkForwardOptimizer(train_size=600, test_size=300, anchored=True, max_workers=1)
+    result = optimizer.run(RSIStrategy, df, RSI_GRID)
+    engine = BacktestEngine(initial_capital=10000)
+
+    assert len(result['folds']) == 3
+    for k, (_, train_end, _) in enumerate(optimizer.folds(len(df))):
+        grid = engine.run_grid(RSIStrategy, df.iloc[:train_end], RSI_GRID)
+        np.testing.assert_allclose(result['train_scores'][:, k], grid['sharpe_ratio'].to_numpy(), rtol=1e-10)
+        best = grid.iloc[int(np.nanargmax(grid['sharpe_ratio'].to_numpy()))]
+        assert result['folds']['params'].iloc[k] == {key: best[key] for key in RSI_GRID}
+
+
+def test_parallel_matches_serial():
+    """多进程与单进程结果一致"""
+    from backend.strategies import BollingerBandsStrategy
+    from backend.strategies.walk_forward import WalkForwardOptimizer
+
+    df = make_klines(1500, seed=10)
+    grid = {'bb_period': [15, 20, 25], 'bb_std': [1.5, 2.0, 2.5]}
+    kwargs = dict(train_size=500, test_size=250, chunk_size=2)
+
+    serial = WalkForwardOptimizer(max_workers=1, **kwargs).run(BollingerBandsStrategy, df, grid)
+    parallel = WalkForwardOptimizer(max_workers=2, **kwargs).run(BollingerBandsStrategy, df, grid)
+
+    np.testing.assert_array_equal(parallel['train_scores'], serial['train_scores'])
+    np.testing.assert_array_equal(parallel['oos_equity'].to_numpy(), serial['oos_equity'].to_numpy())
+
+
+def test_stitched_oos_equity():
+    """样本外权益按期末权益接续，重叠的测试窗口只取到下一折测试开始前"""
+    from backend.strategies import RSIStrategy
+    from backend.strategies.walk_forward import WalkForwardOptimizer
+
+    df = make_klines(1500, seed=11)
+    optimizer = WalkForwardOptimizer(train_size=500, test_size=300, step=200, max_workers=1)
+    result = optimizer.run(RSIStrategy, df, RSI_GRID)
+    folds, fold_equity, oos = result['folds'], result['fold_equity'], result['oos_equity']
+
+    assert len(fold_equity) == len(folds) == 4
+    assert all(len(equity) == 300 for equity in fold_equity)
+    assert len(oos) == 200 * 3 + 300
+    assert oos.index.is_monotonic_increasing and oos.index.is_unique
+    assert oos.iloc[0] == 10000
+
+    # 每段与对应折的权益成比例，比例为上一段期末权益/初始资金
+    capital = 10000.0
+    position = 0
+    for k, equity in enumerate(fold_equity):
+        length = 200 if k < 3 else 300
+        segment = oos.iloc[position:position + length].to_numpy()
+        np.testing.assert_allclose(segment, equity.to_numpy()[:length] * capital / 10000, rtol=1e-12)
+        capital = segment[-1]
+        position += length
+
+    assert np.isclose(result['oos_metrics']['final_capital'], oos.iloc[-1])
+    for k in range(len(folds)):
+        assert np.isclose(folds['total_return_pct'].iloc[k],
+                          (fold_equity[k].iloc[-1] / 10000 - 1) * 100)
+
+
+if __name__ == "__main__":
+    test_fold_layout()
+    test_signals_are_causal()
+    test_train_scores_match_grid()
+    test_parallel_matches_serial()
+    test_stitched_oos_equity()